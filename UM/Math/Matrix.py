@@ -51,11 +51,11 @@ class Matrix(object):
             self._data[index, 3] = 0
 
     def multiply(self, matrix):
-        self._data = numpy.dot(self._data, matrix.getData())
+        self._data[:] = numpy.dot(self._data, matrix.getData())
         return self
 
     def preMultiply(self, matrix):
-        self._data = numpy.dot(matrix.getData(),self._data)
+        self._data[:] = numpy.dot(matrix.getData(),self._data)
         return self
 
     ##  Get raw data.
@@ -63,13 +63,27 @@ class Matrix(object):
     def getData(self):
         return self._data.astype(numpy.float32)
 
+    ##  Make this matrix read-only.
+    #
+    #   Any attempt to modify a frozen matrix in place raises a ValueError. Copies of a frozen
+    #   matrix, for example the results of getInverse() or deepcopy(), can be modified again.
+    #
+    #   \return \type{Matrix} This matrix.
+    def freeze(self):
+        self._data.flags.writeable = False
+        return self
+
+    ##  Check whether this matrix is read-only, see freeze().
+    def isFrozen(self):
+        return not self._data.flags.writeable
+
     ##  Create a 4x4 identity matrix. This overwrites any existing data.
     def setToIdentity(self):
-        self._data = numpy.identity(4,dtype=numpy.float32)
+        self._data[:] = numpy.identity(4,dtype=numpy.float32)
 
     ##  Invert the matrix
     def invert(self):
-        self._data = numpy.linalg.inv(self._data)
+        self._data[:] = numpy.linalg.inv(self._data)
 
     ##  Return a inverted copy of the matrix.
     #   \returns The invertex matrix.
@@ -93,7 +107,7 @@ class Matrix(object):
     def setByTranslation(self, direction):
         M = numpy.identity(4,dtype=numpy.float32)
         M[:3, 3] = direction.getData()[:3]
-        self._data = M
+        self._data[:] = M
 
     def setTranslation(self, translation):
         self._data[:3, 3] = translation.getData()
@@ -131,7 +145,7 @@ class Matrix(object):
             # rotation not around origin
             point = numpy.array(point[:3], dtype=numpy.float32, copy=False)
             M[:3, 3] = point - numpy.dot(R, point)
-        self._data = M
+        self._data[:] = M
 
     ##  Scale the matrix by factor wrt origin & direction.
     #   \param factor The factor by which to scale
@@ -161,7 +175,7 @@ class Matrix(object):
             M[:3, :3] -= factor * numpy.outer(direction_data, direction_data)
             if origin is not None:
                 M[:3, 3] = (factor * numpy.dot(origin[:3], direction_data)) * direction_data
-        self._data = M
+        self._data[:] = M
 
     def getScale(self):
         x = numpy.linalg.norm(self._data[0,0:3])
@@ -28,6 +28,20 @@ class Quaternion(object):
     def getData(self):
         return self._data
 
+    ##  Make this quaternion read-only.
+    #
+    #   Any attempt to modify a frozen quaternion in place raises a ValueError. Copies of a frozen
+    #   quaternion, for example the results of arithmetic or deepcopy(), can be modified again.
+    #
+    #   \return \type{Quaternion} This quaternion.
+    def freeze(self):
+        self._data.flags.writeable = False
+        return self
+
+    ##  Check whether this quaternion is read-only, see freeze().
+    def isFrozen(self):
+        return not self._data.flags.writeable
+
     @property
     def x(self):
         return self._data[0]
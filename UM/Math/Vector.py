@@ -31,7 +31,7 @@ class Vector(object):
     #   \param y Y coordinate of vector.
     #   \param z Z coordinate of vector.
     def setData(self, x = 0,y = 0,z = 0):
-        self._data = numpy.array([x,y,z],dtype=numpy.float32)
+        self._data[:] = (x, y, z)
     
     def flip(self):
         self._data[0] = -1 * self._data[0]
@@ -44,6 +44,20 @@ class Vector(object):
     def getData(self):
         return self._data
 
+    ##  Make this vector read-only.
+    #
+    #   Any attempt to modify a frozen vector in place raises a ValueError. Copies of a frozen
+    #   vector, for example the results of arithmetic or deepcopy(), can be modified again.
+    #
+    #   \return \type{Vector} This vector.
+    def freeze(self):
+        self._data.flags.writeable = False
+        return self
+
+    ##  Check whether this vector is read-only, see freeze().
+    def isFrozen(self):
+        return not self._data.flags.writeable
+
     ##  Return the x component of this vector
     @property
     def x(self):
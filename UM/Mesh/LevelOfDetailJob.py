@@ -0,0 +1,65 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Job import Job
+
+import math
+
+##  A Job subclass that creates levels of detail for a mesh.
+#
+#   Every level is created from the previous level with MeshData::simplify(), using cells twice
+#   the size of the cells of the previous level, starting at 1/512th of the size of the mesh.
+#   Cell sizes that do not reduce the amount of faces enough are skipped. The levels are stored
+#   in the mesh with MeshData::setLevelsOfDetail() and are also the result of this job. When the
+#   mesh changes while the levels are created, they are dropped and the result is None.
+class LevelOfDetailJob(Job):
+    ##  Initialize.
+    #
+    #   \param mesh \type{MeshData} The mesh to create levels of detail for.
+    def __init__(self, mesh):
+        super().__init__()
+        self._mesh = mesh
+
+    ##  Get the mesh levels of detail are created for.
+    def getMesh(self):
+        return self._mesh
+
+    def run(self):
+        generation = self._mesh.getGeneration()
+        levels = []
+
+        extents = self._mesh.getExtents()
+        size = max(extents.width, extents.height, extents.depth)
+        cell_size = size / _initial_resolution
+
+        source = self._mesh
+        error = 0.0
+        while cell_size > 0 and cell_size < size and len(levels) < _maximum_levels and source.getFaceCount() > _minimum_face_count:
+            level = source.simplify(cell_size)
+            if level.getFaceCount() <= source.getFaceCount() * _minimum_reduction:
+                # Every clustering moves vertices at most one cell diagonal.
+                error += cell_size * math.sqrt(3)
+                levels.append((error, level))
+                source = level
+
+            cell_size *= 2
+
+        if self._mesh.getQuantizationMatrix() is not None:
+            for error, level in levels:
+                level.compact()
+
+        if self._mesh.setLevelsOfDetail(levels, generation):
+            self.setResult(levels)
+
+##  Internal
+#   The amount of cells along the largest side of the mesh for the first level.
+_initial_resolution = 512
+
+#   The maximum amount of levels.
+_maximum_levels = 6
+
+#   No more levels are created once a level has fewer faces than this.
+_minimum_face_count = 1000
+
+#   A level is only kept if it has at most this fraction of the faces of the previous level.
+_minimum_reduction = 0.5
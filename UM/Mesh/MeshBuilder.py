@@ -16,33 +16,25 @@ class MeshBuilder:
         return self._mesh_data
 
     def addLine(self, v0, v1, **kwargs):
-        self._mesh_data.addVertex(v0.x, v0.y, v0.z)
-        self._mesh_data.addVertex(v1.x, v1.y, v1.z)
-
-        color = kwargs.get("color", None)
-        if color:
-            self._mesh_data.setVertexColor(self._mesh_data.getVertexCount() - 2, color)
-            self._mesh_data.setVertexColor(self._mesh_data.getVertexCount() - 1, color)
+        vertices = numpy.asarray([
+            [v0.x, v0.y, v0.z],
+            [v1.x, v1.y, v1.z]
+        ], dtype=numpy.float32)
+        self._mesh_data.addVertices(vertices, colors = self._createColors(kwargs.get("color", None), 2))
 
     def addFace(self, v0, v1, v2, **kwargs):
+        vertices = numpy.asarray([
+            [v0.x, v0.y, v0.z],
+            [v1.x, v1.y, v1.z],
+            [v2.x, v2.y, v2.z]
+        ], dtype=numpy.float32)
+
+        normals = None
         normal = kwargs.get("normal", None)
         if normal:
-            self._mesh_data.addFaceWithNormals(
-                                v0.x, v0.y, v0.z,
-                                normal.x, normal.y, normal.z,
-                                v1.x, v1.y, v1.z,
-                                normal.x, normal.y, normal.z,
-                                v2.x, v2.y, v2.z,
-                                normal.x, normal.y, normal.z
-                            )
-        else:
-            self._mesh_data.addFace(v0.x, v0.y, v0.z, v1.x, v1.y, v1.z, v2.x, v2.y, v2.z)
+            normals = numpy.asarray([[normal.x, normal.y, normal.z]] * 3, dtype=numpy.float32)
 
-        color = kwargs.get("color", None)
-        if color:
-            self._mesh_data.setVertexColor(self._mesh_data.getVertexCount() - 3, color)
-            self._mesh_data.setVertexColor(self._mesh_data.getVertexCount() - 2, color)
-            self._mesh_data.setVertexColor(self._mesh_data.getVertexCount() - 1, color)
+        self._mesh_data.addFaces(vertices, normals = normals, colors = self._createColors(kwargs.get("color", None), 3))
 
     def addQuad(self, v0, v1, v2, v3, **kwargs):
         self.addFace(v0, v2, v1,
@@ -80,7 +72,7 @@ class MeshBuilder:
             [maxW, maxH, minD],
             [maxW, minH, minD],
         ], dtype=numpy.float32)
-        self._mesh_data.addVertices(verts)
+        self._mesh_data.addVertices(verts, colors = self._createColors(kwargs.get("color", None), len(verts)))
 
         indices = numpy.asarray([
             [start, start + 2, start + 1],
@@ -103,12 +95,6 @@ class MeshBuilder:
         ], dtype=numpy.int32)
         self._mesh_data.addIndices(indices)
 
-        color = kwargs.get("color", None)
-        if color:
-            vertex_count = self._mesh_data.getVertexCount()
-            for i in range(1, 9):
-                self._mesh_data.setVertexColor(vertex_count - i, color)
-
     def addArc(self, **kwargs):
         radius = kwargs["radius"]
         axis = kwargs["axis"]
@@ -126,18 +112,18 @@ class MeshBuilder:
         angle_increment = max_angle / sections
         angle = 0
 
+        vertices = []
         point = start + center
         m = Matrix()
         while angle <= max_angle:
-            self._mesh_data.addVertex(point.x, point.y, point.z)
+            vertices.append([point.x, point.y, point.z])
             angle += angle_increment
             m.setByRotationAxis(angle, axis)
             point = start.multiply(m) + center
-            self._mesh_data.addVertex(point.x, point.y, point.z)
+            vertices.append([point.x, point.y, point.z])
 
-            if color:
-                self._mesh_data.setVertexColor(self._mesh_data.getVertexCount() - 2, color)
-                self._mesh_data.setVertexColor(self._mesh_data.getVertexCount() - 1, color)
+        if vertices:
+            self._mesh_data.addVertices(numpy.asarray(vertices, dtype=numpy.float32), colors = self._createColors(color, len(vertices)))
 
     def addDonut(self, **kwargs):
         inner_radius = kwargs["inner_radius"]
@@ -153,7 +139,6 @@ class MeshBuilder:
 
         vertices = []
         indices = []
-        colors = []
 
         start = self._mesh_data.getVertexCount()
 
@@ -187,20 +172,14 @@ class MeshBuilder:
             indices.append( [v3, v6, v4] )
             indices.append( [v1, v3, v4] )
 
-            if color:
-                colors.append( [color.r, color.g, color.b, color.a] )
-                colors.append( [color.r, color.g, color.b, color.a] )
-                colors.append( [color.r, color.g, color.b, color.a] )
-
         matrix = Matrix()
         matrix.setByRotationAxis(angle, axis)
         vertices = numpy.asarray(vertices, dtype = numpy.float32)
         vertices = vertices.dot(matrix.getData()[0:3,0:3])
         vertices[:] += center.getData()
-        self._mesh_data.addVertices(vertices)
+        self._mesh_data.addVertices(vertices, colors = self._createColors(color, len(vertices)))
 
         self._mesh_data.addIndices(numpy.asarray(indices, dtype = numpy.int32))
-        self._mesh_data.addColors(numpy.asarray(colors, dtype = numpy.float32))
 
     def addPyramid(self, **kwargs):
         width = kwargs["width"]
@@ -230,7 +209,7 @@ class MeshBuilder:
         ], dtype=numpy.float32)
         verts = verts.dot(matrix.getData()[0:3,0:3])
         verts[:] += center.getData()
-        self._mesh_data.addVertices(verts)
+        self._mesh_data.addVertices(verts, colors = self._createColors(kwargs.get("color", None), len(verts)))
 
         indices = numpy.asarray([
             [start, start + 1, start + 4],
@@ -242,8 +221,11 @@ class MeshBuilder:
         ], dtype=numpy.int32)
         self._mesh_data.addIndices(indices)
 
-        color = kwargs.get("color", None)
-        if color:
-            vertex_count = self._mesh_data.getVertexCount()
-            for i in range(1, 6):
-                self._mesh_data.setVertexColor(vertex_count - i, color)
+    ##  private:
+
+    #   Create an array with the same color for a number of vertices, or None if there is no color.
+    def _createColors(self, color, count):
+        if not color:
+            return None
+
+        return numpy.asarray([[color.r, color.g, color.b, color.a]] * count, dtype=numpy.float32)
@@ -0,0 +1,268 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Mesh.MeshData import MeshData, MeshType
+from UM.Logger import Logger
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import time
+
+import numpy
+
+##  On-disk cache of parsed meshes.
+#
+#   Each entry stores the arrays of a MeshData object in a single file. The file starts with a
+#   small header (magic, header size and a JSON description of the arrays), followed by the raw
+#   array data, aligned so every array can be memory mapped directly. Loading an entry from the
+#   cache therefore only maps the file instead of parsing it.
+#
+#   Entries are keyed by the absolute path, size and modification time of the source file and
+#   by an identifier for the reader that produced the mesh, so a changed file or an updated reader
+#   never returns stale data. When the total size of the cache exceeds its maximum size, the least
+#   recently used entries are removed.
+class MeshCache:
+    ##  Initialize.
+    #
+    #   \param directory \type{string} The directory to store cache entries in.
+    #   \param max_size \type{int} The maximum size of all cache entries together, in bytes.
+    def __init__(self, directory, max_size):
+        super().__init__()
+        self._directory = directory
+        self._max_size = max_size
+
+    ##  Get the directory cache entries are stored in.
+    def getDirectory(self):
+        return self._directory
+
+    ##  Get the maximum size of the cache, in bytes.
+    def getMaximumSize(self):
+        return self._max_size
+
+    ##  Set the maximum size of the cache, in bytes.
+    def setMaximumSize(self, max_size):
+        self._max_size = max_size
+
+    ##  Get a mesh from the cache.
+    #
+    #   \param file_name \type{string} The name of the file the mesh was read from.
+    #   \param reader_key \type{string} Identifier for the reader (and version) that read the file.
+    #
+    #   \return \type{MeshData} A mesh backed by arrays mapped from the cache, or None if the file is not in the cache.
+    def get(self, file_name, reader_key):
+        path = self.getEntryPath(file_name, reader_key)
+        if not path or not os.path.isfile(path):
+            return None
+
+        try:
+            mesh = readMeshFile(path)
+        except (OSError, ValueError, KeyError) as e:
+            Logger.log("w", "Removing invalid mesh cache entry %s: %s", path, str(e))
+            self._removeEntry(path)
+            return None
+
+        # Mark the entry as recently used.
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return mesh
+
+    ##  Put a mesh into the cache.
+    #
+    #   \param file_name \type{string} The name of the file the mesh was read from.
+    #   \param reader_key \type{string} Identifier for the reader (and version) that read the file.
+    #   \param mesh \type{MeshData} The mesh to store.
+    def put(self, file_name, reader_key, mesh):
+        path = self.getEntryPath(file_name, reader_key)
+        if not path:
+            return
+
+        try:
+            os.makedirs(self._directory, exist_ok = True)
+            writeMeshFile(path, mesh)
+        except OSError as e:
+            Logger.log("w", "Unable to write mesh cache entry for %s: %s", file_name, str(e))
+            return
+
+        self.trim()
+
+    ##  Get the path of the entry for a certain file.
+    #
+    #   This can be used to write an entry from another process with writeMeshFile(), after which
+    #   it can be retrieved with get(). Call trim() afterwards to keep the cache within its maximum size.
+    #
+    #   \param file_name \type{string} The name of the file the mesh was read from.
+    #   \param reader_key \type{string} Identifier for the reader (and version) that read the file.
+    #   \return \type{string} The path of the entry, or None if the file can not be cached.
+    def getEntryPath(self, file_name, reader_key):
+        try:
+            file_path = os.path.abspath(file_name)
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        key = "{0}\n{1}\n{2}\n{3}\n{4}".format(file_path, stat.st_size, stat.st_mtime, reader_key, _format_version)
+        return os.path.join(self._directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + _entry_extension)
+
+    ##  Remove all entries from the cache.
+    def clear(self):
+        for path, size, last_used in self._listEntries():
+            self._removeEntry(path)
+
+    ##  Remove the least recently used entries until the cache fits its maximum size.
+    def trim(self):
+        entries = self._listEntries()
+        total_size = sum(entry[1] for entry in entries)
+        if total_size <= self._max_size:
+            return
+
+        entries.sort(key = lambda entry: entry[2])
+        for path, size, last_used in entries:
+            if total_size <= self._max_size:
+                break
+
+            if self._removeEntry(path):
+                total_size -= size
+
+    ##  private:
+
+    #   Get a list of (path, size, last used time) tuples for all entries in the cache.
+    #
+    #   Temporary files of entries that are being written are not entries. They are removed when they
+    #   have not been written to for a while, since they were left behind by a process that was stopped.
+    def _listEntries(self):
+        entries = []
+        try:
+            names = os.listdir(self._directory)
+        except OSError:
+            return entries
+
+        stale_time = time.time() - _stale_temp_age
+        for name in names:
+            is_entry = name.endswith(_entry_extension)
+            if not is_entry and not name.endswith(_temp_extension):
+                continue
+
+            path = os.path.join(self._directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            if is_entry:
+                entries.append((path, stat.st_size, stat.st_mtime))
+            elif stat.st_mtime < stale_time:
+                self._removeEntry(path)
+
+        return entries
+
+    def _removeEntry(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            # On Windows, entries that are still mapped can not be removed.
+            return False
+
+##  Internal
+_magic = b"UMMC"
+_format_version = 1
+_entry_extension = ".meshcache"
+_temp_extension = ".tmp"
+# Temporary files that have not been written to for this amount of seconds are left behind by a stopped process.
+_stale_temp_age = 10 * 60
+_alignment = 64
+
+def _align(offset):
+    return (offset + _alignment - 1) // _alignment * _alignment
+
+##  Write a mesh to a file in the format used by the mesh cache.
+#
+#   The file starts with a small header (magic, header size and a JSON description of the arrays),
+#   followed by the raw array data, aligned so every array can be memory mapped directly. The file
+#   is written to a temporary file next to it first, so a partially written file is never visible.
+#
+#   \param path \type{string} The file to write.
+#   \param mesh \type{MeshData} The mesh to write.
+def writeMeshFile(path, mesh):
+    arrays = {}
+    if mesh.getVertices() is not None:
+        arrays["vertices"] = mesh.getVertices()
+    if mesh.hasNormals():
+        arrays["normals"] = mesh.getNormals()[0:mesh.getVertexCount()]
+    if mesh.hasIndices():
+        arrays["indices"] = mesh.getIndices()
+    if mesh.hasColors():
+        arrays["colors"] = mesh.getColors()
+    if mesh.hasUVCoordinates():
+        arrays["uvs"] = mesh.getUVCoordinates()
+
+    header = { "type": mesh.getType().name, "arrays": {} }
+    offset = 0
+    for name, data in arrays.items():
+        data = numpy.ascontiguousarray(data)
+        arrays[name] = data
+        header["arrays"][name] = { "dtype": data.dtype.str, "shape": list(data.shape), "offset": offset }
+        offset = _align(offset + data.nbytes)
+
+    header_data = json.dumps(header).encode("utf-8")
+    data_start = _align(len(_magic) + 4 + len(header_data))
+
+    handle, temp_path = tempfile.mkstemp(dir = os.path.dirname(os.path.abspath(path)), suffix = _temp_extension)
+    try:
+        with os.fdopen(handle, "wb") as f:
+            f.write(_magic)
+            f.write(struct.pack("<I", len(header_data)))
+            f.write(header_data)
+            for name, data in arrays.items():
+                f.seek(data_start + header["arrays"][name]["offset"])
+                f.write(data.data)
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+##  Read a mesh from a file written by writeMeshFile().
+#
+#   \param path \type{string} The file to read.
+#   \param mapped \type{bool} True to memory map the arrays, copy-on-write, so they share the pages of the
+#                             file. False to read them into memory, so the file can be removed afterwards
+#                             on every platform.
+#   \return \type{MeshData} The mesh stored in the file.
+#   \exception ValueError If the file is not a mesh file.
+def readMeshFile(path, mapped = True):
+    with open(path, "rb") as f:
+        if f.read(len(_magic)) != _magic:
+            raise ValueError("Not a mesh cache entry")
+        header_size = struct.unpack("<I", f.read(4))[0]
+        header = json.loads(f.read(header_size).decode("utf-8"))
+
+        data_start = _align(len(_magic) + 4 + header_size)
+
+        arrays = {}
+        for name, description in header["arrays"].items():
+            dtype = numpy.dtype(description["dtype"])
+            shape = tuple(description["shape"])
+            count = int(numpy.prod(shape))
+            if count == 0:
+                arrays[name] = numpy.zeros(shape, dtype = dtype)
+            elif mapped:
+                # Copy-on-write mapping, so the mesh can be modified without changing the file.
+                arrays[name] = numpy.memmap(path, dtype = dtype, mode = "c", offset = data_start + description["offset"], shape = shape)
+            else:
+                f.seek(data_start + description["offset"])
+                arrays[name] = numpy.fromfile(f, dtype = dtype, count = count).reshape(shape)
+                if arrays[name].size != count:
+                    raise ValueError("Truncated mesh cache entry")
+
+    mesh = MeshData(**arrays)
+    mesh.setType(MeshType[header["type"]])
+    return mesh
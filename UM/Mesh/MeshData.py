@@ -3,10 +3,13 @@
 
 from UM.Mesh.Vertex import Vertex
 from UM.Math.Vector import Vector
+from UM.Math.Matrix import Matrix
 from UM.Math.AxisAlignedBox import AxisAlignedBox
 from UM.Signal import Signal, SignalEmitter
 
 import copy
+import itertools
+import math
 import numpy
 import numpy.linalg
 from enum import Enum
@@ -38,10 +41,29 @@ class MeshData(SignalEmitter):
         self._face_count = len(self._indices) if self._indices is not None else 0
         self._type = MeshType.faces
         self._file_name = None
+        self._bounds = None
+        self._position_matrix = None
+        self._levels_of_detail = None
+        self._levels_of_detail_generation = 0
+        self._triangle_hierarchy = None
+        self._triangle_hierarchy_generation = 0
+        self._generation = 0
         self.dataChanged.connect(self._resetVertexBuffer)
         self.dataChanged.connect(self._resetIndexBuffer)
+        self.dataChanged.connect(self._resetBounds)
+        self.dataChanged.connect(self._resetLevelsOfDetail)
+        self.dataChanged.connect(self._resetTriangleHierarchy)
     
     dataChanged = Signal()
+
+    ##  Get a number that changes every time the data of this mesh changes, see dataChanged.
+    #
+    #   Jobs that create data from the mesh in the background, like LevelOfDetailJob, get the generation
+    #   before they start, so their result can be dropped when the mesh changed in the meantime.
+    #
+    #   \return \type{int}
+    def getGeneration(self):
+        return self._generation
     
     def _resetIndexBuffer(self):
         try:
@@ -54,6 +76,15 @@ class MeshData(SignalEmitter):
             delattr(self, vertexBufferProperty)
         except:
             pass
+
+    def _resetBounds(self):
+        self._bounds = None
+
+    def _resetLevelsOfDetail(self):
+        self._levels_of_detail = None
+
+    def _resetTriangleHierarchy(self):
+        self._triangle_hierarchy = None
     
     ##  Set the type of the mesh 
     #   \param mesh_type MeshType enum 
@@ -68,11 +99,18 @@ class MeshData(SignalEmitter):
         return self._face_count
     
     ##  Get the array of vertices
+    #
+    #   \return \type{numpy.ndarray} A (vertex_count, 3) array of positions. For meshes with quantized
+    #                                positions (see compact()) this is a new array of floats.
     def getVertices(self):
         if self._vertices is None:
             return None
 
-        return self._vertices[0 : self._vertex_count] #Only return up until point where data was filled
+        vertices = self._vertices[0 : self._vertex_count] #Only return up until point where data was filled
+        if self._position_matrix is not None:
+            return _transformPoints(vertices, self._position_matrix, numpy.empty(vertices.shape, dtype = numpy.float32))
+
+        return vertices
     
     ##  Get the number of vertices
     def getVertexCount(self):
@@ -81,32 +119,79 @@ class MeshData(SignalEmitter):
     ##  Get a vertex by index
     def getVertex(self, index):
         try:
-            return self._vertices[index]
+            vertex = self._vertices[index]
         except IndexError:
             return None
+
+        if self._position_matrix is not None:
+            vertex = (numpy.dot(self._position_matrix[0:3, 0:3], vertex) + self._position_matrix[0:3, 3]).astype(numpy.float32)
+        return vertex
     
     #   Remove vertex by index or list of indices
     #   \param index Either a single index or a list of indices to be removed.
     def removeVertex(self, index):
-        try: 
-            #print("deleting ", index)
-            #print( self._vertices) 
-            self._vertices = numpy.delete(self._vertices, index,0)
-            if self.hasNormals():
-               self._normals = numpy.delete(self._normals,index,0)
-            #print( self._vertices)    
-            self._vertex_count = len(self._vertices)
+        try:
+            self.removeVertices(numpy.atleast_1d(index))
         except IndexError:
             pass
-        self.dataChanged.emit()
-        
+
+    ##  Remove several vertices at once.
+    #
+    #   All channels are compacted in a single pass and dataChanged is emitted once. Faces that use a
+    #   removed vertex are removed as well, and the indices of the remaining faces are renumbered to
+    #   the new vertex numbers. Meshes without indices are assumed to be point clouds, removing
+    #   vertices from those does not remove faces.
+    #
+    #   \param vertices Either a boolean array with a value for every vertex that is True for the
+    #                   vertices to remove, or an array or list with the indices of the vertices to remove.
+    #   \return \type{int} The amount of vertices that were removed.
+    def removeVertices(self, vertices):
+        if self._vertices is None:
+            return 0
+
+        selection = numpy.asarray(vertices)
+        if selection.dtype == bool:
+            if len(selection) != self._vertex_count:
+                raise IndexError("Expected a mask of %d vertices, got %d" % (self._vertex_count, len(selection)))
+            keep = numpy.logical_not(selection)
+        else:
+            keep = numpy.ones(self._vertex_count, dtype = bool)
+            keep[selection.astype(numpy.intp)] = False
+
+        for name in ("_vertices", "_normals", "_colors", "_uvs"):
+            array = getattr(self, name)
+            if array is not None:
+                remaining = array[0:self._vertex_count][keep]
+                # Keep arrays that are compact read-only, see compact().
+                remaining.flags.writeable = array.flags.writeable or array.dtype.kind == "f"
+                setattr(self, name, remaining)
+
+        if self._indices is not None:
+            indices = self._indices[0:self._face_count]
+            remaining_faces = keep[indices[:, 0]] & keep[indices[:, 1]] & keep[indices[:, 2]]
+            renumber = numpy.cumsum(keep) - 1
+            self._indices = renumber[indices[remaining_faces]].astype(indices.dtype)
+            self._face_count = len(self._indices)
+
+        removed = self._vertex_count - int(numpy.count_nonzero(keep))
+        self._vertex_count -= removed
+        self._bounds = None
+        self._emitDataChanged()
+        return removed
+
     ##  Return whether this mesh has vertex normals.
     def hasNormals(self):
         return self._normals is not None
 
     ##  Return the list of vertex normals.
+    #
+    #   \return \type{numpy.ndarray} A (vertex_count, 3) array of normals. For meshes with compact
+    #                                normals (see compact()) this is a new array of floats.
     def getNormals(self):
-        return self._normals
+        if self._normals is None:
+            return None
+
+        return _toFloat(self._normals[0:self._vertex_count])
 
     ##  Return whether this mesh has indices.
     def hasIndices(self):
@@ -115,17 +200,31 @@ class MeshData(SignalEmitter):
     ##  Get the array of indices
     #   \return \type{numpy.ndarray}
     def getIndices(self):
-        return self._indices[0:self._face_count]
+        indices = self._indices[0:self._face_count]
+        if indices.dtype == numpy.uint16:
+            return indices.astype(numpy.int32)
+        return indices
+
+    ##  Get the size of a single index as stored, in bytes.
+    #
+    #   This is 2 for meshes with compact indices (see compact()) and 4 otherwise.
+    def getIndexSize(self):
+        return self._indices.dtype.itemsize
 
     def hasColors(self):
         return self._colors is not None
 
     def getColors(self):
-        return self._colors[0:self._vertex_count]
+        return _toFloat(self._colors[0:self._vertex_count])
 
     def hasUVCoordinates(self):
         return self._uvs is not None
 
+    ##  Get the array of texture coordinates
+    #   \return \type{numpy.ndarray} A (vertex_count, 2) array of U and V coordinates.
+    def getUVCoordinates(self):
+        return self._uvs[0:self._vertex_count]
+
     def getFileName(self):
         return self._file_name
 
@@ -133,51 +232,102 @@ class MeshData(SignalEmitter):
         self._file_name = file_name
 
     ##  Transform the meshdata by given Matrix
+    #
+    #   Only the channels that change are copied. Positions are always transformed. Normals are
+    #   transformed with the inverse transpose of the matrix and normalized, unless the matrix does
+    #   not change their direction (translation and uniform scaling). All other channels are shared
+    #   copy-on-write: both meshes refer to the same read-only data and whichever mesh is modified
+    #   first makes its own copy.
+    #
     #   \param transformation 4x4 homogenous transformation matrix
+    #   \return \type{MeshData} A new mesh with the transformation applied.
     def getTransformed(self, transformation):
-        if self._vertices is not None:
-            data = numpy.pad(self._vertices.copy(), ((0,0), (0,1)), "constant", constant_values=(0.0, 0.0))
-            data = data.dot(transformation.getTransposed().getData())
-            data += transformation.getData()[:,3]
-            data = data[:,0:3]
-            
-            ##  HACK; Create a manual copy (instead of using deep copy), as this caused problems
-            #   when trying to change the data.
-            mesh = MeshData()
-            mesh._normals = self._normals.copy()
-            if self._indices is not None:
-                mesh._indices = self._indices.copy()
-            if self._colors is not None:
-                mesh._colors = self._colors.copy()
-            if self._uvs is not None:
-                mesh._uvs = self._uvs.copy()
-            mesh._type = self._type
-            mesh._vertex_count = self._vertex_count
-            mesh._face_count = self._face_count 
-            mesh._vertices = data
-            return mesh
-        else:
-            return MeshData(vertices = self._vertices)
+        mesh = MeshData()
+        mesh._type = self._type
+        mesh._file_name = self._file_name
+        mesh._vertex_count = self._vertex_count
+        mesh._face_count = self._face_count
+        mesh._indices = self._share("_indices", self._face_count)
+        mesh._colors = self._share("_colors", self._vertex_count)
+        mesh._uvs = self._share("_uvs", self._vertex_count)
+
+        matrix = transformation.getData()
+        if self._position_matrix is not None:
+            # Quantized positions stay as they are, only the matrix to convert them changes.
+            mesh._vertices = self._share("_vertices", self._vertex_count)
+            mesh._position_matrix = numpy.dot(matrix, self._position_matrix)
+        elif self._vertices is not None:
+            vertices = self._vertices[0:self._vertex_count]
+            mesh._vertices = _transformPoints(vertices, matrix, numpy.empty(vertices.shape, dtype = vertices.dtype))
+
+        if self._normals is not None:
+            normal_matrix = _getNormalMatrix(matrix)
+            if normal_matrix is None:
+                mesh._normals = self._share("_normals", self._vertex_count)
+            else:
+                mesh._normals = self._transformNormals(normal_matrix, False)
+
+        return mesh
+
+    ##  Transform the meshdata in place by given Matrix
+    #
+    #   This is meant for loaders, which own the mesh they transform and should not hold a second
+    #   copy of it. Positions and normals are transformed like getTransformed() does. The data is
+    #   overwritten in place, in chunks to limit temporary memory, unless it is shared with another
+    #   mesh, in which case this mesh gets its own copy.
+    #
+    #   \param transformation 4x4 homogenous transformation matrix
+    def transform(self, transformation):
+        matrix = transformation.getData()
+        if self._position_matrix is not None:
+            # Quantized positions and the bounds calculated from them stay valid, only the matrix to convert them changes.
+            self._position_matrix = numpy.dot(matrix, self._position_matrix)
+        elif self._vertices is not None:
+            vertices = self._vertices[0:self._vertex_count]
+            if vertices.flags.writeable:
+                _transformPoints(vertices, matrix, vertices)
+            else:
+                self._vertices = _transformPoints(vertices, matrix, numpy.empty(vertices.shape, dtype = vertices.dtype))
+            self._bounds = None
+
+        normal_matrix = _getNormalMatrix(matrix)
+        if self._normals is not None and normal_matrix is not None:
+            self._normals = self._transformNormals(normal_matrix, True)
+
+        self._emitDataChanged()
 
     ##  Get the extents of this mesh.
     #
+    #   The local bounding box is cached, together with a small set of points that includes every
+    #   vertex of the convex hull of the mesh. Extents in another coordinate system are computed
+    #   from those points only, so they do not depend on the size of the mesh. When the hull has too
+    #   many vertices, as for smooth round meshes, the corners of a polytope around the mesh are used
+    #   instead, which gives extents that can be slightly too large for rotated meshes. The cache is
+    #   reset whenever vertices are added or changed.
+    #
     #   \param matrix The transformation matrix from model to world coordinates.
+    #   \return \type{AxisAlignedBox} The extents, or an empty box if the mesh has no vertices.
     def getExtents(self, matrix = None):
-        if self._vertices is None:
-            return AxisAlignedBox()
+        bounds = self._bounds
+        if bounds is None:
+            bounds = self._calculateBounds()
+            self._bounds = bounds
 
-        data = numpy.pad(self._vertices.copy(), ((0,0), (0,1)), "constant", constant_values=(0.0, 1.0))
+        if bounds is None:
+            return AxisAlignedBox()
 
-        if matrix is not None:
-            transposed = matrix.getTransposed().getData()
-            data = data.dot(transposed)
-            data += transposed[:,3]
-            data = data[:,0:3]
+        minimum, maximum, hull_points = bounds
+        transformation = matrix.getData() if matrix is not None else None
+        if self._position_matrix is not None:
+            # The bounds are calculated from the quantized positions.
+            transformation = self._position_matrix if transformation is None else numpy.dot(transformation, self._position_matrix)
 
-        min = data.min(axis=0)
-        max = data.max(axis=0)
+        if transformation is not None:
+            points = _transformPoints(hull_points, transformation, numpy.empty(hull_points.shape, dtype = numpy.float64))
+            minimum = points.min(axis = 0)
+            maximum = points.max(axis = 0)
 
-        return AxisAlignedBox(minimum=Vector(min[0], min[1], min[2]), maximum=Vector(max[0], max[1], max[2]))
+        return AxisAlignedBox(minimum = Vector(minimum[0], minimum[1], minimum[2]), maximum = Vector(maximum[0], maximum[1], maximum[2]))
 
     ##  Set the amount of faces before loading data to the mesh.
     #
@@ -193,6 +343,8 @@ class MeshData(SignalEmitter):
 
         self._vertex_count = 0
         self._face_count = 0
+        self._bounds = None
+        self._position_matrix = None
     
     ##  Set the amount of verts before loading data to the mesh.
     #
@@ -208,22 +360,21 @@ class MeshData(SignalEmitter):
 
         self._vertex_count = 0
         self._face_count = 0
+        self._bounds = None
+        self._position_matrix = None
     
     ##  Add a vertex to the mesh.
     #   \param x x coordinate of vertex.
     #   \param y y coordinate of vertex.
     #   \param z z coordinate of vertex.
     def addVertex(self,x,y,z):
-        if self._vertices is None:
-            self._vertices = numpy.zeros((10, 3), dtype=numpy.float32)
-
-        if len(self._vertices) == self._vertex_count:
-            self._vertices.resize((self._vertex_count * 2, 3))
+        self._reserveVertex()
 
         self._vertices[self._vertex_count, 0] = x
         self._vertices[self._vertex_count, 1] = y
         self._vertices[self._vertex_count, 2] = z
         self._vertex_count += 1
+        self._bounds = None
     
     ##  Add a vertex to the mesh.
     #   \param x x coordinate of vertex.
@@ -233,19 +384,7 @@ class MeshData(SignalEmitter):
     #   \param ny y part of normal.
     #   \param nz z part of normal.
     def addVertexWithNormal(self,x,y,z,nx,ny,nz):
-        if self._vertices is None:
-            self._vertices = numpy.zeros((10, 3), dtype=numpy.float32)
-        if self._normals is None: #Specific case, reserve vert count does not reservere size for normals
-            self._normals = numpy.zeros((10, 3), dtype=numpy.float32)
-
-        if len(self._vertices) == self._vertex_count:
-            self._vertices.resize((self._vertex_count * 2, 3))
-
-        if self._normals is None:
-            self._normals = numpy.zeros((self._vertex_count, 3), dtype=numpy.float32)
-
-        if len(self._normals) == self._vertex_count:
-            self._normals.resize((self._vertex_count * 2, 3))
+        self._reserveVertex(normals = True)
 
         self._vertices[self._vertex_count, 0] = x
         self._vertices[self._vertex_count, 1] = y
@@ -254,6 +393,7 @@ class MeshData(SignalEmitter):
         self._normals[self._vertex_count, 1] = ny
         self._normals[self._vertex_count, 2] = nz
         self._vertex_count += 1
+        self._bounds = None
     
     ##  Add a face by providing three verts.
     #   \param x0 x coordinate of first vertex.
@@ -266,12 +406,9 @@ class MeshData(SignalEmitter):
     #   \param y2 y coordinate of third vertex.
     #   \param z2 z coordinate of third vertex.
     def addFace(self, x0, y0, z0, x1, y1, z1, x2, y2, z2):
-        if self._indices is None:
-            self._indices = numpy.zeros((10, 3), dtype=numpy.int32)
+        if self._indices is None or len(self._indices) <= self._face_count or not self._indices.flags.writeable:
+            self._reserveFaces(1)
 
-        if len(self._indices) == self._face_count:
-            self._indices.resize((self._face_count * 2, 3))
-        
         self._indices[self._face_count, 0] = self._vertex_count
         self._indices[self._face_count, 1] = self._vertex_count + 1
         self._indices[self._face_count, 2] = self._vertex_count + 2
@@ -304,11 +441,8 @@ class MeshData(SignalEmitter):
     #   \param ny2 The Y coordinate of the normal of the third vertex.
     #   \param nz2 The Z coordinate of the normal of the third vertex.
     def addFaceWithNormals(self,x0, y0, z0, nx0, ny0, nz0, x1, y1, z1, nx1, ny1, nz1, x2, y2, z2, nx2, ny2, nz2):
-        if self._indices is None:
-            self._indices = numpy.zeros((10, 3), dtype=numpy.int32)
-
-        if len(self._indices) == self._face_count:
-            self._indices.resize((self._face_count * 2, 3))
+        if self._indices is None or len(self._indices) <= self._face_count or not self._indices.flags.writeable:
+            self._reserveFaces(1)
 
         self._indices[self._face_count, 0] = self._vertex_count
         self._indices[self._face_count, 1] = self._vertex_count + 1
@@ -320,11 +454,9 @@ class MeshData(SignalEmitter):
         self.addVertexWithNormal(x2, y2, z2, nx2, ny2, nz2)
 
     def setVertexColor(self, index, color):
-        if self._colors is None:
-            self._colors = numpy.zeros((10, 4), dtype=numpy.float32)
-
-        if len(self._colors) < len(self._vertices):
-            self._colors.resize((len(self._vertices), 4))
+        if self._colors is None or len(self._colors) < len(self._vertices) or not self._colors.flags.writeable or self._colors.dtype.kind != "f":
+            self._expand()
+            self._colors = _grow(self._colors, len(self._vertices), 4, self._vertex_count)
 
         self._colors[index, 0] = color.r
         self._colors[index, 1] = color.g
@@ -332,39 +464,100 @@ class MeshData(SignalEmitter):
         self._colors[index, 3] = color.a
 
     def setVertexUVCoordinates(self, index, u, v):
-        if self._uvs is None:
-            self._uvs = numpy.zeros((10, 2), dtype=numpy.float32)
-
-        if len(self._uvs) < len(self._vertices):
-            self._uvs.resize((len(self._vertices), 2))
+        if self._uvs is None or len(self._uvs) < len(self._vertices) or not self._uvs.flags.writeable:
+            self._uvs = _grow(self._uvs, len(self._vertices), 2, self._vertex_count)
 
         self._uvs[index, 0] = u
         self._uvs[index, 1] = v
 
-    def addVertices(self, vertices):
-        if self._vertices is None:
-            self._vertices = vertices
-            self._vertex_count = len(vertices)
-        else:
-            self._vertices = numpy.concatenate((self._vertices[0:self._vertex_count], vertices))
-            self._vertex_count  += len(vertices)
+    ##  Add a number of vertices to the mesh.
+    #
+    #   Storage grows geometrically, so adding vertices in many calls takes amortized linear time.
+    #   Channels that already exist but are not specified are filled with zeros for the new vertices.
+    #
+    #   The first call on an empty mesh takes ownership of arrays that are already writable, C-contiguous
+    #   float32 arrays instead of copying them, so the caller should not use those arrays afterwards.
+    #   Anything else, such as lists or float64 arrays, is copied and converted to float32.
+    #
+    #   \param vertices \type{numpy.ndarray} A (num_vertices, 3) array of positions.
+    #   \param normals \type{numpy.ndarray} Optional (num_vertices, 3) array of normals.
+    #   \param colors \type{numpy.ndarray} Optional (num_vertices, 4) array of colors.
+    #   \param uvs \type{numpy.ndarray} Optional (num_vertices, 2) array of texture coordinates.
+    def addVertices(self, vertices, normals = None, colors = None, uvs = None):
+        count = len(vertices)
+        if self._vertices is None and self._normals is None and self._colors is None and self._uvs is None:
+            # Adopt the arrays of the first call instead of copying them, when they are in the right format.
+            self._vertices = _toChannel(vertices, 3)
+            self._normals = _toChannel(normals, 3)
+            self._colors = _toChannel(colors, 4)
+            self._uvs = _toChannel(uvs, 2)
+            self._vertex_count = count
+            self._bounds = None
+            return
+
+        start = self._vertex_count
+        self._reserveVertices(count,
+            normals = normals is not None or self._normals is not None,
+            colors = colors is not None or self._colors is not None,
+            uvs = uvs is not None or self._uvs is not None
+        )
+
+        self._vertices[start:start + count] = vertices
+        for channel, data in ((self._normals, normals), (self._colors, colors), (self._uvs, uvs)):
+            if channel is not None:
+                channel[start:start + count] = data if data is not None else 0
 
+        self._vertex_count += count
+        self._bounds = None
+
+    ##  Add a number of faces to the mesh.
+    #
+    #   Storage grows geometrically, so adding faces in many calls takes amortized linear time.
+    #
+    #   Like addVertices(), the first call takes ownership of a writable, C-contiguous int32 array and
+    #   copies anything else.
+    #
+    #   \param indices \type{numpy.ndarray} A (num_faces, 3) array of vertex indices.
     def addIndices(self, indices):
         if self._indices is None:
-            self._indices = indices
+            # Adopt the array of the first call instead of copying it, when it is in the right format.
+            self._indices = _toChannel(indices, 3, numpy.int32)
             self._face_count = len(indices)
-        else:
-            self._indices = numpy.concatenate((self._indices[0:self._face_count], indices))
-            self._face_count += len(indices)
+            return
+
+        count = len(indices)
+        self._reserveFaces(count)
+        self._indices[self._face_count:self._face_count + count] = indices
+        self._face_count += count
+
+    ##  Add a number of faces that do not share vertices with other faces.
+    #
+    #   This is the bulk version of addFace() and addFaceWithNormals(). Three vertices are added for
+    #   every face.
+    #
+    #   \param vertices \type{numpy.ndarray} A (num_faces, 3, 3) or (num_faces * 3, 3) array with the vertices of every face.
+    #   \param normals \type{numpy.ndarray} Optional array with a normal for every vertex, shaped like vertices.
+    #   \param colors \type{numpy.ndarray} Optional (num_faces * 3, 4) array with a color for every vertex.
+    #   \param uvs \type{numpy.ndarray} Optional (num_faces * 3, 2) array with texture coordinates for every vertex.
+    def addFaces(self, vertices, normals = None, colors = None, uvs = None):
+        vertices = numpy.asarray(vertices).reshape((-1, 3))
+        if normals is not None:
+            normals = numpy.asarray(normals).reshape((-1, 3))
+
+        start = self._vertex_count
+        self.addVertices(vertices, normals = normals, colors = colors, uvs = uvs)
+        self.addIndices(numpy.arange(start, start + (len(vertices) // 3) * 3, dtype = numpy.int32).reshape((-1, 3)))
 
     def addColors(self, colors):
+        self._expand()
         if self._colors is None:
             self._colors = colors
         else:
             self._colors = numpy.concatenate((self._colors[0:self._vertex_count], colors))
     
     ## 
-    # /param colors is a vertexCount by 4 numpy array with floats in range of 0 to 1.
+    # /param colors is a vertexCount by 4 numpy array with floats in range of 0 to 1, or with 8-bit
+    #        unsigned integers in range of 0 to 255 (see compact()).
     def setColors(self, colors):
         self._colors = colors
     
@@ -373,60 +566,1296 @@ class MeshData(SignalEmitter):
     #   \return A bytearray object with 3 floats per vertex.
     def getVerticesAsByteArray(self):
         if self._vertices is not None:
-            return self._vertices[0 : self._vertex_count].tostring()
+            return self.getVertices().tostring()
 
     ##  Get all normals of this mesh as a bytearray
     #
     #   \return A bytearray object with 3 floats per normal.
     def getNormalsAsByteArray(self):
         if self._normals is not None:
-            return self._normals[0 : self._vertex_count].tostring()
+            return self.getNormals().tostring()
 
     ##  Get all indices as a bytearray
     #
-    #   \return A bytearray object with 3 ints per face.
+    #   \return A bytearray object with 3 ints per face, of the size returned by getIndexSize().
     def getIndicesAsByteArray(self):
         if self._indices is not None:
             return self._indices[0:self._face_count].tostring()
 
     def getColorsAsByteArray(self):
         if self._colors is not None:
-            return self._colors[0 : self._vertex_count].tostring()
+            return self.getColors().tostring()
 
     def getUVCoordinatesAsByteArray(self):
         if self._uvs is not None:
             return self._uvs[0 : self._vertex_count].tostring()
 
-    ##  Calculate the normals of this mesh, assuming it was created by using addFace (eg; the verts are connected)    
-    def calculateNormals(self):
-        # Numpy magic!
-        # First, reset the normals
-        self._normals = numpy.zeros((self._vertex_count, 3), dtype=numpy.float32)
+    ##  Get the layout of the data returned by getInterleavedVertexData().
+    #
+    #   \return \type{tuple} A tuple with the size of a vertex in bytes and a list of (name, type, offset)
+    #                        tuples, one for every attribute of a vertex. Name is one of "vertices",
+    #                        "normals", "colors" or "uvs". Type is "vector" followed by the number of
+    #                        components and the type of a component: "f" for 32-bit floats, or "b",
+    #                        "s", "ub" or "us" for normalized signed and unsigned 8 and 16-bit integers
+    #                        (see compact()). Offset is the offset of the attribute in a vertex, in bytes.
+    def getInterleavedLayout(self):
+        attributes = []
+        offset = 0
+        for name, channel in self._getInterleavedChannels():
+            dtype = _getAttributeDType(channel)
+            attributes.append((name, "vector{0}{1}".format(channel.shape[1], _attribute_types[dtype]), offset))
+            # Keep every attribute aligned to 4 bytes.
+            offset += (channel.shape[1] * dtype.itemsize + 3) // 4 * 4
+
+        return (offset, attributes)
+
+    ##  Get all vertex data of this mesh interleaved in a single buffer.
+    #
+    #   Every vertex is stored as its position, followed by its normal, color and texture coordinates
+    #   if the mesh has those, in the format they are stored in. See getInterleavedLayout() for the exact
+    #   layout. Quantized positions are not converted, see getQuantizationMatrix(). Vertices that a
+    #   channel has no data for get zeros for that attribute.
+    #   The data is copied from the separate channels exactly once, into the buffer that is returned,
+    #   so it can be uploaded to the GPU without further copies. Keeping all attributes of a vertex
+    #   together also improves memory locality when vertices are fetched.
+    #
+    #   \return \type{memoryview} A one-dimensional byte view of the interleaved data.
+    def getInterleavedVertexData(self):
+        stride, attributes = self.getInterleavedLayout()
+        channels = self._getInterleavedChannels()
+
+        dtype = numpy.dtype({
+            "names": [name for name, channel in channels],
+            "formats": [(_getAttributeDType(channel), (channel.shape[1], )) for name, channel in channels],
+            "offsets": [offset for name, attribute_type, offset in attributes],
+            "itemsize": stride
+        })
+        data = numpy.zeros(self._vertex_count, dtype = dtype)
+        for name, channel in channels:
+            channel = channel[0:self._vertex_count]
+            data[name][0:len(channel)] = channel
+
+        return memoryview(data.view(numpy.uint8))
+
+    ##  Get the matrix that converts quantized positions to positions.
+    #
+    #   The matrix applies to positions as they are passed to a shader through a normalized attribute,
+    #   so it maps the range 0 to 1 onto the quantized bounding box. See compact().
+    #
+    #   \return \type{Matrix} The matrix, or None if the positions of this mesh are not quantized.
+    def getQuantizationMatrix(self):
+        if self._position_matrix is None:
+            return None
+
+        return Matrix(numpy.dot(self._position_matrix, numpy.diag([_position_scale, _position_scale, _position_scale, 1.0])))
+
+    ##  Store the data of this mesh in a more compact format.
+    #
+    #   This is meant for large meshes and point clouds that are only displayed and transformed. The
+    #   renderer uploads the compact data as is, and transformations and extents use it directly. The
+    #   getters still return arrays of floats and 32-bit indices, which are converted on every call.
+    #   Positions are quantized to 16 bits per axis within the bounding box of the mesh. For a mesh of
+    #   300mm that is an error of less than 5 micron. Texture coordinates are not changed.
+    #
+    #   Methods that add, remove or recalculate data restore full precision first, which does not
+    #   recover the precision lost by compacting.
+    #
+    #   \param kwargs Keyword arguments.
+    #                 Possible values are:
+    #                 - indices \type{bool} Store indices as 16-bit integers when there are at most 65536 vertices. Defaults to True.
+    #                 - normals \type{string} Store normals as "int16" (the default) or "int8" normalized integers, or None to keep them as floats.
+    #                 - colors \type{bool} Store colors as 8-bit integers. Defaults to True.
+    #                 - positions \type{bool} Store positions as 16-bit integers relative to the bounding box. Defaults to True.
+    def compact(self, **kwargs):
+        if kwargs.get("indices", True) and self._indices is not None and self._indices.dtype != numpy.uint16 and self._vertex_count <= 65536:
+            self._indices = _freeze(self._indices[0:self._face_count].astype(numpy.uint16))
+
+        normal_type = kwargs.get("normals", "int16")
+        if normal_type and self._normals is not None:
+            normal_type = numpy.dtype(normal_type)
+            if normal_type != self._normals.dtype:
+                self._normals = _freeze(_fromFloat(self.getNormals(), normal_type))
+
+        if kwargs.get("colors", True) and self._colors is not None and self._colors.dtype != numpy.uint8:
+            self._colors = _freeze(_fromFloat(self._colors[0:self._vertex_count], numpy.dtype(numpy.uint8)))
+
+        if kwargs.get("positions", True) and self._vertices is not None and self._position_matrix is None and self._vertex_count > 0:
+            vertices = self._vertices[0:self._vertex_count]
+            minimum = vertices.min(axis = 0).astype(numpy.float64)
+            size = vertices.max(axis = 0) - minimum
+            size[size == 0] = 1.0
+
+            quantized = numpy.empty(vertices.shape, dtype = numpy.uint16)
+            for start in range(0, len(vertices), _transform_chunk_size):
+                end = start + _transform_chunk_size
+                quantized[start:end] = numpy.round((vertices[start:end] - minimum) * (_position_scale / size))
+
+            self._position_matrix = numpy.identity(4)
+            self._position_matrix[0:3, 0:3] = numpy.diag(size / _position_scale)
+            self._position_matrix[0:3, 3] = minimum
+            self._vertices = _freeze(quantized)
+            self._bounds = None
+
+        self._emitDataChanged()
+
+    ##  Get the amount of memory used by this mesh.
+    #
+    #   Every channel reports the bytes used by the vertices or faces of the mesh and the bytes reserved
+    #   for it, which is more when room was reserved for adding data, see reserveFaceCount() and
+    #   trimToSize(). Channels shared with another mesh (see getTransformed()) are counted for both
+    #   meshes. OpenGL buffers that the renderer created for this mesh are reported with the size of
+    #   the data uploaded to them, levels of detail (see getLevelsOfDetail()) with the total of all
+    #   their channels and buffers and the triangle hierarchy (see getTriangleHierarchy()) with the
+    #   size of its arrays.
+    #
+    #   \return \type{dict} A (used, reserved) tuple of amounts of bytes for each of the keys "vertices",
+    #                       "normals", "colors", "uvs", "indices", "vertex_buffer", "index_buffer",
+    #                       "levels_of_detail" and "triangle_hierarchy". Channels and buffers that do not
+    #                       exist are (0, 0).
+    def getMemoryUsage(self):
+        usage = {}
+        for key, name, count in self._getChannelCounts():
+            array = getattr(self, name)
+            if array is None:
+                usage[key] = (0, 0)
+            else:
+                usage[key] = (array[0:count].nbytes, array.nbytes)
+
+        vertex_buffer = 0
+        if hasattr(self, vertexBufferProperty):
+            vertex_buffer = self.getInterleavedLayout()[0] * self._vertex_count
+        usage["vertex_buffer"] = (vertex_buffer, vertex_buffer)
+
+        index_buffer = 0
+        if hasattr(self, indexBufferProperty):
+            index_buffer = self._face_count * 3 * self.getIndexSize()
+        usage["index_buffer"] = (index_buffer, index_buffer)
+
+        levels = (0, 0)
+        for error, level in self.getLevelsOfDetail() or []:
+            for used, reserved in level.getMemoryUsage().values():
+                levels = (levels[0] + used, levels[1] + reserved)
+        usage["levels_of_detail"] = levels
+
+        triangle_hierarchy = 0
+        if self.getTriangleHierarchy() is not None:
+            triangle_hierarchy = self.getTriangleHierarchy().getMemoryUsage()
+        usage["triangle_hierarchy"] = (triangle_hierarchy, triangle_hierarchy)
+
+        return usage
+
+    ##  Release the memory that was reserved for adding data but is not used.
+    #
+    #   Channels with more room than the vertices or faces of the mesh are replaced by a copy of just the
+    #   used part. This does not change the data, so the mesh does not emit dataChanged.
+    #
+    #   \return \type{int} The amount of bytes released.
+    def trimToSize(self):
+        released = 0
+        for key, name, count in self._getChannelCounts():
+            array = getattr(self, name)
+            if array is None or len(array) <= count:
+                continue
+
+            trimmed = array[0:count].copy()
+            # Keep arrays that are shared or compact read-only, see _share() and compact().
+            trimmed.flags.writeable = array.flags.writeable
+            released += array.nbytes - trimmed.nbytes
+            setattr(self, name, trimmed)
+
+        return released
+
+    ##  Calculate the normals of this mesh, assuming it was created by using addFace (eg; the verts are connected)
+    #
+    #   By default every vertex gets the normal of a face it belongs to, which gives flat shading when
+    #   faces do not share vertices. Smooth normals can be calculated for meshes with shared vertices,
+    #   for example after weld(), by accumulating the normals of all faces around a vertex.
+    #
+    #   \param kwargs Keyword arguments.
+    #                 Possible values are:
+    #                 - smooth: True to calculate smooth per-vertex normals. Defaults to False.
+    #                 - weighting: How face normals are weighted when calculating smooth normals, either "area"
+    #                              (larger faces have more influence) or "angle" (weighted by the angle of the
+    #                              face at the vertex). Defaults to "area".
+    #                 - crease_angle: Angle in degrees. When set, faces around a vertex whose normals differ by
+    #                                 more than this angle are not smoothed together and the vertex is split,
+    #                                 so sharp edges stay sharp. This changes the amount of vertices. Defaults to None.
+    def calculateNormals(self, **kwargs):
+        self._expand()
+        if not self.hasIndices():
+            # Every face has three unique vertices, so there is nothing to smooth and every vertex gets the normal of its face.
+            faces = self._vertices[0:(self._vertex_count // 3) * 3].reshape((-1, 3, 3))
+            self._normals = self._calculateFaceNormals(faces).repeat(3, axis = 0)
+            return
+
+        vertices = self._vertices[0:self._vertex_count]
+        indices = self._indices[0:self._face_count]
+        face_normals = self._calculateFaceNormals(vertices[indices])
+
+        if not kwargs.get("smooth", False):
+            # Every vertex gets the normal of the last face it is used by.
+            self._normals = numpy.zeros((self._vertex_count, 3), dtype = numpy.float32)
+            for corner in range(3):
+                self._normals[indices[:, corner]] = face_normals
+            return
+
+        weights = self._calculateCornerWeights(vertices[indices], kwargs.get("weighting", "area"))
+
+        crease_angle = kwargs.get("crease_angle", None)
+        if crease_angle is not None:
+            self._calculateCreasedNormals(face_normals, weights, math.cos(math.radians(crease_angle)))
+            return
+
+        corner_vertices = indices.reshape(-1)
+        normals = numpy.empty((self._vertex_count, 3), dtype = numpy.float32)
+        for axis in range(3):
+            normals[:, axis] = numpy.bincount(corner_vertices, (weights * face_normals[:, axis, numpy.newaxis]).reshape(-1), self._vertex_count)
+        self._normals = _normalize(normals)
+
+    ##  Merge vertices that are at the same position, turning a list of unconnected faces into a mesh with shared vertices.
+    #
+    #   Two vertices are merged when none of the coordinates of their positions and texture coordinates
+    #   differ more than `tolerance`. This is transitive: a chain of vertices that are each within the
+    #   tolerance of the next is merged into a single vertex, even when its ends are further apart.
+    #   Vertices with different texture coordinates are kept apart, so texture seams are preserved.
+    #   Merged vertices keep the position, color and texture coordinates of the first vertex that was
+    #   merged, and get the average of the normals of all merged vertices. Faces that collapse because
+    #   two of their corners were merged are removed, as are vertices that are not used by any face.
+    #
+    #   Vertices are kept in the order in which they are first used, which is usually a good order
+    #   for rendering. Meshes without indices are assumed to have three consecutive vertices per face.
+    #
+    #   \param tolerance \type{float} The largest difference between the coordinates of vertices that are
+    #                    merged. When 0, only vertices with exactly the same position are merged.
+    def weld(self, tolerance = 0.0):
+        self._expand()
+        if self._vertices is None or self._vertex_count == 0:
+            return
+
+        vertices = self._vertices[0:self._vertex_count]
+        if self.hasIndices():
+            indices = self._indices[0:self._face_count]
+        else:
+            indices = numpy.arange((self._vertex_count // 3) * 3, dtype = numpy.int32).reshape((-1, 3))
+
+        keys = [vertices]
+        if self._uvs is not None:
+            keys.append(self._uvs[0:self._vertex_count])
+        keys = numpy.hstack(keys)
+        if tolerance > 0:
+            first_vertices, vertex_map = _clusterRows(keys.astype(numpy.float64), tolerance)
+        else:
+            first_vertices, vertex_map = _uniqueRows(keys)
+
+        indices = vertex_map[indices]
+        collapsed = (indices[:, 0] == indices[:, 1]) | (indices[:, 1] == indices[:, 2]) | (indices[:, 0] == indices[:, 2])
+        indices = indices[numpy.logical_not(collapsed)]
+
+        # Number the merged vertices in order of first use instead of in sorted order. This also drops
+        # vertices that are no longer used by any face.
+        used, first_use = numpy.unique(indices.reshape(-1), return_index = True)
+        order = used[numpy.argsort(first_use)]
+        renumber = numpy.empty(len(first_vertices), dtype = numpy.int64)
+        renumber[order] = numpy.arange(len(order))
+        indices = renumber[indices]
+
+        if self._normals is not None:
+            normals = numpy.empty((len(order), 3), dtype = numpy.float32)
+            for axis in range(3):
+                normals[:, axis] = numpy.bincount(vertex_map, self._normals[0:self._vertex_count, axis], len(first_vertices))[order]
+            self._normals = _normalize(normals)
+
+        first_vertices = first_vertices[order]
+        self._vertices = vertices[first_vertices]
+        if self._colors is not None:
+            self._colors = self._colors[first_vertices]
+        if self._uvs is not None:
+            self._uvs = self._uvs[first_vertices]
+        self._indices = indices.astype(numpy.int32)
+
+        self._vertex_count = len(self._vertices)
+        self._face_count = len(self._indices)
+        self._bounds = None
+        self._emitDataChanged()
+
+    ##  Create a simplified version of this mesh by clustering vertices.
+    #
+    #   Space is divided into cubic cells of `cell_size`, and all vertices in a cell are merged into a
+    #   single vertex at their average position. Faces that collapse because two of their corners were
+    #   merged are removed, as are faces that end up with the same corners as another face. The merged
+    #   vertex gets the average of the normals and the color and texture coordinates of the first of the
+    #   merged vertices. No vertex moves more than the length of the diagonal of a cell.
+    #
+    #   Meshes without indices are assumed to have three consecutive vertices per face.
+    #
+    #   \param cell_size \type{float} The size of the cells, in the units of the mesh.
+    #   \return \type{MeshData} A new, simplified mesh. This mesh is not changed.
+    def simplify(self, cell_size):
+        mesh = MeshData()
+        mesh._type = self._type
+        mesh._file_name = self._file_name
+
+        vertices = self.getVertices()
+        if vertices is None or self._vertex_count == 0:
+            return mesh
 
         if self.hasIndices():
-            for face in self._indices[0:self._face_count]:
-                #print(self._vertices[face[0]])
-                #print(self._vertices[face[1]])
-                #print(self._vertices[face[2]])
-                self._normals[face[0]] = numpy.cross(self._vertices[face[0]] - self._vertices[face[1]], self._vertices[face[0]] - self._vertices[face[2]])
-                length = numpy.linalg.norm(self._normals[face[0]])
-                self._normals[face[0]] /= length
-                self._normals[face[1]] = self._normals[face[0]]
-                self._normals[face[2]] = self._normals[face[0]]
-        else: #Old way of doing it, asuming that each face has 3 unique verts
-            # Then, take the cross product of each pair of vectors formed from a set of three vertices.
-            # The [] operator on a numpy array returns itself a numpy array. The slicing syntax is [begin:end:step],
-            # so in this case we perform the cross over a two arrays. The first array is built from the difference
-            # between every second item in the array starting at two and every third item in the array starting at
-            # zero. The second array is built from the difference between every third item in the array starting at
-            # two and every third item in the array starting at zero. The cross operation then returns an array of
-            # the normals of each set of three vertices.
-            n = numpy.cross(self._vertices[1::3] - self._vertices[::3], self._vertices[2::3] - self._vertices[::3])
-            # We then calculate the length for each normal and perform normalization on the normals.
-            l = numpy.linalg.norm(n, axis=1)
-            n[:, 0] /= l
-            n[:, 1] /= l
-            n[:, 2] /= l
-            # Finally, we store the normals per vertex, with each face normal being repeated three times, once for
-            # every vertex.
-            self._normals = n.repeat(3, axis=0)
+            indices = self.getIndices()
+        else:
+            indices = numpy.arange((self._vertex_count // 3) * 3, dtype = numpy.int32).reshape((-1, 3))
+
+        first_vertices, vertex_map = _uniqueRows(numpy.floor(vertices.astype(numpy.float64) / cell_size).astype(numpy.int64))
+        cluster_count = len(first_vertices)
+
+        indices = vertex_map[indices]
+        collapsed = (indices[:, 0] == indices[:, 1]) | (indices[:, 1] == indices[:, 2]) | (indices[:, 0] == indices[:, 2])
+        indices = indices[numpy.logical_not(collapsed)]
+        if len(indices):
+            first_faces = _uniqueRows(numpy.sort(indices, axis = 1))[0]
+            indices = indices[numpy.sort(first_faces)]
+
+        # Only keep the clusters that are still used by a face.
+        used = numpy.unique(indices.reshape(-1))
+        renumber = numpy.zeros(cluster_count, dtype = numpy.int32)
+        renumber[used] = numpy.arange(len(used))
+
+        counts = numpy.bincount(vertex_map, minlength = cluster_count)[used]
+        mesh._vertices = numpy.empty((len(used), 3), dtype = numpy.float32)
+        for axis in range(3):
+            mesh._vertices[:, axis] = numpy.bincount(vertex_map, vertices[:, axis], cluster_count)[used] / counts
+
+        if self._normals is not None:
+            normals = self.getNormals()
+            mesh._normals = numpy.empty((len(used), 3), dtype = numpy.float32)
+            for axis in range(3):
+                mesh._normals[:, axis] = numpy.bincount(vertex_map, normals[:, axis], cluster_count)[used]
+            _normalize(mesh._normals)
+
+        first_vertices = first_vertices[used]
+        if self._colors is not None:
+            mesh._colors = self.getColors()[first_vertices]
+        if self._uvs is not None:
+            mesh._uvs = self.getUVCoordinates()[first_vertices]
+        mesh._indices = renumber[indices]
+
+        mesh._vertex_count = len(mesh._vertices)
+        mesh._face_count = len(mesh._indices)
+        return mesh
+
+    ##  Get the simplified versions of this mesh that can be rendered instead of it.
+    #
+    #   \return \type{list} A list of (error, MeshData) tuples, ordered from the most to the least detailed
+    #                       level. The error is the maximum distance between a vertex of the level and the
+    #                       corresponding vertex of this mesh. None if no levels were created, see
+    #                       LevelOfDetailJob.
+    def getLevelsOfDetail(self):
+        if self._levels_of_detail_generation != self._generation:
+            return None
+        return self._levels_of_detail
+
+    ##  Set the simplified versions of this mesh that can be rendered instead of it.
+    #
+    #   The levels are removed when the data of this mesh changes.
+    #
+    #   \param levels \type{list} A list of (error, MeshData) tuples, see getLevelsOfDetail().
+    #   \param generation \type{int} The generation of the mesh the levels were created from, see getGeneration().
+    #                                 Levels of an older generation are dropped. Defaults to the current generation.
+    #   \return \type{bool} True if the levels were stored, False if they were dropped.
+    def setLevelsOfDetail(self, levels, generation = None):
+        if generation is None:
+            generation = self._generation
+        elif generation != self._generation:
+            return False
+
+        self._levels_of_detail = levels
+        self._levels_of_detail_generation = generation
+        return True
+
+    ##  Get the hierarchy of the faces of this mesh that is used to intersect rays with it.
+    #
+    #   \return \type{TriangleHierarchy} None if no hierarchy was created, see TriangleHierarchyJob.
+    def getTriangleHierarchy(self):
+        if self._triangle_hierarchy_generation != self._generation:
+            return None
+        return self._triangle_hierarchy
+
+    ##  Set the hierarchy of the faces of this mesh that is used to intersect rays with it.
+    #
+    #   The hierarchy is removed when the data of this mesh changes.
+    #
+    #   \param hierarchy \type{TriangleHierarchy} A hierarchy created for this mesh.
+    #   \param generation \type{int} The generation of the mesh the hierarchy was created from, see getGeneration().
+    #                                 A hierarchy of an older generation is dropped. Defaults to the current generation.
+    #   \return \type{bool} True if the hierarchy was stored, False if it was dropped.
+    def setTriangleHierarchy(self, hierarchy, generation = None):
+        if generation is None:
+            generation = self._generation
+        elif generation != self._generation:
+            return False
+
+        self._triangle_hierarchy = hierarchy
+        self._triangle_hierarchy_generation = generation
+        return True
+
+    ##  Find problems in this mesh that cause artifacts or NaNs when it is rendered or processed.
+    #
+    #   All diagnostics are calculated at once from sorted tables of vertices, faces and edges, so this
+    #   is fast for large meshes. Vertices at exactly the same position are considered connected, even
+    #   when they are different vertices. Meshes without indices are assumed to have three consecutive
+    #   vertices per face.
+    #
+    #   \return \type{dict} The amount of problems of every kind, with the keys:
+    #           - invalid_faces: Faces with a corner whose position is NaN or infinite.
+    #           - degenerate_faces: Faces without area, because two corners are at the same position or
+    #                               all corners are on a line.
+    #           - duplicate_faces: Faces with the same corners as an earlier face, regardless of winding.
+    #           - flipped_faces: Faces wound differently from the faces around them, or belonging to a
+    #                            closed part that is inside out.
+    #           - open_edges: Edges of only one face, so the mesh has holes.
+    #           - non_manifold_edges: Edges shared by more than two faces.
+    #           - invalid_normals: Vertex normals that are NaN, infinite or of zero length.
+    def analyze(self):
+        return self._inspect(False)
+
+    ##  Fix the problems found by analyze() in place.
+    #
+    #   Invalid, degenerate and duplicate faces are removed, flipped faces are turned around and the
+    #   normals of vertices that have an invalid normal or belong to a flipped face are recalculated
+    #   from the faces around them. Vertices that are no longer used by any face are removed. Open and
+    #   non-manifold edges are only reported, since fixing those requires new faces.
+    #
+    #   \return \type{dict} The problems found before repairing, see analyze().
+    def repair(self):
+        return self._inspect(True)
+
+    ##  private:
+
+    #   Notify that the data of this mesh changed. The generation is changed right away, so results of
+    #   background jobs are dropped even before the slots of dataChanged are called.
+    def _emitDataChanged(self):
+        self._generation += 1
+        self.dataChanged.emit()
+
+    #   Calculate the unit normal of every face.
+    #
+    #   \param faces A (num_faces, 3, 3) array with the vertices of every face.
+    #   \return A (num_faces, 3) array of normals. Degenerate faces get a zero normal.
+    def _calculateFaceNormals(self, faces):
+        return _normalize(numpy.cross(faces[:, 1] - faces[:, 0], faces[:, 2] - faces[:, 0]))
+
+    #   Calculate how much each corner of every face contributes to the smooth normal of its vertex.
+    #
+    #   \param faces A (num_faces, 3, 3) array with the vertices of every face.
+    #   \param weighting Either "area" or "angle".
+    #   \return A (num_faces, 3) array of weights.
+    def _calculateCornerWeights(self, faces, weighting):
+        if weighting == "angle":
+            weights = numpy.empty(faces.shape[0:2], dtype = numpy.float32)
+            for corner in range(3):
+                edge1 = faces[:, (corner + 1) % 3] - faces[:, corner]
+                edge2 = faces[:, (corner + 2) % 3] - faces[:, corner]
+                weights[:, corner] = numpy.arctan2(numpy.linalg.norm(numpy.cross(edge1, edge2), axis = 1), (edge1 * edge2).sum(axis = 1))
+            return weights
+
+        areas = numpy.linalg.norm(numpy.cross(faces[:, 1] - faces[:, 0], faces[:, 2] - faces[:, 0]), axis = 1)
+        return areas.repeat(3).reshape((-1, 3))
+
+    #   Calculate smooth normals that do not smooth across edges sharper than a crease angle.
+    #
+    #   The normal of every face corner is the weighted sum of the normals of the faces around its vertex
+    #   that differ less than the crease angle from the face of the corner. Vertices whose corners end up
+    #   with different normals are split, one vertex per distinct normal.
+    def _calculateCreasedNormals(self, face_normals, weights, min_cosine):
+        corner_vertices = self._indices[0:self._face_count].reshape(-1)
+        num_corners = len(corner_vertices)
+
+        # Group the corners by vertex. Every corner is paired with all corners in its group.
+        order = numpy.argsort(corner_vertices, kind = "stable")
+        sorted_vertices = corner_vertices[order]
+        group_starts = numpy.flatnonzero(numpy.concatenate(([True], sorted_vertices[1:] != sorted_vertices[:-1])))
+        group_sizes = numpy.diff(numpy.append(group_starts, num_corners))
+        corner_group_start = numpy.repeat(group_starts, group_sizes)
+        corner_group_size = numpy.repeat(group_sizes, group_sizes)
+        pair_ends = numpy.cumsum(corner_group_size)
+        corner_weights = weights.reshape(-1)
+
+        # The amount of pairs grows with the square of the valence of vertices, so the pairs of a range of
+        # corners are handled at a time, which keeps the temporary arrays within _crease_chunk_size pairs.
+        sorted_normals = numpy.empty((num_corners, 3), dtype = numpy.float32)
+        start = 0
+        while start < num_corners:
+            first_pair = pair_ends[start] - corner_group_size[start]
+            end = max(int(numpy.searchsorted(pair_ends, first_pair + _crease_chunk_size, side = "right")), start + 1)
+            sizes = corner_group_size[start:end]
+
+            pair_first = numpy.repeat(numpy.arange(end - start), sizes)
+            pair_offsets = numpy.arange(len(pair_first)) - numpy.repeat(pair_ends[start:end] - sizes - first_pair, sizes)
+            pair_second = numpy.repeat(corner_group_start[start:end], sizes) + pair_offsets
+
+            first_faces = order[pair_first + start] // 3
+            second_faces = order[pair_second] // 3
+            smooth_pairs = (face_normals[first_faces] * face_normals[second_faces]).sum(axis = 1) >= min_cosine
+            pair_first = pair_first[smooth_pairs]
+            second_faces = second_faces[smooth_pairs]
+            pair_weights = corner_weights[order[pair_second[smooth_pairs]]]
+
+            for axis in range(3):
+                sorted_normals[start:end, axis] = numpy.bincount(pair_first, pair_weights * face_normals[second_faces, axis], end - start)
+            start = end
+
+        corner_normals = numpy.empty((num_corners, 3), dtype = numpy.float32)
+        corner_normals[order] = sorted_normals
+        corner_normals = _normalize(corner_normals)
+
+        # Split vertices: every distinct combination of vertex and normal becomes a vertex.
+        keys = numpy.hstack((corner_vertices[:, numpy.newaxis], corner_normals.view(numpy.int32)))
+        first_corners, corner_map = _uniqueRows(keys.astype(numpy.int64))
+        new_vertices = corner_vertices[first_corners]
+
+        self._vertices = self._vertices[new_vertices]
+        if self._colors is not None:
+            self._colors = self._colors[new_vertices]
+        if self._uvs is not None:
+            self._uvs = self._uvs[new_vertices]
+        self._normals = corner_normals[first_corners]
+        self._indices = corner_map.reshape((-1, 3)).astype(numpy.int32)
+        self._vertex_count = len(self._vertices)
+        self._emitDataChanged()
+
+    #   Calculate the diagnostics of analyze() and optionally repair the mesh.
+    def _inspect(self, fix):
+        report = dict.fromkeys(("invalid_faces", "degenerate_faces", "duplicate_faces", "flipped_faces", "open_edges", "non_manifold_edges", "invalid_normals"), 0)
+        if self._vertices is None or self._vertex_count == 0:
+            return report
+
+        vertices = self.getVertices()
+        if self.hasIndices():
+            indices = self.getIndices()
+        else:
+            indices = numpy.arange((self._vertex_count // 3) * 3, dtype = numpy.int32).reshape((-1, 3))
+
+        # Number vertices by the first vertex at the same position. Comparing the bits also matches NaNs, which are removed below.
+        positions = _matchRows((vertices + numpy.float32(0.0)).view(numpy.int32))
+
+        finite = numpy.isfinite(vertices[:, 0]) & numpy.isfinite(vertices[:, 1]) & numpy.isfinite(vertices[:, 2])
+        valid = finite[indices[:, 0]] & finite[indices[:, 1]] & finite[indices[:, 2]]
+        report["invalid_faces"] = int(len(valid) - numpy.count_nonzero(valid))
+
+        corners = positions[indices]
+        faces = vertices[indices]
+        cross = numpy.cross(faces[:, 1] - faces[:, 0], faces[:, 2] - faces[:, 0])
+        # Six times the signed volume of the tetrahedron of every face and the origin.
+        volumes = numpy.einsum("ij,ij->i", faces[:, 0], cross, dtype = numpy.float64)
+        del faces
+        finite_vertices = vertices if finite.all() else vertices[finite]
+        size = max(float(numpy.ptp(finite_vertices[:, axis])) for axis in range(3)) if len(finite_vertices) else 0.0
+        with numpy.errstate(invalid = "ignore"):
+            degenerate = (corners[:, 0] == corners[:, 1]) | (corners[:, 1] == corners[:, 2]) | (corners[:, 0] == corners[:, 2])
+            degenerate |= numpy.linalg.norm(cross, axis = 1) <= _degenerate_area * size * size
+        degenerate &= valid
+        report["degenerate_faces"] = int(numpy.count_nonzero(degenerate))
+
+        kept = numpy.flatnonzero(valid & numpy.logical_not(degenerate))
+        if len(kept) < len(indices):
+            corners = corners[kept]
+        if len(kept):
+            first_faces = numpy.flatnonzero(_matchRows(_sortCorners(corners)) == numpy.arange(len(kept)))
+            report["duplicate_faces"] = int(len(kept) - len(first_faces))
+            if len(first_faces) < len(kept):
+                kept = kept[first_faces]
+                corners = corners[first_faces]
+        if len(kept) < len(indices):
+            volumes = volumes[kept]
+
+        # Build a table of the edges of all faces, sorted so the uses of an edge are next to each other.
+        edge_starts = corners.reshape(-1)
+        edge_ends = corners[:, [1, 2, 0]].reshape(-1)
+        forward = edge_starts < edge_ends
+        keys = numpy.minimum(edge_starts, edge_ends) * len(vertices) + numpy.maximum(edge_starts, edge_ends)
+        del edge_starts, edge_ends
+        order = numpy.argsort(keys)
+        keys = keys[order]
+        groups = numpy.flatnonzero(numpy.concatenate(([True], keys[1:] != keys[:-1]))) if len(keys) else numpy.zeros(0, dtype = numpy.int64)
+        del keys
+        uses = numpy.diff(numpy.append(groups, len(order)))
+        report["open_edges"] = int(numpy.count_nonzero(uses == 1))
+        report["non_manifold_edges"] = int(numpy.count_nonzero(uses > 2))
+
+        # Faces sharing a manifold edge are wound consistently when they use the edge in opposite directions.
+        pairs = groups[uses == 2]
+        first_edges = order[pairs]
+        second_edges = order[pairs + 1]
+        same_direction = forward[first_edges] == forward[second_edges]
+        open_faces = order[groups[uses == 1]] // 3
+        del order, groups, uses, forward
+
+        if same_direction.any():
+            flipped, parts = _orientFaces(len(kept), first_edges, second_edges, same_direction)
+            part_count = parts.max() + 1
+            volumes = numpy.bincount(parts, numpy.where(flipped, -volumes, volumes), part_count)
+            inside_out = (volumes < 0) & (numpy.bincount(parts[open_faces], minlength = part_count) == 0)
+            flipped ^= inside_out[parts]
+        elif not len(open_faces) and volumes.sum() < 0:
+            # A closed, consistently wound mesh with a negative volume is inside out as a whole.
+            flipped = numpy.ones(len(kept), dtype = bool)
+        else:
+            flipped = numpy.zeros(len(kept), dtype = bool)
+        del first_edges, second_edges, same_direction, volumes
+        report["flipped_faces"] = int(numpy.count_nonzero(flipped))
+
+        fix_normals = None
+        if self._normals is not None:
+            lengths = numpy.linalg.norm(self.getNormals(), axis = 1)
+            fix_normals = numpy.logical_not(numpy.isfinite(lengths) & (lengths > _minimum_normal_length))
+            report["invalid_normals"] = int(numpy.count_nonzero(fix_normals))
+
+        if not fix or not any(report[key] for key in ("invalid_faces", "degenerate_faces", "duplicate_faces", "flipped_faces", "invalid_normals")):
+            return report
+
+        self._expand()
+        indices = indices[kept]
+        indices[flipped] = indices[flipped][:, [0, 2, 1]]
+        cross = cross[kept]
+        cross[flipped] *= -1
+
+        # Keep the used vertices, in order. Meshes without indices get three vertices per face again.
+        if self.hasIndices():
+            used = numpy.flatnonzero(numpy.bincount(indices.reshape(-1), minlength = self._vertex_count))
+            renumber = numpy.zeros(self._vertex_count, dtype = numpy.int32)
+            renumber[used] = numpy.arange(len(used))
+            self._indices = renumber[indices]
+            indices = self._indices
+        else:
+            used = indices.reshape(-1)
+            indices = numpy.arange(len(used), dtype = numpy.int32).reshape((-1, 3))
+
+        self._vertices = self._vertices[used]
+        if self._colors is not None:
+            self._colors = self._colors[used]
+        if self._uvs is not None:
+            self._uvs = self._uvs[used]
+        self._vertex_count = len(used)
+        self._face_count = len(indices)
+
+        if self._normals is not None:
+            self._normals = self._normals[used]
+            fix_normals = fix_normals[used]
+            fix_normals[indices[flipped].reshape(-1)] = True
+            if fix_normals.any():
+                corner_vertices = indices.reshape(-1)
+                normals = numpy.empty((self._vertex_count, 3), dtype = numpy.float64)
+                for axis in range(3):
+                    normals[:, axis] = numpy.bincount(corner_vertices, cross[:, axis].repeat(3), self._vertex_count)
+                self._normals[fix_normals] = _normalize(normals[fix_normals])
+
+        self._bounds = None
+        self._emitDataChanged()
+        return report
+
+    #   Calculate the local bounding box and the points to calculate transformed extents from.
+    #
+    #   \return A (minimum, maximum, points) tuple, or None if the mesh has no vertices.
+    def _calculateBounds(self):
+        if self._vertices is None or self._vertex_count == 0:
+            return None
+
+        vertices = self._vertices[0:self._vertex_count]
+        minimum = vertices.min(axis = 0).astype(numpy.float64)
+        maximum = vertices.max(axis = 0).astype(numpy.float64)
+
+        if len(vertices) <= _hull_point_limit:
+            points = vertices.astype(numpy.float64)
+        else:
+            points = _findHullPoints(vertices, minimum, maximum)
+
+        return (minimum, maximum, points)
+
+    #   Restore full precision storage of all channels that were made compact by compact().
+    def _expand(self):
+        if self._position_matrix is not None:
+            self._vertices = self.getVertices()
+            self._position_matrix = None
+            self._bounds = None
+        if self._normals is not None and self._normals.dtype.kind != "f":
+            self._normals = self.getNormals()
+        if self._colors is not None and self._colors.dtype.kind != "f":
+            self._colors = self.getColors()
+        if self._indices is not None and self._indices.dtype == numpy.uint16:
+            self._indices = self.getIndices()
+
+    #   Transform the normals by a 3x3 normal matrix, keeping the format they are stored in.
+    #
+    #   \param in_place Overwrite the normals if they are stored as writable floats.
+    def _transformNormals(self, normal_matrix, in_place):
+        normals = self._normals[0:self._vertex_count]
+        if normals.dtype.kind != "f":
+            return _freeze(_fromFloat(_normalize(_transformVectors(_toFloat(normals), normal_matrix, numpy.empty(normals.shape, dtype = numpy.float32))), normals.dtype))
+
+        if in_place and normals.flags.writeable:
+            _normalize(_transformVectors(normals, normal_matrix, normals))
+            return self._normals
+
+        return _normalize(_transformVectors(normals, normal_matrix, numpy.empty(normals.shape, dtype = normals.dtype)))
+
+    #   Get a list of (key, attribute name, used rows) tuples of all channels, see getMemoryUsage().
+    def _getChannelCounts(self):
+        return [
+            ("vertices", "_vertices", self._vertex_count),
+            ("normals", "_normals", self._vertex_count),
+            ("colors", "_colors", self._vertex_count),
+            ("uvs", "_uvs", self._vertex_count),
+            ("indices", "_indices", self._face_count)
+        ]
+
+    #   Get a list of (name, array) tuples of the channels in the interleaved vertex data.
+    def _getInterleavedChannels(self):
+        channels = []
+        for name, channel in (("vertices", self._vertices), ("normals", self._normals), ("colors", self._colors), ("uvs", self._uvs)):
+            if channel is not None:
+                channels.append((name, channel))
+        return channels
+
+    #   Share a channel with another mesh, copy-on-write.
+    #
+    #   The channel of this mesh is replaced by a read-only view, so neither mesh can change the shared
+    #   data. Methods that modify a channel in place copy it first when it is read-only.
+    #
+    #   \return A read-only view of the first `count` rows of the channel, or None if it does not exist.
+    def _share(self, name, count):
+        array = getattr(self, name)
+        if array is None:
+            return None
+
+        if array.flags.writeable:
+            array = array.view()
+            array.flags.writeable = False
+            setattr(self, name, array)
+
+        return array[0:count]
+
+    #   Make sure there is room for `count` more vertices.
+    #
+    #   The vertex array always grows, other channels only when they are passed as True. Those are
+    #   created when they do not exist yet and grown to the same capacity as the vertex array.
+    def _reserveVertices(self, count, normals = False, colors = False, uvs = False):
+        self._expand()
+        self._vertices = _grow(self._vertices, self._vertex_count + count, 3, self._vertex_count)
+
+        if normals:
+            self._normals = _grow(self._normals, len(self._vertices), 3, self._vertex_count)
+        if colors:
+            self._colors = _grow(self._colors, len(self._vertices), 4, self._vertex_count)
+        if uvs:
+            self._uvs = _grow(self._uvs, len(self._vertices), 2, self._vertex_count)
+
+    #   Make sure there is room for one more vertex in every channel that exists, see addVertex().
+    #
+    #   The channels the vertex does not specify are set to zero for it, like addVertices() does.
+    def _reserveVertex(self, normals = False):
+        channels = [channel for channel in (self._vertices, self._normals, self._colors, self._uvs) if channel is not None]
+        if self._vertices is None or (normals and self._normals is None) or any(len(channel) <= self._vertex_count or not channel.flags.writeable for channel in channels):
+            self._reserveVertices(1, normals = normals or self._normals is not None, colors = self._colors is not None, uvs = self._uvs is not None)
+
+        for channel in (self._normals, self._colors, self._uvs):
+            if channel is not None:
+                channel[self._vertex_count] = 0
+
+    #   Make sure there is room for `count` more faces.
+    def _reserveFaces(self, count):
+        self._expand()
+        self._indices = _grow(self._indices, self._face_count + count, 3, self._face_count, numpy.int32)
+
+##  Internal
+
+#   Minimum amount of rows allocated for a channel.
+_minimum_capacity = 16
+
+#   Get data passed to addVertices() or addIndices() as an array the mesh can own, see _grow().
+#
+#   Writable, C-contiguous arrays of the right type are used as they are, anything else is copied.
+def _toChannel(data, width, dtype = numpy.float32):
+    if data is None:
+        return None
+    if isinstance(data, numpy.ndarray) and data.dtype == dtype and data.ndim == 2 and data.flags.c_contiguous and data.flags.writeable:
+        return data
+    return numpy.array(data, dtype = dtype).reshape((-1, width))
+
+#   Get a writable array with at least `size` rows containing the first `used` rows of `array`.
+#
+#   When the array is too small, a new array is allocated that is at least twice as large, so a
+#   sequence of appends takes amortized linear time. A new array is allocated instead of resizing
+#   in place, since arrays can be views or memory mapped from the mesh cache. Read-only arrays,
+#   which are shared with another mesh, are always copied.
+def _grow(array, size, width, used, dtype = numpy.float32):
+    if array is None:
+        return numpy.zeros((max(size, _minimum_capacity), width), dtype = dtype)
+
+    if len(array) >= size:
+        if array.flags.writeable:
+            return array
+        capacity = len(array)
+    else:
+        capacity = max(size, len(array) * 2, _minimum_capacity)
+
+    grown = numpy.zeros((capacity,) + array.shape[1:], dtype = array.dtype)
+    used = min(used, len(array))
+    grown[0:used] = array[0:used]
+    return grown
+
+#   Amount of rows transformed at once, which limits the size of temporary arrays.
+_transform_chunk_size = 1024 * 1024
+
+#   Transform an array of points by a 4x4 matrix, writing the result to `out`, which can be `points` itself.
+def _transformPoints(points, matrix, out):
+    rotation = matrix[0:3, 0:3].T
+    translation = matrix[0:3, 3]
+    for start in range(0, len(points), _transform_chunk_size):
+        end = start + _transform_chunk_size
+        out[start:end] = numpy.dot(points[start:end], rotation) + translation
+    return out
+
+#   Transform an array of vectors by a 3x3 matrix, writing the result to `out`, which can be `vectors` itself.
+def _transformVectors(vectors, matrix, out):
+    transposed = matrix.T
+    for start in range(0, len(vectors), _transform_chunk_size):
+        end = start + _transform_chunk_size
+        out[start:end] = numpy.dot(vectors[start:end], transposed)
+    return out
+
+#   Get the matrix to transform normals with for a 4x4 transformation matrix.
+#   Returns None when the transformation does not change the direction of normals.
+def _getNormalMatrix(matrix):
+    linear = matrix[0:3, 0:3]
+    if linear[0, 0] > 0 and numpy.allclose(linear, numpy.identity(3) * linear[0, 0]):
+        return None
+
+    try:
+        return numpy.linalg.inv(linear).T
+    except numpy.linalg.LinAlgError:
+        # Degenerate transformations flatten the mesh, the normals can not be recovered from those.
+        return linear
+
+#   Maximum amount of points kept to calculate the transformed extents of a mesh from.
+_hull_point_limit = 4096
+
+#   Directions used to find points on the convex hull: the faces, edges and corners of a cube.
+_hull_directions = numpy.array([direction for direction in itertools.product((-1, 0, 1), repeat = 3) if any(direction)], dtype = numpy.float32)
+
+#   Find a small set of points whose convex hull contains all vertices.
+#
+#   The vertices furthest along a number of directions are on the hull. All vertices strictly
+#   inside the hull of those extreme vertices can not be on the hull of the mesh, so they are
+#   discarded (the Akl-Toussaint heuristic). When too many vertices remain, which happens for
+#   smooth round meshes, the corners of the polytope bounded by the planes through the extreme
+#   vertices are returned instead. Those contain the mesh, but are not vertices of it.
+def _findHullPoints(vertices, minimum, maximum):
+    best = numpy.full(len(_hull_directions), -numpy.inf)
+    best_index = numpy.zeros(len(_hull_directions), dtype = numpy.intp)
+    for start in range(0, len(vertices), _transform_chunk_size):
+        projected = numpy.dot(vertices[start:start + _transform_chunk_size], _hull_directions.T)
+        index = projected.argmax(axis = 0)
+        value = projected[index, numpy.arange(len(_hull_directions))]
+        better = value > best
+        best[better] = value[better]
+        best_index[better] = index[better] + start
+
+    extremes = numpy.unique(vertices[best_index].astype(numpy.float64), axis = 0)
+    tolerance = 1e-6 * max(float((maximum - minimum).max()), 1e-6)
+    normals, offsets = _calculateHullPlanes(extremes, tolerance)
+    if len(normals) == 0:
+        # The extreme vertices are coplanar, so nothing is strictly inside them.
+        return _calculatePolytopeCorners(vertices[best_index].astype(numpy.float64), tolerance)
+
+    candidates = []
+    count = 0
+    for start in range(0, len(vertices), _transform_chunk_size):
+        chunk = vertices[start:start + _transform_chunk_size]
+        outside = (numpy.dot(chunk, normals.T) - offsets > -tolerance).any(axis = 1)
+        count += numpy.count_nonzero(outside)
+        if count > _hull_point_limit:
+            return _calculatePolytopeCorners(vertices[best_index].astype(numpy.float64), tolerance)
+        candidates.append(chunk[outside])
+
+    candidates.append(extremes)
+    return numpy.concatenate(candidates).astype(numpy.float64)
+
+#   Get the corners of the polytope bounded by a plane perpendicular to each of the hull
+#   directions, through the vertex furthest along that direction.
+def _calculatePolytopeCorners(extremes, tolerance):
+    directions = _hull_directions.astype(numpy.float64)
+    offsets = (directions * extremes).sum(axis = 1)
+
+    triples = numpy.array(list(itertools.combinations(range(len(directions)), 3)))
+    matrices = directions[triples]
+    # The directions have integer components, so the determinant is an integer as well.
+    regular = numpy.abs(numpy.linalg.det(matrices)) > 0.5
+    triples = triples[regular]
+    corners = numpy.linalg.solve(matrices[regular], offsets[triples][:, :, numpy.newaxis])[:, :, 0]
+
+    inside = (numpy.dot(corners, directions.T) - offsets <= tolerance).all(axis = 1)
+    return numpy.unique(corners[inside], axis = 0)
+
+#   Get the planes of the faces of the convex hull of a small set of points.
+#
+#   Every triangle of points that has all other points on one side is part of a face. This takes
+#   O(n^4) time, so it is only meant for a few dozen points.
+#
+#   \return A tuple with an array of unit normals and an array of offsets, such that points inside
+#            the hull have dot(normal, point) < offset for all planes.
+def _calculateHullPlanes(points, tolerance):
+    if len(points) < 4:
+        return numpy.zeros((0, 3)), numpy.zeros(0)
+
+    triangles = numpy.array(list(itertools.combinations(range(len(points)), 3)))
+    origins = points[triangles[:, 0]]
+    normals = numpy.cross(points[triangles[:, 1]] - origins, points[triangles[:, 2]] - origins)
+    lengths = numpy.linalg.norm(normals, axis = 1)
+    valid = lengths > tolerance * tolerance
+    normals = normals[valid] / lengths[valid, numpy.newaxis]
+    offsets = (normals * origins[valid]).sum(axis = 1)
+
+    distances = numpy.dot(points, normals.T) - offsets
+    below = (distances <= tolerance).all(axis = 0)
+    above = (distances >= -tolerance).all(axis = 0)
+    if (below & above).any():
+        # All points are coplanar.
+        return numpy.zeros((0, 3)), numpy.zeros(0)
+
+    normals = numpy.concatenate((normals[below], -normals[above]))
+    offsets = numpy.concatenate((offsets[below], -offsets[above]))
+    # Faces with more than three points are found once for every triangle on them.
+    unique = numpy.unique(numpy.round(numpy.column_stack((normals, offsets / tolerance)), 6), axis = 0, return_index = True)[1]
+    return normals[unique], offsets[unique]
+
+#   Largest value of a quantized position.
+_position_scale = 65535.0
+
+#   Attribute type suffixes of the data types a channel can be stored in, see MeshData::getInterleavedLayout().
+_attribute_types = {
+    numpy.dtype(numpy.float32): "f",
+    numpy.dtype(numpy.int8): "b",
+    numpy.dtype(numpy.int16): "s",
+    numpy.dtype(numpy.uint8): "ub",
+    numpy.dtype(numpy.uint16): "us"
+}
+
+#   Get the data type a channel is passed to the renderer as. Other floats are converted to 32-bit floats.
+def _getAttributeDType(channel):
+    if channel.dtype in _attribute_types:
+        return channel.dtype
+    return numpy.dtype(numpy.float32)
+
+#   Mark an array as read-only, so methods that write to it make a copy first.
+def _freeze(array):
+    array.flags.writeable = False
+    return array
+
+#   Convert an array of normalized integers to floats, like a normalized vertex attribute.
+#   Arrays of floats are returned as is.
+def _toFloat(array):
+    if array.dtype.kind == "f":
+        return array
+
+    result = array.astype(numpy.float32)
+    result *= 1.0 / numpy.iinfo(array.dtype).max
+    if array.dtype.kind == "i":
+        numpy.maximum(result, -1.0, out = result)
+    return result
+
+#   Convert an array of floats to normalized integers of a data type.
+def _fromFloat(array, dtype):
+    info = numpy.iinfo(dtype)
+    result = numpy.empty(array.shape, dtype = dtype)
+    for start in range(0, len(array), _transform_chunk_size):
+        end = start + _transform_chunk_size
+        result[start:end] = numpy.round(numpy.clip(array[start:end], -1.0 if info.min < 0 else 0.0, 1.0) * info.max)
+    return result
+
+#   The amount of pairs of corners around a vertex compared at once when calculating creased normals.
+_crease_chunk_size = 1024 * 1024
+
+#   Faces with a cross product shorter than this times the squared size of the mesh are degenerate.
+_degenerate_area = 1e-12
+
+#   Normals shorter than this are invalid.
+_minimum_normal_length = 1e-6
+
+#   The amount of faces searched at once for a face of the next part in _orientFaces().
+_seed_window = 4096
+
+#   Find the faces to flip so that all faces connected by manifold edges are wound consistently.
+#
+#   Every part of the mesh is visited breadth first from its first face, handling a whole ring of faces
+#   at once. A face is flipped when it shares an edge in the same direction with a neighbour that keeps
+#   its winding, or in the opposite direction with a neighbour that is flipped. When a part cannot be
+#   wound consistently, like a Moebius strip, the face that is reached first wins.
+#
+#   \param face_count The amount of faces.
+#   \param first_edges, second_edges Arrays with the two uses of every manifold edge, as indices into the
+#                                    edges of all faces, where the edges of face f are 3f, 3f + 1 and 3f + 2.
+#   \param same_direction Array that is True for edges that both faces use in the same direction.
+#   \return A tuple of a boolean array that is True for faces to flip and an array with the number of
+#            the part every face belongs to.
+def _orientFaces(face_count, first_edges, second_edges, same_direction):
+    # Every face has three edges, so the neighbours can be stored per edge instead of in a sorted table.
+    neighbours = numpy.full(face_count * 3, -1, dtype = numpy.int64)
+    neighbours[first_edges] = second_edges // 3
+    neighbours[second_edges] = first_edges // 3
+    changes = numpy.zeros(face_count * 3, dtype = bool)
+    changes[first_edges] = same_direction
+    changes[second_edges] = same_direction
+    edge_offsets = numpy.arange(3)
+
+    flipped = numpy.zeros(face_count, dtype = bool)
+    parts = numpy.full(face_count, -1, dtype = numpy.int64)
+    claims = numpy.empty(face_count, dtype = numpy.int64)
+
+    # Faces without neighbours are parts by themselves.
+    isolated = numpy.flatnonzero((neighbours.reshape((-1, 3)) < 0).all(axis = 1))
+    parts[isolated] = numpy.arange(len(isolated))
+    part_count = len(isolated)
+
+    seed = 0
+    while seed < face_count:
+        # Look for the next unvisited face in small windows, so many small parts do not scan all faces every time.
+        unvisited = numpy.flatnonzero(parts[seed:seed + _seed_window] < 0)
+        if not len(unvisited):
+            seed += _seed_window
+            continue
+        seed += unvisited[0]
+        parts[seed] = part_count
+        ring = numpy.array([seed])
+        while len(ring):
+            edges = (ring[:, numpy.newaxis] * 3 + edge_offsets).reshape(-1)
+            next_faces = neighbours[edges]
+            new = next_faces >= 0
+            new[new] = parts[next_faces[new]] < 0
+            next_faces = next_faces[new]
+            next_flipped = flipped[edges[new] // 3] ^ changes[edges[new]]
+            # Faces reached through several edges are only added to the next ring once.
+            claimed = numpy.arange(len(next_faces))
+            claims[next_faces] = claimed
+            first = claims[next_faces] == claimed
+            ring = next_faces[first]
+            flipped[ring] = next_flipped[first]
+            parts[ring] = part_count
+        part_count += 1
+
+    return flipped, parts
+
+#   Normalize an array of vectors in place. Vectors of zero length are left zero instead of becoming NaN.
+def _normalize(vectors):
+    lengths = numpy.linalg.norm(vectors, axis = 1)
+    lengths[lengths == 0] = 1.0
+    vectors /= lengths[:, numpy.newaxis]
+    return vectors
+
+#   Find the unique rows of a two-dimensional array.
+#
+#   Returns the index of the first occurrence of every unique row and, for every row, the
+#   number of the unique row it is equal to. Integer rows are packed into a single integer
+#   when their range allows, since sorting those is much faster than sorting rows. Other
+#   rows are sorted by a hash, which is still several times faster than sorting the rows.
+#   Rows are only sorted themselves in the unlikely case that two different rows have the
+#   same hash.
+#
+#   \param hashes The result of _hashRows() for the rows, when it was already calculated.
+def _uniqueRows(rows, hashes = None):
+    if not len(rows):
+        return numpy.zeros(0, dtype = numpy.int64), numpy.zeros(0, dtype = numpy.int64)
+
+    keys = hashes
+    if keys is None and rows.dtype.kind == "i":
+        # Reducing every column separately is much faster than reducing along the first axis.
+        minimum = numpy.array([rows[:, column].min() for column in range(rows.shape[1])], dtype = numpy.int64)
+        ranges = numpy.array([rows[:, column].max() for column in range(rows.shape[1])], dtype = numpy.int64) - minimum + 1
+        if numpy.prod(ranges.astype(numpy.float64)) < 2 ** 62:
+            keys = numpy.zeros(len(rows), dtype = numpy.int64)
+            for column in range(rows.shape[1]):
+                keys = keys * ranges[column] + (rows[:, column] - minimum[column])
+
+    hashed = keys is None or hashes is not None
+    if keys is None:
+        keys = _hashRows(rows)
+
+    order = numpy.argsort(keys)
+    keys = keys[order]
+    starts = numpy.empty(len(rows), dtype = bool)
+    starts[0] = True
+    numpy.not_equal(keys[1:], keys[:-1], out = starts[1:])
+
+    if hashed:
+        # Equal rows have equal hashes, so rows only start a new group where the hash changes,
+        # unless different rows have the same hash.
+        differs = numpy.zeros(len(rows) - 1, dtype = bool)
+        for column in range(rows.shape[1]):
+            sorted_column = rows[order, column]
+            differs |= sorted_column[1:] != sorted_column[:-1]
+        if numpy.any(differs & numpy.logical_not(starts[1:])):
+            order = numpy.lexsort(rows.T[::-1])
+            sorted_rows = rows[order]
+            numpy.any(sorted_rows[1:] != sorted_rows[:-1], axis = 1, out = starts[1:])
+
+    inverse = numpy.empty(len(rows), dtype = numpy.int64)
+    inverse[order] = numpy.cumsum(starts) - 1
+    # The order of equal rows is arbitrary, so look up the first occurrence.
+    return numpy.minimum.reduceat(order, numpy.flatnonzero(starts)), inverse
+
+#   Find the first row equal to every row of a two-dimensional array.
+#
+#   Like _uniqueRows(), but faster when most rows are unique, since only rows whose hash occurs more
+#   than once are grouped.
+#
+#   \return An array with, for every row, the index of the first row that is equal to it.
+def _matchRows(rows):
+    matches = numpy.arange(len(rows))
+    hashes = _hashRows(rows)
+    sorted_hashes = numpy.sort(hashes)
+    repeated = sorted_hashes[1:][sorted_hashes[1:] == sorted_hashes[:-1]]
+    if not len(repeated):
+        return matches
+
+    if len(repeated) >= len(rows) // 8:
+        first_rows, inverse = _uniqueRows(rows, hashes)
+        return first_rows[inverse]
+
+    candidates = numpy.flatnonzero(numpy.isin(hashes, repeated))
+    first_rows, inverse = _uniqueRows(rows[candidates], hashes[candidates])
+    matches[candidates] = candidates[first_rows][inverse]
+    return matches
+
+#   Sort the corners of every face, so faces with the same corners get the same row.
+def _sortCorners(faces):
+    low = numpy.minimum(numpy.minimum(faces[:, 0], faces[:, 1]), faces[:, 2])
+    high = numpy.maximum(numpy.maximum(faces[:, 0], faces[:, 1]), faces[:, 2])
+    return numpy.stack((low, faces.sum(axis = 1) - low - high, high), axis = 1)
+
+#   The offsets of half of the cells around a cell, the other half are the opposites of these.
+_neighbour_offsets = numpy.array([offset for offset in itertools.product((-1, 0, 1), repeat = 3) if offset > (0, 0, 0)], dtype = numpy.int64)
+
+#   The amount of pairs of rows compared at once by _clusterRows().
+_cluster_chunk_size = 1024 * 1024
+
+#   Group the rows of a two-dimensional array that are within a tolerance of each other.
+#
+#   Rows are in the same group when none of their columns differ more than the tolerance, or when
+#   they are connected by a chain of such rows. The first three columns are positions, which are
+#   sorted into cubic cells of the size of the tolerance. Only rows in the same or neighbouring cells
+#   can be within the tolerance of each other. The positions of the rows in a cell are all within the
+#   tolerance of each other, so rows without further columns are grouped by cell right away.
+#
+#   Returns the same as _uniqueRows(): the index of the first row of every group and, for every row,
+#   the number of its group.
+def _clusterRows(rows, tolerance):
+    first_rows, row_map = _uniqueRows(rows)
+    rows = rows[first_rows]
+
+    cells = numpy.floor(rows[:, 0:3] / tolerance).astype(numpy.int64)
+    first_cells, cell_map = _uniqueRows(cells)
+    cells = cells[first_cells]
+    cell_sizes = numpy.bincount(cell_map, minlength = len(cells))
+    cell_starts = numpy.cumsum(cell_sizes) - cell_sizes
+    cell_rows = numpy.argsort(cell_map, kind = "stable")
+
+    if rows.shape[1] == 3:
+        labels = cell_rows[cell_starts][cell_map]
+        first_pair_cells = [numpy.zeros(0, dtype = numpy.int64)]
+    else:
+        labels = numpy.arange(len(rows))
+        first_pair_cells = [numpy.flatnonzero(cell_sizes > 1)]
+    second_pair_cells = [first_pair_cells[0]]
+
+    # Find the pairs of neighbouring cells that both contain rows.
+    cell_hashes = _hashRows(cells)
+    hash_order = numpy.argsort(cell_hashes)
+    sorted_hashes = cell_hashes[hash_order]
+    for offset in _neighbour_offsets:
+        neighbours = cells + offset
+        neighbour_hashes = _hashRows(neighbours)
+        # Searching is much faster for sorted values.
+        neighbour_order = numpy.argsort(neighbour_hashes)
+        sorted_neighbour_hashes = neighbour_hashes[neighbour_order]
+        starts = numpy.empty(len(cells), dtype = numpy.int64)
+        counts = numpy.empty(len(cells), dtype = numpy.int64)
+        starts[neighbour_order] = numpy.searchsorted(sorted_hashes, sorted_neighbour_hashes, side = "left")
+        counts[neighbour_order] = numpy.searchsorted(sorted_hashes, sorted_neighbour_hashes, side = "right")
+        counts -= starts
+        found = numpy.flatnonzero(counts)
+        first = numpy.repeat(found, counts[found])
+        second = hash_order[_expandRanges(starts[found], counts[found])]
+        # Different cells can have the same hash.
+        matches = numpy.all(cells[second] == neighbours[first], axis = 1)
+        first_pair_cells.append(first[matches])
+        second_pair_cells.append(second[matches])
+    first_pair_cells = numpy.concatenate(first_pair_cells)
+    second_pair_cells = numpy.concatenate(second_pair_cells)
+
+    # Compare the rows of the pairs of cells, a chunk of pairs at a time so the temporary arrays stay small.
+    first_edges = [numpy.zeros(0, dtype = numpy.int64)]
+    second_edges = [numpy.zeros(0, dtype = numpy.int64)]
+    pair_ends = numpy.cumsum(cell_sizes[first_pair_cells] * cell_sizes[second_pair_cells])
+    start = 0
+    while start < len(first_pair_cells):
+        first_pair = pair_ends[start - 1] if start > 0 else 0
+        end = max(int(numpy.searchsorted(pair_ends, first_pair + _cluster_chunk_size, side = "right")), start + 1)
+        chunk_first_cells = first_pair_cells[start:end]
+        chunk_second_cells = second_pair_cells[start:end]
+
+        first_sizes = cell_sizes[chunk_first_cells]
+        first = cell_rows[_expandRanges(cell_starts[chunk_first_cells], first_sizes)]
+        second_sizes = numpy.repeat(cell_sizes[chunk_second_cells], first_sizes)
+        second = cell_rows[_expandRanges(numpy.repeat(cell_starts[chunk_second_cells], first_sizes), second_sizes)]
+        first = numpy.repeat(first, second_sizes)
+
+        close = numpy.all(numpy.abs(rows[first] - rows[second]) <= tolerance, axis = 1)
+        first_edges.append(first[close])
+        second_edges.append(second[close])
+        start = end
+
+    groups = _connectedComponents(labels, numpy.concatenate(first_edges), numpy.concatenate(second_edges))[row_map]
+    unused, first_rows, group_map = numpy.unique(groups, return_index = True, return_inverse = True)
+    return first_rows, group_map.reshape(-1)
+
+#   Get the positions within a set of ranges of an array, concatenated.
+def _expandRanges(starts, lengths):
+    return numpy.arange(lengths.sum(), dtype = numpy.int64) + numpy.repeat(starts - (numpy.cumsum(lengths) - lengths), lengths)
+
+#   Label the connected components of a graph.
+#
+#   \param labels For every node, the lowest node of the group of nodes it is already known to be connected to.
+#   \param first, second The nodes connected by every edge.
+#   \return An array with, for every node, the lowest node of its component.
+def _connectedComponents(labels, first, second):
+    while True:
+        # Attach the component of both ends of every edge to the lowest of the two, then point every node
+        # directly at the lowest node of its component.
+        lowest = numpy.minimum(labels[first], labels[second])
+        attached = labels.copy()
+        numpy.minimum.at(attached, labels[first], lowest)
+        numpy.minimum.at(attached, labels[second], lowest)
+        while True:
+            jumped = attached[attached]
+            if numpy.array_equal(jumped, attached):
+                break
+            attached = jumped
+
+        if numpy.array_equal(attached, labels):
+            return labels
+        labels = attached
+
+#   Calculate a 64-bit hash of every row of a two-dimensional array.
+#
+#   Rows that compare equal get the same hash, so floats are converted to a common type and
+#   negative zero is turned into zero first.
+def _hashRows(rows):
+    if rows.dtype.kind == "f":
+        bits = (rows.astype(numpy.float64) + 0.0).view(numpy.uint64)
+    else:
+        bits = rows.astype(numpy.int64).view(numpy.uint64)
+
+    hashes = numpy.zeros(len(rows), dtype = numpy.uint64)
+    for column in range(rows.shape[1]):
+        hashes ^= bits[:, column]
+        hashes *= numpy.uint64(0x9E3779B97F4A7C15)
+        hashes ^= hashes >> numpy.uint64(29)
+    return hashes
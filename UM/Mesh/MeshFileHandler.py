@@ -3,9 +3,26 @@
 
 from UM.Logger import Logger
 from UM.PluginRegistry import PluginRegistry
+from UM.Preferences import Preferences
+from UM.Resources import Resources
+from UM.Mesh.MeshData import MeshType
+from UM.Mesh.MeshCache import MeshCache, writeMeshFile, readMeshFile
+from UM.Mesh.MeshReadContext import MeshReadContext, MeshReadCancelledError
 
 from UM.Math.Matrix import Matrix
 
+import importlib
+import multiprocessing
+import os
+import os.path
+import shutil
+import sys
+import tempfile
+import time
+
+##  Amount of bytes passed to MeshReader::canReadHeader() when choosing between readers.
+_header_size = 512
+
 ##  Central class for reading and writing meshes.
 #
 #   This class is created by Application and handles reading and writing mesh files.
@@ -13,10 +30,19 @@ class MeshFileHandler(object):
     def __init__(self):
         super().__init__()
         self._mesh_readers = []
+        self._readers_by_extension = {}
         self._mesh_writers = []
+        self._cache = None
 
         PluginRegistry.addType("mesh_writer", self.addWriter)
         PluginRegistry.addType("mesh_reader", self.addReader)
+
+        Preferences.getInstance().addPreference("mesh/cache_enabled", True)
+        Preferences.getInstance().addPreference("mesh/cache_size", 2048) # In megabytes
+        Preferences.getInstance().addPreference("mesh/reader_processes", 0) # 0 means one process per CPU core
+        Preferences.getInstance().addPreference("mesh/weld_on_load", False)
+        Preferences.getInstance().addPreference("mesh/weld_tolerance", 0.001) # In millimeters
+        Preferences.getInstance().addPreference("mesh/compact_storage", False)
     
     # Try to read the mesh_data from a file. Based on the extension in the file a correct meshreader is selected.
     # \param file_name The name of the mesh to load.
@@ -24,28 +50,178 @@ class MeshFileHandler(object):
     # \param kwargs Keyword arguments.
     #               Possible values are:
     #               - Center: True if the model should be centered around (0,0,0), False if it should be loaded as-is. Defaults to True.
-    # \returns MeshData if it was able to read the file, None otherwise.
+    #               - context: A MeshReadContext that receives the progress of the reader and can be used to cancel reading.
+    # \returns MeshData if it was able to read the file, None otherwise. None is also returned when reading was cancelled.
+    #
+    # When the mesh cache is enabled, previously read files are loaded from the cache instead of parsed again.
+    # Meshes are stored in the cache as they are returned, so centered and uncentered versions are cached separately.
+    # When the "mesh/weld_on_load" preference is set, vertices of the mesh are welded with MeshData::weld()
+    # after reading, using the "mesh/weld_tolerance" preference as tolerance. When the "mesh/compact_storage"
+    # preference is set, the mesh is stored in the compact format described at MeshData::compact().
     def read(self, file_name, storage_device, **kwargs):
+        reader = self.getReaderForFile(file_name, storage_device)
+        if not reader:
+            Logger.log("w", "Unable to read file %s: no reader available for this type of file", file_name)
+            return None
+
+        context = kwargs.get("context", None)
+        start_time = time.time()
+        result = None
         try:
-            for reader in self._mesh_readers:
-                result = reader.read(file_name, storage_device)
-                if(result is not None):
-                    if kwargs.get("center", True):
-                        # Center the mesh
-                        extents = result.getExtents()
-                        m = Matrix()
-                        m.setByTranslation(-extents.center)
-                        result = result.getTransformed(m)
-
-                    result.setFileName(file_name)
-                    return result
+            cache = self.getCache()
+            center = kwargs.get("center", True)
+            reader_key = self._getReaderKey(reader, center)
+            if cache:
+                result = cache.get(file_name, reader_key)
+
+            if result is None:
+                if context:
+                    result = reader.read(file_name, storage_device, context = context)
+                else:
+                    # Also supports readers that do not accept a context.
+                    result = reader.read(file_name, storage_device)
 
+                if result is not None:
+                    _weldMesh(result, self._getWeldTolerance())
+                    if center:
+                        _centerMesh(result)
+
+                if result is not None and cache:
+                    cache.put(file_name, reader_key, result)
+        except MeshReadCancelledError:
+            Logger.log("i", "Reading file %s was cancelled after %.3f seconds", file_name, time.time() - start_time)
+            return None
         except OSError as e:
             Logger.log("e", str(e))
 
-        Logger.log("w", "Unable to read file %s", file_name)
-        return None #unable to read
-    
+        if result is None:
+            Logger.log("w", "Unable to read file %s with reader %s after %.3f seconds", file_name, self._getReaderName(reader), time.time() - start_time)
+            return None #unable to read
+
+        return self._finishMesh(result, file_name, **kwargs)
+
+    ##  Read a set of files in parallel.
+    #
+    #   Files are parsed by a pool of worker processes, so reading many files scales with the amount
+    #   of CPU cores instead of being serialized by the GIL. Workers do not send the parsed arrays back;
+    #   they write each mesh to a file in the mesh cache format (into the cache itself when it is enabled)
+    #   and the arrays are memory mapped by this process, so the data is shared instead of copied.
+    #
+    #   Worker processes are started with the "spawn" method on every platform and read files directly
+    #   from the local file system. Files that are in the cache, files whose reader can not be loaded in
+    #   a worker and any file when only a single process would be used are read in this process with read().
+    #
+    #   \param file_names \type{list} The names of the files to read.
+    #   \param storage_device \type{StorageDevice} The StorageDevice used to select readers and for files read in this process.
+    #   \param callback A function called with the file name and the resulting MeshData (or None) as soon as each file is
+    #                   done. Files report completion in the order they finish, not the order of file_names.
+    #   \param kwargs Keyword arguments, as accepted by read(). The progress of a context is the amount of
+    #                 files that are done. When it is cancelled, worker processes are stopped and the files
+    #                 that were not done yet are not reported.
+    #   \return \type{list} A MeshData object or None for every file, in the order of file_names.
+    def readMany(self, file_names, storage_device, callback = None, **kwargs):
+        results = [None] * len(file_names)
+
+        context = kwargs.get("context", None)
+        if context:
+            context.setTotal(len(file_names))
+            # Files read in this process get their own context, so their progress does not replace the overall progress.
+            kwargs["context"] = MeshReadContext(context)
+
+        finished_count = [0]
+        def finish(index, mesh):
+            results[index] = mesh
+            finished_count[0] += 1
+            if context:
+                context.setProcessed(finished_count[0])
+            if callback:
+                callback(file_names[index], mesh)
+
+        cache = self.getCache()
+        tasks = []
+        for index, file_name in enumerate(file_names):
+            if context and context.isCancelled():
+                return results
+
+            reader = self.getReaderForFile(file_name, storage_device)
+            if not reader:
+                Logger.log("w", "Unable to read file %s: no reader available for this type of file", file_name)
+                finish(index, None)
+                continue
+
+            reader_key = self._getReaderKey(reader, kwargs.get("center", True))
+            if cache:
+                mesh = cache.get(file_name, reader_key)
+                if mesh is not None:
+                    finish(index, self._finishMesh(mesh, file_name, **kwargs))
+                    continue
+
+            reader_spec = _getReaderSpec(reader)
+            if reader_spec is None:
+                finish(index, self.read(file_name, storage_device, **kwargs))
+                continue
+
+            tasks.append((index, file_name, reader, reader_key, reader_spec))
+
+        process_count = min(self._getProcessCount(), len(tasks))
+        if process_count <= 1:
+            for index, file_name, reader, reader_key, reader_spec in tasks:
+                if context and context.isCancelled():
+                    break
+                finish(index, self.read(file_name, storage_device, **kwargs))
+            return results
+
+        if cache:
+            output_directory = cache.getDirectory()
+            os.makedirs(output_directory, exist_ok = True)
+        else:
+            output_directory = tempfile.mkdtemp(prefix = "uranium-meshes-")
+
+        try:
+            self._readInProcesses(tasks, process_count, cache, output_directory, storage_device, finish, **kwargs)
+        finally:
+            if cache:
+                cache.trim()
+            else:
+                shutil.rmtree(output_directory, ignore_errors = True)
+
+        return results
+
+    ##  Get the reader that should be used to read a file.
+    #
+    #   Readers are looked up by the extension of the file, as specified in the "mesh_reader" metadata
+    #   of their plugin. When more than one reader is available for the extension, or the extension is
+    #   unknown and readers without extension are registered, the first bytes of the file are read once
+    #   and the first reader that accepts them through MeshReader::canReadHeader() is chosen.
+    #
+    #   \param file_name \type{string} The name of the file to read.
+    #   \param storage_device \type{StorageDevice} The device to read the file from when its contents need to be inspected.
+    #   \return \type{MeshReader} The reader to use, or None if no reader can read the file.
+    def getReaderForFile(self, file_name, storage_device = None):
+        extension = os.path.splitext(file_name)[1].lstrip(".").lower()
+        candidates = self._readers_by_extension.get(extension, self._readers_by_extension.get("", []))
+        if not candidates:
+            return None
+
+        if len(candidates) == 1 or storage_device is None:
+            return candidates[0]
+
+        try:
+            f = storage_device.openFile(file_name, "rb")
+            try:
+                header = f.read(_header_size)
+            finally:
+                storage_device.closeFile(f)
+        except OSError as e:
+            Logger.log("e", str(e))
+            return None
+
+        for reader in candidates:
+            if reader.canReadHeader(header):
+                return reader
+
+        return None
+
     # Try to write the mesh_data to file. Based on the extension in the file_name a correct meshwriter is selected.
     # \param file_name The name of the file to write.
     # \param storage_device The StorageDevice where the file should be written to.
@@ -86,8 +262,227 @@ class MeshFileHandler(object):
 
         return supported_types
 
+    ##  Get the on-disk cache of parsed meshes.
+    #
+    #   The cache can be disabled with the "mesh/cache_enabled" preference. Its maximum size
+    #   in megabytes is set with the "mesh/cache_size" preference.
+    #
+    #   \return \type{MeshCache} The cache, or None if caching is disabled.
+    def getCache(self):
+        preferences = Preferences.getInstance()
+        if preferences.getValue("mesh/cache_enabled") not in (True, "True"):
+            return None
+
+        max_size = int(preferences.getValue("mesh/cache_size")) * 1024 * 1024
+        if not self._cache:
+            self._cache = MeshCache(Resources.getStoragePath(Resources.CacheLocation, "meshes"), max_size)
+        else:
+            self._cache.setMaximumSize(max_size)
+
+        return self._cache
+
     def addWriter(self, writer):
         self._mesh_writers.append(writer)
         
+    ##  Add a reader.
+    #
+    #   The reader is added to the dispatch table under the extension(s) from the "mesh_reader" metadata
+    #   of its plugin. Readers without an extension are only used for files with an unknown extension.
     def addReader(self, reader):
         self._mesh_readers.append(reader)
+
+        extensions = [""]
+        plugin_id = reader.getPluginId()
+        if plugin_id:
+            extension = PluginRegistry.getInstance().getMetaData(plugin_id).get("mesh_reader", {}).get("extension", None)
+            if isinstance(extension, str):
+                extensions = [extension]
+            elif extension:
+                extensions = extension
+
+        for extension in extensions:
+            extension = extension.lstrip(".").lower()
+            if extension not in self._readers_by_extension:
+                self._readers_by_extension[extension] = []
+            self._readers_by_extension[extension].append(reader)
+
+    ##  private:
+
+    #   Apply the post-processing that is not stored in the cache to a mesh. Meshes are centered before
+    #   they are cached, so memory mapped cache entries are not written to, see read().
+    def _finishMesh(self, mesh, file_name, **kwargs):
+        if Preferences.getInstance().getValue("mesh/compact_storage") in (True, "True"):
+            mesh.compact()
+
+        mesh.setFileName(file_name)
+        return mesh
+
+    def _getProcessCount(self):
+        count = int(Preferences.getInstance().getValue("mesh/reader_processes"))
+        if count <= 0:
+            try:
+                count = multiprocessing.cpu_count()
+            except NotImplementedError:
+                count = 1
+        return count
+
+    #   Distribute the tasks of readMany() over a pool of worker processes and finish each file as its worker is done.
+    def _readInProcesses(self, tasks, process_count, cache, output_directory, storage_device, finish, **kwargs):
+        # This is the context of the files read in this process, which is cancelled with the context given to readMany().
+        context = kwargs.get("context", None)
+        work = []
+        for index, file_name, reader, reader_key, reader_spec in tasks:
+            if cache:
+                output_path = cache.getEntryPath(file_name, reader_key)
+            else:
+                output_path = os.path.join(output_directory, "{0}.mesh".format(index))
+            work.append((index, file_name, output_path, reader_spec, self._getWeldTolerance(), kwargs.get("center", True)))
+
+        remaining = { task[0]: task for task in tasks }
+        try:
+            # Forking this multi-threaded process could copy locks held by other threads into the workers,
+            # which then deadlock. Spawned workers start clean and only need the reader spec to import the reader.
+            pool = multiprocessing.get_context("spawn").Pool(process_count)
+        except (OSError, ValueError) as e:
+            Logger.log("w", "Unable to start mesh reader processes, reading files in this process: %s", str(e))
+            pool = None
+
+        if pool:
+            try:
+                for index, output_path, error in pool.imap_unordered(_readInProcess, work):
+                    if context and context.isCancelled():
+                        # Terminating the pool below stops the workers that are still reading.
+                        return
+
+                    index, file_name, reader, reader_key, reader_spec = remaining.pop(index)
+                    if error:
+                        Logger.log("w", "Unable to read file %s with reader %s in a worker process: %s", file_name, self._getReaderName(reader), error)
+                        finish(index, None)
+                        continue
+
+                    try:
+                        # Without a cache the file is removed afterwards, which Windows does not allow for mapped files.
+                        mesh = readMeshFile(output_path, mapped = bool(cache) or sys.platform != "win32")
+                    except (OSError, ValueError, KeyError) as e:
+                        Logger.log("w", "Unable to load the result of reading %s: %s", file_name, str(e))
+                        finish(index, None)
+                        continue
+
+                    if not cache:
+                        try:
+                            os.remove(output_path)
+                        except OSError:
+                            pass
+
+                    finish(index, self._finishMesh(mesh, file_name, **kwargs))
+            except (OSError, EOFError) as e:
+                Logger.log("w", "Mesh reader processes failed, reading the remaining files in this process: %s", str(e))
+            finally:
+                pool.terminate()
+
+        # Anything the pool did not get to is read in this process.
+        for index, file_name, reader, reader_key, reader_spec in remaining.values():
+            if context and context.isCancelled():
+                break
+            finish(index, self.read(file_name, storage_device, **kwargs))
+
+    def _getReaderName(self, reader):
+        return reader.getPluginId() or type(reader).__name__
+
+    #   Get the tolerance to weld meshes with after reading them, or None if meshes should not be welded.
+    def _getWeldTolerance(self):
+        preferences = Preferences.getInstance()
+        if preferences.getValue("mesh/weld_on_load") not in (True, "True"):
+            return None
+
+        return float(preferences.getValue("mesh/weld_tolerance"))
+
+    #   Get a string identifying a reader, its version and the processing applied to the meshes it reads.
+    #   This is used to invalidate cached meshes when the reader or the processing changes.
+    def _getReaderKey(self, reader, center):
+        plugin_id = reader.getPluginId()
+        if not plugin_id:
+            key = type(reader).__name__
+        else:
+            meta_data = PluginRegistry.getInstance().getMetaData(plugin_id)
+            key = "{0}/{1}".format(plugin_id, meta_data.get("plugin", {}).get("version", ""))
+
+        weld_tolerance = self._getWeldTolerance()
+        if weld_tolerance is not None:
+            key += "/weld={0!r}".format(weld_tolerance)
+        if center:
+            key += "/center"
+        return key
+
+##  Internal
+
+#   Weld a mesh that was just read, unless welding is disabled or the mesh is a point cloud.
+def _weldMesh(mesh, tolerance):
+    if tolerance is not None and mesh.getType() is MeshType.faces:
+        mesh.weld(tolerance)
+
+#   Move a mesh that was just read so the center of its bounding box is at the origin.
+def _centerMesh(mesh):
+    extents = mesh.getExtents()
+    m = Matrix()
+    m.setByTranslation(-extents.center)
+    mesh.transform(m)
+
+#   Get a description of a reader that allows a worker process to create the same reader.
+#
+#   Plugins are loaded as top-level packages from their plugin location, so the worker needs that
+#   location to be able to import the reader. Returns None for readers that can not be recreated.
+def _getReaderSpec(reader):
+    reader_type = type(reader)
+    module_name = reader_type.__module__
+    package = sys.modules.get(module_name.split(".")[0])
+    path = getattr(package, "__file__", None)
+    if not path or "<locals>" in reader_type.__qualname__:
+        return None
+
+    location = os.path.dirname(os.path.abspath(path))
+    if hasattr(package, "__path__"):
+        location = os.path.dirname(location)
+
+    return (module_name, location, reader_type.__qualname__)
+
+#   Minimal storage device used by worker processes, which read directly from the local file system.
+class _LocalFileDevice:
+    def openFile(self, file_name, mode):
+        return open(file_name, mode)
+
+    def closeFile(self, file):
+        file.close()
+
+#   Readers created by this worker process, by reader spec.
+_worker_readers = {}
+
+#   Read a single file in a worker process and write the result to output_path.
+#   Returns a tuple of the task index, output path and an error message or None.
+def _readInProcess(task):
+    index, file_name, output_path, reader_spec, weld_tolerance, center = task
+    try:
+        reader = _worker_readers.get(reader_spec)
+        if reader is None:
+            module_name, location, class_name = reader_spec
+            if location not in sys.path:
+                sys.path.append(location)
+
+            reader_type = importlib.import_module(module_name)
+            for name in class_name.split("."):
+                reader_type = getattr(reader_type, name)
+            reader = reader_type()
+            _worker_readers[reader_spec] = reader
+
+        mesh = reader.read(file_name, _LocalFileDevice())
+        if mesh is None:
+            return (index, output_path, "the reader did not return a mesh")
+
+        _weldMesh(mesh, weld_tolerance)
+        if center:
+            _centerMesh(mesh)
+        writeMeshFile(output_path, mesh)
+    except Exception as e: # Report any failure to the main process instead of losing the worker.
+        return (index, output_path, "{0}: {1}".format(type(e).__name__, str(e)))
+
+    return (index, output_path, None)
@@ -0,0 +1,89 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Signal import Signal, SignalEmitter
+
+##  Raised by a mesh reader when reading was cancelled through its MeshReadContext.
+class MeshReadCancelledError(Exception):
+    pass
+
+##  Progress reporting and cancellation for reading a mesh.
+#
+#   A context is passed to MeshReader::read(). Readers set the total amount of work, usually
+#   the size of the file in bytes, and report the amount of work done after every chunk they
+#   process. Between chunks they call checkCancelled(), which raises MeshReadCancelledError when
+#   cancel() has been called, possibly from another thread. Everything the reader allocated is
+#   released when the exception unwinds.
+#
+#   A context can have a parent context, in which case cancelling the parent also cancels it.
+class MeshReadContext(SignalEmitter):
+    ##  Initialize.
+    #
+    #   \param parent \type{MeshReadContext} Optional context that can cancel this context.
+    def __init__(self, parent = None):
+        super().__init__()
+        self._parent = parent
+        self._total = 0
+        self._processed = 0
+        self._progress = -1
+        self._cancelled = False
+
+    ##  Set the total amount of work, for example the size of the file in bytes.
+    def setTotal(self, total):
+        self._total = total
+        self._updateProgress()
+
+    ##  Get the total amount of work.
+    def getTotal(self):
+        return self._total
+
+    ##  Set the amount of work done so far, for example the amount of bytes read.
+    def setProcessed(self, processed):
+        self._processed = processed
+        self._updateProgress()
+
+    ##  Get the amount of work done so far.
+    def getProcessed(self):
+        return self._processed
+
+    ##  Get the progress.
+    #
+    #   \return \type{int} The progress from 0 to 100, or -1 if the total amount of work is not known.
+    def getProgress(self):
+        return self._progress
+
+    ##  Emitted when the progress changes.
+    #
+    #   \param context \type{MeshReadContext} The context that changed.
+    #   \param progress \type{int} The progress from 0 to 100.
+    progressChanged = Signal()
+
+    ##  Request cancellation of the read.
+    #
+    #   The reader stops the next time it calls checkCancelled().
+    def cancel(self):
+        self._cancelled = True
+
+    ##  Check whether cancellation was requested, on this context or its parent.
+    #
+    #   \return \type{bool}
+    def isCancelled(self):
+        return self._cancelled or (self._parent is not None and self._parent.isCancelled())
+
+    ##  Stop reading if cancellation was requested.
+    #
+    #   \exception MeshReadCancelledError If the read was cancelled.
+    def checkCancelled(self):
+        if self.isCancelled():
+            raise MeshReadCancelledError()
+
+    ##  private:
+
+    def _updateProgress(self):
+        if self._total <= 0:
+            return
+
+        progress = min(int(100 * self._processed / self._total), 100)
+        if progress != self._progress:
+            self._progress = progress
+            self.progressChanged.emit(self, progress)
@@ -8,5 +8,22 @@ class MeshReader(PluginObject):
         super().__init__()
 
     # Tries to read the file from specified file_name, returns None if it's uncessfull or unable to read.
-    def read(self, file_name, storage_device):
+    #
+    #   \param file_name \type{string} The name of the file to read.
+    #   \param storage_device \type{StorageDevice} The device to read the file from.
+    #   \param context \type{MeshReadContext} Optional context. Readers that read in chunks should report
+    #                  their progress to it and call its checkCancelled() method between chunks.
+    #   \return \type{MeshData}
+    def read(self, file_name, storage_device, context = None):
         raise NotImplementedError("Reader plugin was not correctly implemented, no read was specified")
+
+    ##  Check whether the contents of a file look like something this reader can read.
+    #
+    #   This is an optional hook used by MeshFileHandler to choose between multiple readers that
+    #   handle the same extension, or readers that did not specify an extension at all. Readers
+    #   should only look at the header, not parse the file.
+    #
+    #   \param header \type{bytes} The first bytes of the file. This can be shorter than requested for small files.
+    #   \return \type{bool} True if this reader can read the file. The default implementation accepts any file.
+    def canReadHeader(self, header):
+        return True
@@ -6,6 +6,7 @@ from UM.Application import Application
 from UM.Message import Message
 from UM.Math.AxisAlignedBox import AxisAlignedBox
 from UM.Math.Matrix import Matrix
+from UM.Mesh.MeshReadContext import MeshReadContext
 
 import os.path
 
@@ -14,24 +15,57 @@ i18n_catalog = i18nCatalog("uranium")
 
 ##  A Job subclass that performs mesh loading.
 #
-#   The result of this Job is a MeshData object.
+#   The result of this Job is a MeshData object, or None if the file could not be read or
+#   loading was cancelled.
 class ReadMeshJob(Job):
     def __init__(self, filename):
         super().__init__()
         self._filename = filename
         self._handler = Application.getInstance().getMeshFileHandler()
         self._device = Application.getInstance().getStorageDevice("LocalFileStorage")
+        self._loading_message = None
+
+        self._context = MeshReadContext()
+        self._context.progressChanged.connect(self._onProgressChanged)
 
     def getFileName(self):
         return self._filename
 
+    ##  Cancel the job.
+    #
+    #   In contrast to Job::cancel(), this also stops the reader when it is already reading the file.
+    def cancel(self):
+        super().cancel()
+        self._context.cancel()
+
     def run(self):
-        loading_message = Message(i18n_catalog.i18nc("Loading mesh message, {0} is file name", "Loading {0}").format(self._filename), lifetime = 0, dismissable = False)
-        loading_message.setProgress(-1)
-        loading_message.show()
+        self._loading_message = Message(i18n_catalog.i18nc("Loading mesh message, {0} is file name", "Loading {0}").format(self._filename), lifetime = 0, dismissable = False)
+        self._loading_message.setProgress(-1)
+        self._loading_message.addAction("cancel", i18n_catalog.i18nc("Loading mesh message action", "Cancel"), "cancel", i18n_catalog.i18n("Stop loading this file"))
+        self._loading_message.actionTriggered.connect(self._onMessageActionTriggered)
+        self._loading_message.show()
+
+        mesh = self._handler.read(self._filename, self._device, context = self._context)
+        if mesh is not None:
+            mesh = ReadMeshJob.scaleToMaximumBounds(mesh)
+
+        self.setResult(mesh)
+
+        self._loading_message.hide()
+        if self._context.isCancelled():
+            return
 
-        mesh = self._handler.read(self._filename, self._device)
+        result_message = Message(i18n_catalog.i18nc("Finished loading mesh message, {0} is file name", "Loaded {0}").format(self._filename))
+        result_message.show()
 
+    ##  Scale a mesh down so it fits the maximum bounds of the scene, if the scene has maximum bounds.
+    #
+    #   The mesh is scaled in place, since it was just read and is not used anywhere else yet.
+    #
+    #   \param mesh \type{MeshData} The mesh to scale.
+    #   \return \type{MeshData} The mesh that was passed in.
+    @staticmethod
+    def scaleToMaximumBounds(mesh):
         # Scale down to maximum bounds size if that is available
         if hasattr(Application.getInstance().getController().getScene(), "_maximum_bounds"):
             max_bounds = Application.getInstance().getController().getScene()._maximum_bounds
@@ -50,10 +84,15 @@ class ReadMeshJob(Job):
 
                 matrix = Matrix()
                 matrix.setByScaleFactor(scale_factor)
-                mesh = mesh.getTransformed(matrix)
+                mesh.transform(matrix)
 
-        self.setResult(mesh)
+        return mesh
 
-        loading_message.hide()
-        result_message = Message(i18n_catalog.i18nc("Finished loading mesh message, {0} is file name", "Loaded {0}").format(self._filename))
-        result_message.show()
+    def _onProgressChanged(self, context, progress):
+        if self._loading_message:
+            self._loading_message.setProgress(progress)
+        self.progress.emit(self, progress)
+
+    def _onMessageActionTriggered(self, message, action):
+        if message is self._loading_message and action == "cancel":
+            self.cancel()
@@ -0,0 +1,81 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Job import Job
+from UM.Application import Application
+from UM.Message import Message
+from UM.Signal import Signal
+from UM.Mesh.ReadMeshJob import ReadMeshJob
+from UM.Mesh.MeshReadContext import MeshReadContext
+
+from UM.i18n import i18nCatalog
+i18n_catalog = i18nCatalog("uranium")
+
+##  A Job subclass that loads a set of meshes in parallel.
+#
+#   The files are read with MeshFileHandler::readMany(), so they are parsed by a pool of worker
+#   processes. Every file reports completion through the fileFinished signal as soon as it is done.
+#
+#   The result of this Job is a list with a MeshData object (or None) for every file.
+class ReadMeshesJob(Job):
+    def __init__(self, file_names):
+        super().__init__()
+        self._file_names = list(file_names)
+        self._handler = Application.getInstance().getMeshFileHandler()
+        self._device = Application.getInstance().getStorageDevice("LocalFileStorage")
+        self._loading_message = None
+
+        self._context = MeshReadContext()
+        self._context.progressChanged.connect(self._onProgressChanged)
+
+    def getFileNames(self):
+        return self._file_names
+
+    ##  Cancel the job.
+    #
+    #   This also stops reading when the job is already running. Files that were read before
+    #   cancelling have already been reported through fileFinished.
+    def cancel(self):
+        super().cancel()
+        self._context.cancel()
+
+    ##  Emitted when a single file has been read.
+    #
+    #   \param job \type{ReadMeshesJob} The job reading the file.
+    #   \param file_name \type{string} The name of the file.
+    #   \param mesh \type{MeshData} The mesh read from the file, or None if the file could not be read.
+    fileFinished = Signal()
+
+    def run(self):
+        self._loading_message = Message(i18n_catalog.i18nc("Loading meshes message, {0} is the amount of files", "Loading {0} files").format(len(self._file_names)), lifetime = 0, dismissable = False)
+        self._loading_message.setProgress(0)
+        self._loading_message.addAction("cancel", i18n_catalog.i18nc("Loading mesh message action", "Cancel"), "cancel", i18n_catalog.i18n("Stop loading the remaining files"))
+        self._loading_message.actionTriggered.connect(self._onMessageActionTriggered)
+        self._loading_message.show()
+
+        meshes = {}
+        def onFileFinished(file_name, mesh):
+            if mesh is not None:
+                mesh = ReadMeshJob.scaleToMaximumBounds(mesh)
+            meshes[file_name] = mesh
+            self.fileFinished.emit(self, file_name, mesh)
+
+        self._handler.readMany(self._file_names, self._device, onFileFinished, context = self._context)
+        results = [meshes.get(file_name) for file_name in self._file_names]
+        self.setResult(results)
+
+        self._loading_message.hide()
+        if self._context.isCancelled():
+            return
+
+        result_message = Message(i18n_catalog.i18nc("Finished loading meshes message, {0} is the amount of files", "Loaded {0} files").format(len([mesh for mesh in results if mesh is not None])))
+        result_message.show()
+
+    def _onProgressChanged(self, context, progress):
+        if self._loading_message:
+            self._loading_message.setProgress(progress)
+        self.progress.emit(self, progress)
+
+    def _onMessageActionTriggered(self, message, action):
+        if message is self._loading_message and action == "cancel":
+            self.cancel()
@@ -0,0 +1,38 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Job import Job
+from UM.Logger import Logger
+
+##  A Job subclass that finds and fixes problems in a mesh.
+#
+#   The mesh is checked with MeshData::analyze() or repaired in place with MeshData::repair().
+#   The result of the job is the dictionary with the amount of problems of every kind that
+#   were found.
+class RepairMeshJob(Job):
+    ##  Initialize.
+    #
+    #   \param mesh \type{MeshData} The mesh to check.
+    #   \param kwargs Keyword arguments.
+    #                 Possible values are:
+    #                 - repair: True to fix the problems that were found, False to only report them. Defaults to True.
+    def __init__(self, mesh, **kwargs):
+        super().__init__()
+        self._mesh = mesh
+        self._repair = kwargs.get("repair", True)
+
+    ##  Get the mesh that is checked.
+    def getMesh(self):
+        return self._mesh
+
+    def run(self):
+        if self._repair:
+            report = self._mesh.repair()
+        else:
+            report = self._mesh.analyze()
+
+        problems = ", ".join("%s: %d" % (key, count) for key, count in sorted(report.items()) if count)
+        if problems:
+            Logger.log("i", "Found problems in mesh %s: %s", self._mesh.getFileName(), problems)
+
+        self.setResult(report)
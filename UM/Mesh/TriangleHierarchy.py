@@ -0,0 +1,208 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+import math
+import numpy
+
+##  A bounding volume hierarchy over the faces of a mesh, used to intersect rays with the mesh.
+#
+#   The faces are sorted along a Morton curve through the centers of their bounding boxes and
+#   split into leaves of at most about _leaf_size faces. The tree above the leaves is a complete
+#   binary tree, so it is stored as one array of bounding boxes per level and the children of box
+#   i are the boxes 2i and 2i + 1 of the next level. Queries visit all boxes of a level at once
+#   and test the faces of the leaves that were hit with one vectorized Möller–Trumbore test.
+#
+#   The hierarchy is a snapshot of the data of the mesh, it does not change when the mesh changes.
+#   Creating it for large meshes takes a while, see TriangleHierarchyJob to create it in the
+#   background.
+class TriangleHierarchy:
+    ##  Create the hierarchy for the faces of a mesh.
+    #
+    #   Meshes without indices are assumed to have three consecutive vertices per face.
+    #
+    #   \param mesh \type{MeshData} The mesh to create the hierarchy for.
+    def __init__(self, mesh):
+        self._corners = numpy.zeros((0, 3, 3), dtype = numpy.float32)
+        self._faces = numpy.zeros(0, dtype = numpy.int32)
+        self._leaf_starts = numpy.zeros(1, dtype = numpy.intp)
+        self._levels = []
+
+        corners = _getCorners(mesh)
+        if corners is None or len(corners) == 0:
+            return
+
+        face_count = len(corners)
+        minimum = numpy.fmin(numpy.fmin(corners[:, 0], corners[:, 1]), corners[:, 2])
+        maximum = numpy.fmax(numpy.fmax(corners[:, 0], corners[:, 1]), corners[:, 2])
+
+        order = numpy.argsort(_mortonCodes((minimum + maximum) / 2), kind = "stable")
+        self._faces = order.astype(numpy.int32)
+        self._corners = numpy.ascontiguousarray(corners[order], dtype = numpy.float32)
+        minimum = minimum[order]
+        maximum = maximum[order]
+
+        # Every leaf gets at least one face, since the amount of leaves is less than face_count.
+        depth = max(0, math.ceil(math.log2(face_count / _leaf_size)))
+        leaf_count = 1 << depth
+        self._leaf_starts = (numpy.arange(leaf_count + 1, dtype = numpy.intp) * face_count) // leaf_count
+
+        # fmin and fmax ignore NaNs, so faces with invalid vertices do not hide the rest of their leaf.
+        starts = self._leaf_starts[:-1]
+        level_minimum = numpy.fmin.reduceat(minimum, starts, axis = 0)
+        level_maximum = numpy.fmax.reduceat(maximum, starts, axis = 0)
+        levels = [(level_minimum, level_maximum)]
+        while len(level_minimum) > 1:
+            level_minimum = numpy.fmin(level_minimum[0::2], level_minimum[1::2])
+            level_maximum = numpy.fmax(level_maximum[0::2], level_maximum[1::2])
+            levels.append((level_minimum, level_maximum))
+
+        # Store the levels from the root to the leaves.
+        self._levels = levels[::-1]
+
+    ##  Get the amount of faces in the hierarchy.
+    #
+    #   \return \type{int}
+    def getFaceCount(self):
+        return len(self._faces)
+
+    ##  Get the amount of levels of boxes, including the level of the leaves.
+    #
+    #   \return \type{int}
+    def getDepth(self):
+        return len(self._levels)
+
+    ##  Get the amount of memory used by the hierarchy.
+    #
+    #   \return \type{int} The amount of bytes used.
+    def getMemoryUsage(self):
+        usage = self._corners.nbytes + self._faces.nbytes + self._leaf_starts.nbytes
+        for minimum, maximum in self._levels:
+            usage += minimum.nbytes + maximum.nbytes
+        return usage
+
+    ##  Find the closest face of the mesh that is hit by a ray.
+    #
+    #   Faces are hit from both sides. The ray should be in the coordinates of the mesh.
+    #
+    #   \param ray \type{Ray} The ray to intersect with.
+    #   \return \type{tuple} A (face index, distance) tuple, where the index is the index of the face
+    #                        in the mesh and the distance is in multiples of the length of the direction
+    #                        of the ray. None if no face is hit.
+    def intersectRay(self, ray):
+        if not self._levels:
+            return None
+
+        origin = numpy.array(ray.origin.getData(), dtype = numpy.float64)
+        direction = numpy.array(ray.direction.getData(), dtype = numpy.float64)
+        parallel = direction == 0
+        inverse_direction = 1.0 / numpy.where(parallel, 1, direction)
+
+        boxes = numpy.zeros(1, dtype = numpy.intp)
+        for level, (minimum, maximum) in enumerate(self._levels):
+            if level > 0:
+                boxes = numpy.stack((boxes * 2, boxes * 2 + 1), axis = 1).ravel()
+
+            boxes = boxes[_intersectBoxes(minimum[boxes], maximum[boxes], origin, inverse_direction, parallel)]
+            if len(boxes) == 0:
+                return None
+
+        # Gather the faces of all leaves that were hit.
+        starts = self._leaf_starts[boxes]
+        lengths = self._leaf_starts[boxes + 1] - starts
+        offsets = numpy.cumsum(lengths) - lengths
+        positions = numpy.arange(lengths.sum()) + numpy.repeat(starts - offsets, lengths)
+
+        hit = TriangleHierarchy.intersectTriangles(self._corners[positions], ray)
+        if hit is None:
+            return None
+
+        return (int(self._faces[positions[hit[0]]]), hit[1])
+
+    ##  Find the closest of a set of triangles that is hit by a ray.
+    #
+    #   This is the test used for the leaves of the hierarchy. It can be used directly for meshes
+    #   that do not have a hierarchy yet. Triangles are hit from both sides.
+    #
+    #   \param corners \type{numpy.ndarray} A (triangle_count, 3, 3) array of the corners of the triangles.
+    #   \param ray \type{Ray} The ray to intersect with.
+    #   \return \type{tuple} A (triangle index, distance) tuple, where the index is the index in corners
+    #                        and the distance is in multiples of the length of the direction of the ray.
+    #                        None if no triangle is hit.
+    @staticmethod
+    def intersectTriangles(corners, ray):
+        if len(corners) == 0:
+            return None
+
+        origin = numpy.array(ray.origin.getData(), dtype = numpy.float64)
+        direction = numpy.array(ray.direction.getData(), dtype = numpy.float64)
+
+        first = corners[:, 0].astype(numpy.float64)
+        edge1 = corners[:, 1] - first
+        edge2 = corners[:, 2] - first
+
+        p = numpy.cross(direction, edge2)
+        determinant = numpy.einsum("ij,ij->i", edge1, p)
+        s = origin - first
+        q = numpy.cross(s, edge1)
+
+        # Rays parallel to a triangle and degenerate triangles have a determinant of 0, the resulting
+        # infinities and NaNs fail the comparisons below.
+        with numpy.errstate(divide = "ignore", invalid = "ignore"):
+            inverse_determinant = 1.0 / determinant
+            u = numpy.einsum("ij,ij->i", s, p) * inverse_determinant
+            v = numpy.dot(q, direction) * inverse_determinant
+            distances = numpy.einsum("ij,ij->i", edge2, q) * inverse_determinant
+            hits = (u >= 0) & (v >= 0) & (u + v <= 1) & (distances >= 0)
+
+        if not hits.any():
+            return None
+
+        distances = numpy.where(hits, distances, numpy.inf)
+        index = int(numpy.argmin(distances))
+        return (index, float(distances[index]))
+
+##  private:
+
+# The amount of faces of a leaf is between half this and this amount.
+_leaf_size = 16
+
+##  Get the corners of the faces of a mesh as a (face_count, 3, 3) array, or None if it has no vertices.
+def _getCorners(mesh):
+    vertices = mesh.getVertices()
+    if vertices is None:
+        return None
+
+    if mesh.hasIndices():
+        indices = mesh.getIndices()
+    else:
+        indices = numpy.arange((len(vertices) // 3) * 3).reshape((-1, 3))
+
+    return vertices[indices]
+
+##  Spread the lower 10 bits of integers so there are two zero bits between every two bits.
+def _spreadBits(values):
+    values = (values | (values << 16)) & 0x030000FF
+    values = (values | (values << 8)) & 0x0300F00F
+    values = (values | (values << 4)) & 0x030C30C3
+    values = (values | (values << 2)) & 0x09249249
+    return values
+
+##  Get the 30-bit Morton codes of a (count, 3) array of points.
+def _mortonCodes(points):
+    points = numpy.where(numpy.isfinite(points), points, 0)
+    minimum = points.min(axis = 0)
+    size = numpy.maximum(points.max(axis = 0) - minimum, 1e-30)
+    cells = numpy.clip((points - minimum) / size * 1023, 0, 1023).astype(numpy.uint32)
+    return _spreadBits(cells[:, 0]) | (_spreadBits(cells[:, 1]) << 1) | (_spreadBits(cells[:, 2]) << 2)
+
+##  Get which of a set of boxes are hit by a ray, like BoundingVolumeHierarchy does for a single box.
+#
+#   Axes the ray is parallel to are given by parallel, the ray only hits boxes that contain the origin
+#   along those axes.
+def _intersectBoxes(minimum, maximum, origin, inverse_direction, parallel):
+    near = (minimum - origin) * inverse_direction
+    far = (maximum - origin) * inverse_direction
+    entry = numpy.where(parallel, -numpy.inf, numpy.minimum(near, far)).max(axis = 1)
+    exit = numpy.where(parallel, numpy.inf, numpy.maximum(near, far)).min(axis = 1)
+    inside = ((origin >= minimum) & (origin <= maximum)) | ~parallel
+    return inside.all(axis = 1) & (entry <= exit) & (exit >= 0)
@@ -0,0 +1,28 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Job import Job
+from UM.Mesh.TriangleHierarchy import TriangleHierarchy
+
+##  A Job subclass that creates the triangle hierarchy of a mesh.
+#
+#   The hierarchy is stored in the mesh with MeshData::setTriangleHierarchy() and is also the result
+#   of this job. When the mesh changes while the hierarchy is created, it is dropped and the result
+#   is None.
+class TriangleHierarchyJob(Job):
+    ##  Initialize.
+    #
+    #   \param mesh \type{MeshData} The mesh to create the hierarchy for.
+    def __init__(self, mesh):
+        super().__init__()
+        self._mesh = mesh
+
+    ##  Get the mesh the hierarchy is created for.
+    def getMesh(self):
+        return self._mesh
+
+    def run(self):
+        generation = self._mesh.getGeneration()
+        hierarchy = TriangleHierarchy(self._mesh)
+        if self._mesh.setTriangleHierarchy(hierarchy, generation):
+            self.setResult(hierarchy)
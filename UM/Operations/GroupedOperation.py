@@ -3,6 +3,12 @@
 
 from . import Operation
 
+from UM.Application import Application
+
+##  An operation that consists of several other operations.
+#
+#   The operations are undone and redone within a transaction of the scene of the application, so
+#   the scene is only updated once for all of them. See Scene::beginTransaction().
 class GroupedOperation(Operation.Operation):
     def __init__(self):
         super().__init__()
@@ -15,9 +21,39 @@ class GroupedOperation(Operation.Operation):
         del self._children[index]
 
     def undo(self):
-        for op in self._children:
-            op.undo()
+        scene = self._getScene()
+        if scene:
+            scene.beginTransaction()
+        try:
+            for op in self._children:
+                op.undo()
+        finally:
+            if scene:
+                scene.endTransaction()
 
     def redo(self):
-        for op in self._children:
-            op.redo()
+        scene = self._getScene()
+        if scene:
+            scene.beginTransaction()
+        try:
+            for op in self._children:
+                op.redo()
+        finally:
+            if scene:
+                scene.endTransaction()
+
+    ##  private:
+
+    #   Get the scene of the application, or None when there is no application with a scene,
+    #   in which case the operations are applied without a transaction.
+    def _getScene(self):
+        # Application::getInstance() would create an application when there is none.
+        application = Application._instance
+        if application is None:
+            return None
+
+        controller = application.getController()
+        if controller is None:
+            return None
+
+        return controller.getScene()
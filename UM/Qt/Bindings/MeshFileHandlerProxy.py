@@ -11,6 +11,7 @@ from UM.Scene.SceneNode import SceneNode
 from UM.Scene.PointCloudNode import PointCloudNode
 from UM.Mesh.MeshData import MeshType
 from UM.Mesh.ReadMeshJob import ReadMeshJob
+from UM.Mesh.ReadMeshesJob import ReadMeshesJob
 from UM.Mesh.WriteMeshJob import WriteMeshJob
 from UM.Operations.AddSceneNodeOperation import AddSceneNodeOperation
 from UM.Message import Message
@@ -61,6 +62,18 @@ class MeshFileHandlerProxy(QObject):
         job.finished.connect(self._readMeshFinished)
         job.start()
 
+    ##  Read a set of local files in parallel.
+    #
+    #   Every mesh is added to the scene as soon as its file has been read.
+    @pyqtSlot("QVariantList")
+    def readLocalFiles(self, files):
+        file_names = [file.toLocalFile() for file in files if file.isValid()]
+        if not file_names:
+            return
+
+        job = ReadMeshesJob(file_names)
+        job.fileFinished.connect(self._readMeshesFileFinished)
+        job.start()
 
     @pyqtSlot(QUrl)
     def writeLocalFile(self, file):
@@ -77,7 +90,12 @@ class MeshFileHandlerProxy(QObject):
             break
 
     def _readMeshFinished(self, job):
-        mesh = job.getResult()
+        self._addMesh(job.getResult(), job.getFileName())
+
+    def _readMeshesFileFinished(self, job, file_name, mesh):
+        self._addMesh(mesh, file_name)
+
+    def _addMesh(self, mesh, file_name):
         if mesh != None:
             if mesh.getType() is MeshType.pointcloud:  #Depending on the type we need a different node (as pointclouds are rendered differently)
                 node = PointCloudNode()
@@ -86,7 +104,7 @@ class MeshFileHandlerProxy(QObject):
 
             node.setSelectable(True)
             node.setMeshData(mesh)
-            node.setName(os.path.basename(job.getFileName()))
+            node.setName(os.path.basename(file_name))
 
             op = AddSceneNodeOperation(node, self._scene.getRoot())
             op.push()
@@ -1,13 +1,39 @@
 # Copyright (c) 2015 Ultimaker B.V.
 # Uranium is released under the terms of the AGPLv3 or higher.
 
-from PyQt5.QtCore import QObject, QCoreApplication, pyqtSlot
+from PyQt5.QtCore import QObject, QCoreApplication, pyqtSlot, pyqtProperty, pyqtSignal
 
 class SceneProxy(QObject):
     def __init__(self, parent = None):
         super().__init__(parent)
         self._scene = QCoreApplication.instance().getController().getScene()
+        self._scene.sceneChanged.connect(self._onSceneChanged)
 
     @pyqtSlot(str)
     def setActiveCamera(self, camera):
         self._scene.setActiveCamera(camera)
+
+    memoryUsageChanged = pyqtSignal()
+
+    ##  The memory used by the meshes in the scene, see Scene::getMemoryUsage().
+    #
+    #   Every kind of data maps to an object with "used" and "reserved" amounts of bytes. The
+    #   "total" entry contains the sum of all kinds.
+    @pyqtProperty("QVariantMap", notify = memoryUsageChanged)
+    def memoryUsage(self):
+        usage = self._scene.getMemoryUsage()
+        result = { key: { "used": used, "reserved": reserved } for key, (used, reserved) in usage.items() }
+        result["total"] = { "used": sum(used for used, reserved in usage.values()), "reserved": sum(reserved for used, reserved in usage.values()) }
+        return result
+
+    @pyqtSlot()
+    def trimToSize(self):
+        self._scene.trimToSize()
+        self.memoryUsageChanged.emit()
+
+    @pyqtSlot()
+    def logMemoryUsage(self):
+        self._scene.logMemoryUsage()
+
+    def _onSceneChanged(self, object):
+        self.memoryUsageChanged.emit()
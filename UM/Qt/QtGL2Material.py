@@ -9,6 +9,15 @@ from UM.Math.Vector import Vector
 from UM.Math.Matrix import Matrix
 from UM.Math.Color import Color
 
+##  The OpenGL types of the components of vector attribute types, like "vector3f" or "vector4ub".
+_vector_component_types = {
+    "f": "GL_FLOAT",
+    "b": "GL_BYTE",
+    "s": "GL_SHORT",
+    "ub": "GL_UNSIGNED_BYTE",
+    "us": "GL_UNSIGNED_SHORT"
+}
+
 class QtGL2Material(Material):
     def __init__(self, renderer):
         super().__init__()
@@ -95,16 +104,13 @@ class QtGL2Material(Material):
         if attribute == -1:
             return
 
-        if type is "int":
+        if type == "int":
             self._shader_program.setAttributeBuffer(attribute, self._gl.GL_INT, offset, 1, stride)
-        elif type is "float":
+        elif type == "float":
             self._shader_program.setAttributeBuffer(attribute, self._gl.GL_FLOAT, offset, 1, stride)
-        elif type is "vector2f":
-            self._shader_program.setAttributeBuffer(attribute, self._gl.GL_FLOAT, offset, 2, stride)
-        elif type is "vector3f":
-            self._shader_program.setAttributeBuffer(attribute, self._gl.GL_FLOAT, offset, 3, stride)
-        elif type is "vector4f":
-            self._shader_program.setAttributeBuffer(attribute, self._gl.GL_FLOAT, offset, 4, stride)
+        elif type.startswith("vector") and type[7:] in _vector_component_types:
+            # Integer components are normalized by Qt, so they arrive in the shader as floats from -1 or 0 to 1.
+            self._shader_program.setAttributeBuffer(attribute, getattr(self._gl, _vector_component_types[type[7:]]), offset, int(type[6]), stride)
 
         self._shader_program.enableAttributeArray(attribute)
 
@@ -13,6 +13,9 @@ from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
 from UM.Scene.Selection import Selection
 from UM.Scene.PointCloudNode import PointCloudNode
 from UM.Math.Color import Color
+from UM.Mesh.MeshData import MeshType
+from UM.Mesh.LevelOfDetailJob import LevelOfDetailJob
+from UM.Preferences import Preferences
 
 from . import QtGL2Material
 
@@ -23,6 +26,20 @@ from ctypes import c_void_p
 vertexBufferProperty = "__qtgl2_vertex_buffer"
 indexBufferProperty = "__qtgl2_index_buffer"
 
+##  The shader attributes used for the vertex attributes of a mesh.
+_attribute_names = {
+    "vertices": "a_vertex",
+    "normals": "a_normal",
+    "colors": "a_color",
+    "uvs": "a_uvs"
+}
+
+##  Meshes with at least this amount of faces get levels of detail.
+_level_of_detail_face_count = 100000
+
+##  The maximum error of a level of detail that is rendered, in pixels.
+_level_of_detail_pixel_error = 1.0
+
 ##  A Renderer implementation using OpenGL2 to render.
 class QtGL2Renderer(Renderer):
     def __init__(self):
@@ -52,6 +69,11 @@ class QtGL2Renderer(Renderer):
 
         self._camera = None
 
+        Preferences.getInstance().addPreference("view/level_of_detail", True)
+        self._level_of_detail_enabled = True
+        self._level_of_detail_jobs = {}
+        self._view_matrix = None
+
     def getPixelMultiplier(self):
         # Standard assumption for screen pixel density is 96 DPI. We use that as baseline to get
         # a multiplication factor we can use for screens > 96 DPI.
@@ -220,6 +242,9 @@ class QtGL2Renderer(Renderer):
             self._scene.releaseLock()
             return
 
+        self._level_of_detail_enabled = Preferences.getInstance().getValue("view/level_of_detail") in (True, "True")
+        self._view_matrix = self._camera.getWorldTransformation().getInverse().getData()
+
         # Render the selection image
         selectable_nodes = []
         for node in DepthFirstIterator(self._scene.getRoot()):
@@ -355,7 +380,11 @@ class QtGL2Renderer(Renderer):
 
     def _renderItem(self, item):
         node = item["node"]
-        mesh = item.get("mesh", node.getMeshData())
+        mesh = item.get("mesh")
+        if mesh is None:
+            mesh = node.getMeshData()
+            if "range" not in item:
+                mesh = self._getLevelOfDetail(node, mesh)
         transform = node.getWorldTransformation()
         material = item["material"]
         mode = item["mode"]
@@ -370,7 +399,12 @@ class QtGL2Renderer(Renderer):
         material.setUniformValue("u_projectionMatrix", self._camera.getProjectionMatrix(), cache = False)
         material.setUniformValue("u_viewMatrix", self._camera.getWorldTransformation().getInverse(), cache = False)
         material.setUniformValue("u_viewPosition", self._camera.getWorldPosition(), cache = False)
-        material.setUniformValue("u_modelMatrix", transform, cache = False)
+        quantization = mesh.getQuantizationMatrix()
+        if quantization is not None:
+            # Quantized positions are converted to model coordinates by the model matrix.
+            material.setUniformValue("u_modelMatrix", copy.deepcopy(transform).multiply(quantization), cache = False)
+        else:
+            material.setUniformValue("u_modelMatrix", transform, cache = False)
         material.setUniformValue("u_lightPosition", self._camera.getWorldPosition() + Vector(0, 50, 0), cache = False)
 
         if mesh.hasNormals():
@@ -393,35 +427,25 @@ class QtGL2Renderer(Renderer):
                 index_buffer = self._createIndexBuffer(mesh)
             index_buffer.bind()
 
-        material.enableAttribute("a_vertex", "vector3f", 0)
-        offset = mesh.getVertexCount() * 3 * 4
-
-        if mesh.hasNormals():
-            material.enableAttribute("a_normal", "vector3f", offset)
-            offset += mesh.getVertexCount() * 3 * 4
-
-        if mesh.hasColors():
-            material.enableAttribute("a_color", "vector4f", offset)
-            offset += mesh.getVertexCount() * 4 * 4
-
-        if mesh.hasUVCoordinates():
-            material.enableAttribute("a_uvs", "vector2f", offset)
-            offset += mesh.getVertexCount() * 2 * 4
+        stride, attributes = mesh.getInterleavedLayout()
+        for name, attribute_type, offset in attributes:
+            material.enableAttribute(_attribute_names[name], attribute_type, offset, stride)
 
         if wireframe and hasattr(self._gl, "glPolygonMode"):
             self._gl.glPolygonMode(self._gl.GL_FRONT_AND_BACK, self._gl.GL_LINE)
 
         if mesh.hasIndices():
+            index_type = self._gl.GL_UNSIGNED_SHORT if mesh.getIndexSize() == 2 else self._gl.GL_UNSIGNED_INT
             if range is None:
                 if mode == self._gl.GL_TRIANGLES:
-                    self._gl.glDrawElements(mode, mesh.getFaceCount() * 3 , self._gl.GL_UNSIGNED_INT, None)
+                    self._gl.glDrawElements(mode, mesh.getFaceCount() * 3 , index_type, None)
                 else:
-                    self._gl.glDrawElements(mode, mesh.getFaceCount(), self._gl.GL_UNSIGNED_INT, None)
+                    self._gl.glDrawElements(mode, mesh.getFaceCount(), index_type, None)
             else:
                 if mode == self._gl.GL_TRIANGLES:
-                    self._gl.glDrawRangeElements(mode, range[0], range[1], range[1] - range[0], self._gl.GL_UNSIGNED_INT, None)
+                    self._gl.glDrawRangeElements(mode, range[0], range[1], range[1] - range[0], index_type, None)
                 else:
-                    self._gl.glDrawRangeElements(mode, range[0], range[1], range[1] - range[0], self._gl.GL_UNSIGNED_INT, None)
+                    self._gl.glDrawRangeElements(mode, range[0], range[1], range[1] - range[0], index_type, None)
         else:
             self._gl.glDrawArrays(mode, 0, mesh.getVertexCount())
 
@@ -442,41 +466,69 @@ class QtGL2Renderer(Renderer):
         if item.get("force_single_sided") and not culling_enabled:
             self._gl.glDisable(self._gl.GL_CULL_FACE)
 
+    ##  Get the mesh to render for a node.
+    #
+    #   When the node is small on screen, this is the least detailed level of detail of its mesh whose
+    #   error is at most a pixel. Levels of detail are created in the background for large meshes.
+    def _getLevelOfDetail(self, node, mesh):
+        if not self._level_of_detail_enabled or mesh.getType() is not MeshType.faces or mesh.getFaceCount() < _level_of_detail_face_count:
+            return mesh
+
+        levels = mesh.getLevelsOfDetail()
+        if levels is None:
+            if id(mesh) not in self._level_of_detail_jobs:
+                job = LevelOfDetailJob(mesh)
+                job.finished.connect(self._onLevelOfDetailJobFinished)
+                self._level_of_detail_jobs[id(mesh)] = job
+                job.start()
+            return mesh
+
+        pixel_size = self._getPixelSize(node, mesh)
+        if pixel_size is None:
+            return mesh
+
+        result = mesh
+        for error, level in levels:
+            if error > pixel_size * _level_of_detail_pixel_error:
+                break
+            result = level
+        return result
+
+    ##  Get the size of a pixel at the part of a node that is closest to the camera, in the units of its mesh.
+    #
+    #   \return The size of a pixel, or None if the node is too close to the camera to tell.
+    def _getPixelSize(self, node, mesh):
+        projection = self._camera.getProjectionMatrix().getData()
+        transformation = node.getWorldTransformation().getData()
+
+        extents = mesh.getExtents(node.getWorldTransformation())
+        center = numpy.dot(self._view_matrix[0:3, 0:3], extents.center.getData()) + self._view_matrix[0:3, 3]
+        # Projection matrices are stored transposed, so the last column gives the w coordinate.
+        w = numpy.dot(projection[0:3, 3], center) + projection[3, 3]
+        if projection[3, 3] == 0:
+            # Perspective projection, so the closest part of the node is what matters.
+            w -= (extents.maximum - extents.minimum).length() / 2
+        if w <= 0 or self._viewport_height <= 0:
+            return None
+
+        pixels_per_unit = projection[1, 1] * self._viewport_height / 2 / w
+        scale = numpy.linalg.norm(transformation[0:3, 0:3], axis = 0).max()
+        if pixels_per_unit <= 0 or scale <= 0:
+            return None
+
+        return 1.0 / (pixels_per_unit * scale)
+
+    def _onLevelOfDetailJobFinished(self, job):
+        self._level_of_detail_jobs.pop(id(job.getMesh()), None)
+
     def _createVertexBuffer(self, mesh):
         buffer = QOpenGLBuffer(QOpenGLBuffer.VertexBuffer)
         buffer.create()
         buffer.bind()
 
-        buffer_size = mesh.getVertexCount() * 3 * 4 # Vertex count * number of components * sizeof(float32)
-        if mesh.hasNormals():
-            buffer_size += mesh.getVertexCount() * 3 * 4 # Vertex count * number of components * sizeof(float32)
-        if mesh.hasColors():
-            buffer_size += mesh.getVertexCount() * 4 * 4 # Vertex count * number of components * sizeof(float32)
-        if mesh.hasUVCoordinates():
-            buffer_size += mesh.getVertexCount() * 2 * 4 # Vertex count * number of components * sizeof(float32)
-
-        buffer.allocate(buffer_size)
-
-        offset = 0
-        vertices = mesh.getVerticesAsByteArray()
-        if vertices is not None:
-            buffer.write(0, vertices, len(vertices))
-            offset += len(vertices)
-
-        if mesh.hasNormals():
-            normals = mesh.getNormalsAsByteArray()
-            buffer.write(offset, normals, len(normals))
-            offset += len(normals)
-
-        if mesh.hasColors():
-            colors = mesh.getColorsAsByteArray()
-            buffer.write(offset, colors, len(colors))
-            offset += len(colors)
-
-        if mesh.hasUVCoordinates():
-            uvs = mesh.getUVCoordinatesAsByteArray()
-            buffer.write(offset, uvs, len(uvs))
-            offset += len(uvs)
+        # A single buffer with all attributes of a vertex next to each other, see MeshData::getInterleavedLayout().
+        data = mesh.getInterleavedVertexData()
+        buffer.allocate(data, len(data))
 
         buffer.release()
 
@@ -23,6 +23,7 @@ class Resources:
     ThemesLocation = 8
     FirmwareLocation = 9
     QmlFilesLocation = 10
+    CacheLocation = 11
 
     ApplicationIdentifier = "UM"
 
@@ -96,6 +97,8 @@ class Resources:
             path = os.path.join(cls.__data_storage_path, "settings")
         elif type == cls.ResourcesLocation:
             path = cls.__data_storage_path
+        elif type == cls.CacheLocation:
+            path = cls.__cache_storage_path
         else:
             raise UnsupportedStorageLocationError("No known location to store type {0}".format(type))
 
@@ -176,12 +179,24 @@ class Resources:
                 xdg_data_home = os.path.expanduser("~/.local/share")
 
             cls.__data_storage_path = os.path.join(xdg_data_home, cls.ApplicationIdentifier)
+
+            xdg_cache_home = ""
+            try:
+                xdg_cache_home = os.environ["XDG_CACHE_HOME"]
+            except KeyError:
+                xdg_cache_home = os.path.expanduser("~/.cache")
+
+            cls.__cache_storage_path = os.path.join(xdg_cache_home, cls.ApplicationIdentifier)
         else:
             cls.__config_storage_path = cls.__relativeToAppBase("")
 
         if not cls.__data_storage_path:
             cls.__data_storage_path = cls.__config_storage_path
 
+        if not cls.__cache_storage_path:
+            cls.__cache_storage_path = os.path.join(cls.__data_storage_path, "cache")
+
     __config_storage_path = None
     __data_storage_path = None
+    __cache_storage_path = None
     __paths = []
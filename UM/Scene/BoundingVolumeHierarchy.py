@@ -0,0 +1,472 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Math.Matrix import Matrix
+
+import numpy
+import numpy.linalg
+
+##  Dynamic bounding volume hierarchy over the nodes of a scene.
+#
+#   Every node with mesh data is a leaf of a balanced tree of axis aligned boxes, using the world
+#   bounding box of its own mesh, without its children. Queries only visit the branches of the
+#   tree whose box is hit, so they take logarithmic time in the amount of nodes instead of testing
+#   every node.
+#
+#   The hierarchy follows the changes of the scene through its TransformStore. Before every query,
+#   the nodes that were added, removed, moved or got other mesh data since the previous query are
+#   updated incrementally: a leaf is only moved to another place in the tree when its new box no
+#   longer fits in the slightly enlarged box it was inserted with.
+#
+#   Use Scene::getBoundingVolumeHierarchy() to get the hierarchy of a scene.
+class BoundingVolumeHierarchy:
+    ##  Create a hierarchy of the nodes in a transform store.
+    #
+    #   \param transform_store \type{TransformStore} The store of the nodes.
+    def __init__(self, transform_store):
+        self._transform_store = transform_store
+        self._version = -1
+
+        # The tree, stored per index of the tree. Boxes are (min x, min y, min z, max x, max y, max z) tuples.
+        self._boxes = []
+        self._parents = []
+        self._children = [] # (first, second) tuples, None for leaves.
+        self._heights = []
+        self._free_indices = []
+        self._root = -1
+
+        self._leaves = {} # Transform store index to tree index.
+        self._leaf_nodes = {} # Tree index to scene node.
+        self._leaf_boxes = {} # Tree index to the exact box of the leaf.
+
+    ##  Get the nodes whose box is hit by a ray.
+    #
+    #   \param ray \type{Ray} The ray to test.
+    #   \return \type{list} A list of (node, distance) tuples, sorted by the distance along the ray at which the box of the node is entered.
+    #                       The distance is 0 for boxes that contain the origin of the ray.
+    def intersectRay(self, ray):
+        self.update()
+
+        origin = [float(value) for value in ray.origin.getData()]
+        direction = [float(value) for value in ray.direction.getData()]
+
+        result = []
+        stack = [self._root] if self._root != -1 else []
+        while stack:
+            index = stack.pop()
+            children = self._children[index]
+            if children is None:
+                distance = _intersectRay(self._leaf_boxes[index], origin, direction)
+                if distance is not None:
+                    result.append((self._leaf_nodes[index], distance))
+            elif _intersectRay(self._boxes[index], origin, direction) is not None:
+                stack.extend(children)
+
+        result.sort(key = lambda hit: hit[1])
+        return result
+
+    ##  Get the nodes whose box intersects with a box.
+    #
+    #   \param box \type{AxisAlignedBox} The box to test.
+    #   \return \type{list} The nodes whose box intersects or is contained in the box.
+    def intersectBox(self, box):
+        self.update()
+
+        minimum = box.minimum
+        maximum = box.maximum
+        test_box = (float(minimum.x), float(minimum.y), float(minimum.z), float(maximum.x), float(maximum.y), float(maximum.z))
+
+        result = []
+        stack = [self._root] if self._root != -1 else []
+        while stack:
+            index = stack.pop()
+            children = self._children[index]
+            if children is None:
+                if _overlaps(self._leaf_boxes[index], test_box):
+                    result.append(self._leaf_nodes[index])
+            elif _contains(test_box, self._boxes[index]):
+                result.extend(self._getLeafNodes(index))
+            elif _overlaps(self._boxes[index], test_box):
+                stack.extend(children)
+        return result
+
+    ##  Get the nodes whose box is (partially) inside the view frustum of a camera.
+    #
+    #   \param camera \type{Camera} The camera. Its world transformation is the inverse of the view matrix.
+    #   \return \type{list} The nodes whose box is inside or intersects the frustum.
+    def intersectFrustum(self, camera):
+        self.update()
+
+        # Projection matrices are stored transposed, see Matrix::setPerspective(). Points p are inside the
+        # frustum when the (x, y, z, w) coordinates of projection * view * p are all between -w and w.
+        projection = camera.getProjectionMatrix().getData().astype(numpy.float64).T
+        view = numpy.linalg.inv(camera.getWorldTransformation().getData().astype(numpy.float64))
+        data = numpy.dot(projection, view)
+
+        # Every row combination gives a plane (a, b, c, d), with a * x + b * y + c * z + d >= 0 for points inside.
+        planes = []
+        for row in range(3):
+            planes.append(tuple(float(value) for value in data[3] + data[row]))
+            planes.append(tuple(float(value) for value in data[3] - data[row]))
+
+        result = []
+        stack = [self._root] if self._root != -1 else []
+        while stack:
+            index = stack.pop()
+            children = self._children[index]
+            if children is None:
+                if _testPlanes(self._leaf_boxes[index], planes) >= 0:
+                    result.append(self._leaf_nodes[index])
+                continue
+
+            intersection = _testPlanes(self._boxes[index], planes)
+            if intersection > 0:
+                result.extend(self._getLeafNodes(index))
+            elif intersection == 0:
+                stack.extend(children)
+        return result
+
+    ##  Get the box containing all nodes in the hierarchy.
+    #
+    #   \return \type{tuple} A (min x, min y, min z, max x, max y, max z) tuple, or None if the hierarchy is empty.
+    def getBounds(self):
+        self.update()
+        if self._root == -1:
+            return None
+        if self._children[self._root] is None:
+            return self._leaf_boxes[self._root]
+        return self._boxes[self._root]
+
+    ##  Get the height of the tree, the largest amount of steps from the root to a leaf.
+    def getHeight(self):
+        self.update()
+        if self._root == -1:
+            return 0
+        return self._heights[self._root]
+
+    ##  Process the changes of the scene since the last update.
+    #
+    #   This is done automatically by the queries.
+    def update(self):
+        store = self._transform_store
+        version = store.getVersion()
+        if version == self._version:
+            return
+
+        changed = store.getChangedIndices(self._version)
+        transformations = store.getWorldTransformations()
+
+        # Leaves that are new or moved out of their enlarged box, these still have to be inserted in the tree.
+        pending = []
+        for index in changed:
+            index = int(index)
+            node = store.getNode(index)
+            leaf = self._leaves.get(index, -1)
+            if leaf != -1 and self._leaf_nodes[leaf] is not node:
+                self._removeLeaf(index)
+                leaf = -1
+
+            box = self._getNodeBox(node, transformations[index]) if node is not None else None
+            if box is None:
+                if leaf != -1:
+                    self._removeLeaf(index)
+                continue
+
+            if leaf == -1:
+                leaf = self._allocate()
+                self._leaf_nodes[leaf] = node
+                self._leaves[index] = leaf
+            elif _contains(self._boxes[leaf], box):
+                self._leaf_boxes[leaf] = box
+                continue
+            else:
+                self._extractLeaf(leaf)
+
+            self._leaf_boxes[leaf] = box
+            self._boxes[leaf] = self._enlarge(box)
+            pending.append(leaf)
+
+        if len(pending) > self._rebuild_threshold and len(pending) * 4 > len(self._leaf_nodes):
+            # Building the tree at once is faster and gives a better tree than inserting many leaves one by one.
+            self._rebuild()
+        else:
+            for leaf in pending:
+                self._insertLeaf(leaf)
+
+        self._version = version
+
+    ##  private:
+
+    #   The leaves are inserted with a box that is larger than the box of the node by this factor of its size,
+    #   so they do not have to move in the tree when the node moves a little.
+    _margin = 0.1
+
+    #   The minimum amount of leaves to insert before considering to rebuild the whole tree.
+    _rebuild_threshold = 64
+
+    #   Get the world box of the mesh of a node.
+    def _getNodeBox(self, node, transformation):
+        mesh = node.getMeshData()
+        if mesh is None or mesh.getVertexCount() == 0:
+            return None
+
+        extents = mesh.getExtents(Matrix(transformation))
+        minimum = extents.minimum
+        maximum = extents.maximum
+        return (float(minimum.x), float(minimum.y), float(minimum.z), float(maximum.x), float(maximum.y), float(maximum.z))
+
+    def _removeLeaf(self, store_index):
+        leaf = self._leaves.pop(store_index)
+        self._extractLeaf(leaf)
+        del self._leaf_boxes[leaf]
+        del self._leaf_nodes[leaf]
+        self._free_indices.append(leaf)
+
+    def _enlarge(self, box):
+        margins = [self._margin * (box[axis + 3] - box[axis]) + 1e-6 for axis in range(3)]
+        return (box[0] - margins[0], box[1] - margins[1], box[2] - margins[2], box[3] + margins[0], box[4] + margins[1], box[5] + margins[2])
+
+    def _allocate(self):
+        if self._free_indices:
+            index = self._free_indices.pop()
+        else:
+            index = len(self._boxes)
+            self._boxes.append(None)
+            self._parents.append(-1)
+            self._children.append(None)
+            self._heights.append(0)
+
+        self._parents[index] = -1
+        self._children[index] = None
+        self._heights[index] = 0
+        return index
+
+    def _getLeafNodes(self, index):
+        nodes = []
+        stack = [index]
+        while stack:
+            index = stack.pop()
+            children = self._children[index]
+            if children is None:
+                nodes.append(self._leaf_nodes[index])
+            else:
+                stack.extend(children)
+        return nodes
+
+    #   Build the tree from all leaves, by splitting them in two halves along the longest axis recursively.
+    def _rebuild(self):
+        for index in range(len(self._children)):
+            if self._children[index] is not None:
+                self._children[index] = None
+                self._free_indices.append(index)
+
+        leaves = list(self._leaf_nodes.keys())
+        if not leaves:
+            self._root = -1
+            return
+
+        boxes = numpy.array([self._boxes[leaf] for leaf in leaves])
+        centers = (boxes[:, 0:3] + boxes[:, 3:6]) / 2
+        self._root = self._build(numpy.arange(len(leaves)), leaves, centers)
+        self._parents[self._root] = -1
+
+    def _build(self, order, leaves, centers):
+        if len(order) == 1:
+            return leaves[order[0]]
+
+        order_centers = centers[order]
+        extent = [order_centers[:, axis].max() - order_centers[:, axis].min() for axis in range(3)]
+        axis = extent.index(max(extent))
+
+        half = len(order) // 2
+        split = numpy.argpartition(order_centers[:, axis], half)
+        first = self._build(order[split[:half]], leaves, centers)
+        second = self._build(order[split[half:]], leaves, centers)
+
+        index = self._allocate()
+        self._children[index] = (first, second)
+        self._parents[first] = index
+        self._parents[second] = index
+        self._boxes[index] = _union(self._boxes[first], self._boxes[second])
+        self._heights[index] = 1 + max(self._heights[first], self._heights[second])
+        return index
+
+    #   Insert a leaf next to the node of the tree where it increases the total surface area of the boxes least.
+    def _insertLeaf(self, leaf):
+        if self._root == -1:
+            self._root = leaf
+            self._parents[leaf] = -1
+            return
+
+        leaf_box = self._boxes[leaf]
+        index = self._root
+        while self._children[index] is not None:
+            area = _area(self._boxes[index])
+            combined_area = _area(_union(self._boxes[index], leaf_box))
+
+            # Cost of making a new parent for this node and the leaf, and the minimum cost of pushing the leaf further down.
+            cost = 2.0 * combined_area
+            inheritance_cost = 2.0 * (combined_area - area)
+
+            child_costs = []
+            for child in self._children[index]:
+                child_cost = _area(_union(leaf_box, self._boxes[child])) + inheritance_cost
+                if self._children[child] is not None:
+                    child_cost -= _area(self._boxes[child])
+                child_costs.append(child_cost)
+
+            if cost < child_costs[0] and cost < child_costs[1]:
+                break
+            index = self._children[index][0] if child_costs[0] < child_costs[1] else self._children[index][1]
+
+        sibling = index
+        old_parent = self._parents[sibling]
+        new_parent = self._allocate()
+        self._parents[new_parent] = old_parent
+        self._boxes[new_parent] = _union(leaf_box, self._boxes[sibling])
+        self._heights[new_parent] = self._heights[sibling] + 1
+        self._children[new_parent] = (sibling, leaf)
+        self._parents[sibling] = new_parent
+        self._parents[leaf] = new_parent
+
+        if old_parent != -1:
+            self._replaceChild(old_parent, sibling, new_parent)
+        else:
+            self._root = new_parent
+
+        self._refit(new_parent)
+
+    #   Take a leaf out of the tree, its parent is replaced by the sibling of the leaf.
+    def _extractLeaf(self, leaf):
+        if leaf == self._root:
+            self._root = -1
+            return
+
+        parent = self._parents[leaf]
+        grandparent = self._parents[parent]
+        first, second = self._children[parent]
+        sibling = second if first == leaf else first
+
+        if grandparent != -1:
+            self._replaceChild(grandparent, parent, sibling)
+            self._parents[sibling] = grandparent
+            self._refit(grandparent)
+        else:
+            self._root = sibling
+            self._parents[sibling] = -1
+
+        self._children[parent] = None
+        self._free_indices.append(parent)
+        self._parents[leaf] = -1
+
+    def _replaceChild(self, parent, old_child, new_child):
+        first, second = self._children[parent]
+        if first == old_child:
+            self._children[parent] = (new_child, second)
+        else:
+            self._children[parent] = (first, new_child)
+
+    #   Update the boxes and heights from a node of the tree up to the root, balancing the tree on the way.
+    def _refit(self, index):
+        while index != -1:
+            index = self._balance(index)
+            first, second = self._children[index]
+            self._heights[index] = 1 + max(self._heights[first], self._heights[second])
+            self._boxes[index] = _union(self._boxes[first], self._boxes[second])
+            index = self._parents[index]
+
+    #   Rotate a child up if the heights of the children of a node differ more than one.
+    #   Returns the index of the node that took the place of the node.
+    def _balance(self, index):
+        if self._children[index] is None or self._heights[index] < 2:
+            return index
+
+        first, second = self._children[index]
+        balance = self._heights[second] - self._heights[first]
+        if balance > 1:
+            return self._rotate(index, second, first, 1)
+        if balance < -1:
+            return self._rotate(index, first, second, 0)
+        return index
+
+    #   Rotate the child "up" of node "index" into its place. "other" is the other child of "index", "side" is the position of "up" among the children of "index".
+    def _rotate(self, index, up, other, side):
+        up_first, up_second = self._children[up]
+
+        self._parents[up] = self._parents[index]
+        self._parents[index] = up
+        if self._parents[up] != -1:
+            self._replaceChild(self._parents[up], index, up)
+        else:
+            self._root = up
+
+        # The highest child of "up" stays, the other one takes the place of "up" below "index".
+        if self._heights[up_first] > self._heights[up_second]:
+            keep, move = up_first, up_second
+        else:
+            keep, move = up_second, up_first
+
+        self._children[up] = (index, keep)
+        self._children[index] = (other, move) if side == 1 else (move, other)
+        self._parents[move] = index
+
+        self._boxes[index] = _union(self._boxes[other], self._boxes[move])
+        self._heights[index] = 1 + max(self._heights[other], self._heights[move])
+        self._boxes[up] = _union(self._boxes[index], self._boxes[keep])
+        self._heights[up] = 1 + max(self._heights[index], self._heights[keep])
+        return up
+
+##  Internal
+#   Helper functions on (min x, min y, min z, max x, max y, max z) tuples.
+def _union(first, second):
+    return (min(first[0], second[0]), min(first[1], second[1]), min(first[2], second[2]),
+            max(first[3], second[3]), max(first[4], second[4]), max(first[5], second[5]))
+
+def _area(box):
+    x = box[3] - box[0]
+    y = box[4] - box[1]
+    z = box[5] - box[2]
+    return x * y + y * z + z * x
+
+def _contains(outer, inner):
+    return (outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] <= inner[2] and
+            outer[3] >= inner[3] and outer[4] >= inner[4] and outer[5] >= inner[5])
+
+def _overlaps(first, second):
+    return (first[0] <= second[3] and first[1] <= second[4] and first[2] <= second[5] and
+            second[0] <= first[3] and second[1] <= first[4] and second[2] <= first[5])
+
+#   Get the distance along the ray at which it enters the box, or None if it misses the box.
+def _intersectRay(box, origin, direction):
+    near = 0.0
+    far = float("inf")
+    for axis in range(3):
+        if direction[axis] == 0.0:
+            if origin[axis] < box[axis] or origin[axis] > box[axis + 3]:
+                return None
+            continue
+
+        first = (box[axis] - origin[axis]) / direction[axis]
+        second = (box[axis + 3] - origin[axis]) / direction[axis]
+        if first > second:
+            first, second = second, first
+        if first > near:
+            near = first
+        if second < far:
+            far = second
+        if near > far:
+            return None
+    return near
+
+#   Test a box against planes. Returns 1 if it is inside all planes, -1 if it is outside one of them and 0 otherwise.
+def _testPlanes(box, planes):
+    result = 1
+    for a, b, c, d in planes:
+        # The corners of the box furthest along and furthest against the normal of the plane.
+        furthest = a * (box[3] if a > 0 else box[0]) + b * (box[4] if b > 0 else box[1]) + c * (box[5] if c > 0 else box[2]) + d
+        if furthest < 0:
+            return -1
+        nearest = a * (box[0] if a > 0 else box[3]) + b * (box[1] if b > 0 else box[4]) + c * (box[2] if c > 0 else box[5]) + d
+        if nearest < 0:
+            result = 0
+    return result
@@ -80,11 +80,10 @@ class PointCloudNode(SceneNode.SceneNode):
         cloud_indices.fill(255 - id)
         cloud_indices  = numpy.left_shift(cloud_indices, 24) # shift 24 bits.
         combined_clouds = numpy.add(cloud_indices,vertice_indices)
-        data = numpy.fromstring(combined_clouds.tostring(),numpy.uint8)
 
-        colors = numpy.resize(data,(mesh_data.getVertexCount(), 4))
-        colors = colors.astype(numpy.float32)
-        colors /= 255
+        # The bytes are stored as they are, 8-bit colors are normalized by the renderer. This takes a
+        # quarter of the memory of float colors and keeps the ids exact.
+        colors = combined_clouds.view(numpy.uint8).reshape((mesh_data.getVertexCount(), 4))
         self._mesh_data.setColors(colors)
         self._resetAABB()
         self.meshDataChanged.emit(self)
\ No newline at end of file
@@ -3,10 +3,21 @@
 
 from UM.Scene.SceneNode import SceneNode
 from UM.Scene.Camera import Camera
+from UM.Scene.TransformStore import TransformStore
+from UM.Scene.BoundingVolumeHierarchy import BoundingVolumeHierarchy
+from UM.Scene.Selection import Selection
 from UM.Signal import Signal, SignalEmitter
 from UM.Scene.Iterator.BreadthFirstIterator import BreadthFirstIterator
+from UM.Mesh.MeshData import MeshType
+from UM.Mesh.TriangleHierarchy import TriangleHierarchy
+from UM.Mesh.TriangleHierarchyJob import TriangleHierarchyJob
+from UM.Math.Vector import Vector
+from UM.Math.Ray import Ray
+from UM.Logger import Logger
 
 import threading
+import numpy
+import numpy.linalg
 
 ##  Container object for the scene graph.
 #
@@ -17,8 +28,14 @@ class Scene(SignalEmitter):
 
         self._root = SceneNode()
         self._root.setCalculateBoundingBox(False)
+        self._transform_store = TransformStore()
+        self._transform_store.addNode(self._root)
+        self._bounding_volume_hierarchy = BoundingVolumeHierarchy(self._transform_store)
+        self._triangle_hierarchy_jobs = {}
         self._connectSignalsRoot()
+        self.transformationsChanged.connect(Selection._onTransformationsChanged)
         self._active_camera = None
+        self._transaction_depth = 0
 
         self._lock = threading.Lock()
 
@@ -39,13 +56,153 @@ class Scene(SignalEmitter):
     def releaseLock(self):
         self._lock.release()
 
+    ##  Start a transaction, to change many nodes at once.
+    #
+    #   Changing the transformation of a node normally updates all its descendants and emits
+    #   transformationChanged for every one of them, which is slow when many nodes change. Within a
+    #   transaction, nodes are only marked as changed. When the transaction ends, the world
+    #   transformations of the changed nodes and their descendants are calculated once, parents
+    #   before children, and the changes are notified once, see endTransaction().
+    #
+    #   Until then, the world transformations of the descendants of changed nodes are not updated.
+    #   Transactions can be nested, only the outermost transaction applies the changes. Always call
+    #   endTransaction(), for example in a finally block.
+    def beginTransaction(self):
+        self._transaction_depth += 1
+        if self._transaction_depth == 1:
+            self._root._transaction = {}
+
+    ##  End a transaction started with beginTransaction().
+    #
+    #   Every node whose world transformation changed emits transformationChanged once, without
+    #   forwarding it to its ancestors. Afterwards transformationsChanged is emitted with the list of
+    #   all these nodes and sceneChanged is emitted once.
+    def endTransaction(self):
+        if self._transaction_depth == 0:
+            return
+
+        self._transaction_depth -= 1
+        if self._transaction_depth > 0:
+            return
+
+        changed_nodes = self._root._transaction
+        self._root._transaction = None
+        if not changed_nodes:
+            return
+
+        # Every changed node is handled together with all its descendants. Handling them by depth
+        # makes sure parents come before their children and that nodes below another changed node
+        # are only handled once.
+        nodes = []
+        handled = set()
+        for changed_node in sorted(changed_nodes.values(), key = lambda node: node.getDepth()):
+            if id(changed_node) in handled:
+                continue
+            subtree = [changed_node]
+            for node in subtree:
+                subtree.extend(node.getChildren())
+            for node in subtree:
+                handled.add(id(node))
+            nodes.extend(subtree)
+
+        for node in nodes:
+            node._resetTransformation()
+        self._transform_store.update()
+        for node in nodes:
+            node._resetAABB()
+
+        root = self._root
+        root._transaction_notifications += 1
+        try:
+            for node in nodes:
+                node.transformationChanged.emit(node)
+        finally:
+            root._transaction_notifications -= 1
+
+        self.transformationsChanged.emit(nodes)
+        self.sceneChanged.emit(self._root)
+
+    ##  Signal. Emitted at the end of a transaction with the nodes whose transformation changed, parents before children.
+    transformationsChanged = Signal()
+
     ##  Get the root node of the scene.
     def getRoot(self):
         return self._root
 
+    ##  Get the store that contains the transformations of all nodes in the scene.
+    #
+    #   \return \type{TransformStore}
+    def getTransformStore(self):
+        return self._transform_store
+
+    ##  Get the bounding volume hierarchy of the nodes in the scene, to find nodes by ray, box or frustum.
+    #
+    #   \return \type{BoundingVolumeHierarchy}
+    def getBoundingVolumeHierarchy(self):
+        return self._bounding_volume_hierarchy
+
+    ##  Find the closest face of the meshes in the scene that is hit by a ray.
+    #
+    #   Nodes are found with the bounding volume hierarchy, closest first, and their faces are tested
+    #   with the triangle hierarchy of their mesh, see MeshData::getTriangleHierarchy(). Meshes that do
+    #   not have a triangle hierarchy yet get one in the background with a TriangleHierarchyJob, until
+    #   then all their faces are tested. Faces are hit from both sides and point clouds are never hit.
+    #
+    #   \param ray \type{Ray} The ray to intersect with, in world coordinates.
+    #   \param kwargs Keyword arguments.
+    #                 Possible values are:
+    #                 - node_filter \type{function} A function that gets a node and returns whether it
+    #                                               can be hit. By default all nodes can be hit.
+    #   \return \type{tuple} A (node, face index, distance, position) tuple for the closest hit, where the
+    #                        face index is the index of the face in the mesh of the node, the distance
+    #                        is the distance along the ray in multiples of the length of its direction
+    #                        and the position is the world position of the hit as a Vector. None if no
+    #                        face is hit.
+    def raycast(self, ray, **kwargs):
+        node_filter = kwargs.get("node_filter", None)
+
+        origin = numpy.array(ray.origin.getData(), dtype = numpy.float64)
+        direction = numpy.array(ray.direction.getData(), dtype = numpy.float64)
+
+        result = None
+        for node, box_distance in self._bounding_volume_hierarchy.intersectRay(ray):
+            # Nodes are sorted by the distance to their box, no face of the rest can be closer.
+            if result is not None and box_distance > result[2]:
+                break
+
+            if node_filter is not None and not node_filter(node):
+                continue
+
+            mesh = node.getMeshData()
+            if mesh is None or mesh.getType() != MeshType.faces:
+                continue
+
+            try:
+                inverse = numpy.linalg.inv(node.getWorldTransformation().getData().astype(numpy.float64))
+            except numpy.linalg.LinAlgError:
+                continue
+
+            # The direction is not normalized, so distances along the local ray are the same as along the ray.
+            local_origin = inverse[0:3, 0:3].dot(origin) + inverse[0:3, 3]
+            local_direction = inverse[0:3, 0:3].dot(direction)
+            hit = self._intersectMesh(mesh, Ray(Vector(data = local_origin), Vector(data = local_direction)))
+            if hit is not None and (result is None or hit[1] < result[2]):
+                result = (node, hit[0], hit[1])
+
+        if result is None:
+            return None
+
+        node, face, distance = result
+        return (node, face, distance, ray.getPointAlongRay(distance))
+
     ##  Change the root node of the scene
     def setRoot(self, node):
+        if self._transaction_depth > 0:
+            node._transaction = self._root._transaction
+            self._root._transaction = None
+        self._transform_store.removeNode(self._root)
         self._root = node
+        self._transform_store.addNode(self._root)
         self._connectSignalsRoot()
         self.rootChanged.emit()
 
@@ -85,7 +242,56 @@ class Scene(SignalEmitter):
                 return node
         return None
 
+    ##  Get the amount of memory used by the meshes in the scene.
+    #
+    #   \return \type{dict} A (used, reserved) tuple of amounts of bytes per kind of data, see SceneNode::getMemoryUsage().
+    def getMemoryUsage(self):
+        return self._root.getMemoryUsage()
+
+    ##  Release the memory reserved for adding data to the meshes in the scene.
+    #
+    #   \return \type{int} The amount of bytes released, see MeshData::trimToSize().
+    def trimToSize(self):
+        released = self._root.trimToSize()
+        Logger.log("d", "Released %d bytes of reserved mesh memory", released)
+        return released
+
+    ##  Write the memory used by the meshes in the scene to the log.
+    def logMemoryUsage(self):
+        usage = self.getMemoryUsage()
+        Logger.log("d", "Mesh memory used by the scene: %d bytes, %d bytes reserved", sum(used for used, reserved in usage.values()), sum(reserved for used, reserved in usage.values()))
+        for key in sorted(usage):
+            used, reserved = usage[key]
+            if reserved:
+                Logger.log("d", "    %s: %d bytes used, %d bytes reserved", key, used, reserved)
+
     ## private:
+    #   Intersect a mesh with a ray in the coordinates of the mesh, see TriangleHierarchy::intersectRay().
+    def _intersectMesh(self, mesh, ray):
+        hierarchy = mesh.getTriangleHierarchy()
+        if hierarchy is not None:
+            return hierarchy.intersectRay(ray)
+
+        # Forget jobs that are done, a mesh whose data changed since then needs a new hierarchy.
+        for key, job in list(self._triangle_hierarchy_jobs.items()):
+            if job.isFinished():
+                del self._triangle_hierarchy_jobs[key]
+
+        if id(mesh) not in self._triangle_hierarchy_jobs:
+            job = TriangleHierarchyJob(mesh)
+            self._triangle_hierarchy_jobs[id(mesh)] = job
+            job.start()
+
+        vertices = mesh.getVertices()
+        if vertices is None:
+            return None
+
+        if mesh.hasIndices():
+            corners = vertices[mesh.getIndices()]
+        else:
+            corners = vertices[0:(len(vertices) // 3) * 3].reshape((-1, 3, 3))
+        return TriangleHierarchy.intersectTriangles(corners, ray)
+
     def _findCamera(self, name):
         for node in BreadthFirstIterator(self._root):
             if type(node) is Camera and node.getName() == name:
@@ -30,9 +30,11 @@ class SceneNode(SignalEmitter):
         self._children = []
         self._mesh_data = None
 
-        self._position = Vector()
-        self._scale = Vector(1.0, 1.0, 1.0)
-        self._orientation = Quaternion()
+        # Transformation values are frozen and replaced rather than modified, so the getters
+        # can return them without copying.
+        self._position = Vector().freeze()
+        self._scale = Vector(1.0, 1.0, 1.0).freeze()
+        self._orientation = Quaternion().freeze()
 
         self._transformation = None
         self._world_transformation = None
@@ -52,6 +54,10 @@ class SceneNode(SignalEmitter):
         self._aabb_job = None
         self._visible = True
         self._name = ""
+        self._transaction = None # Nodes changed during a transaction of the scene, only used by the root node. See Scene::beginTransaction().
+        self._transaction_notifications = 0 # Larger than 0 while the changes of a transaction are notified, only used by the root node. See Scene::endTransaction().
+        self._transform_store = None # The TransformStore of the scene this node is part of.
+        self._transform_index = -1
 
         if parent:
             parent.addChild(self)
@@ -116,6 +122,8 @@ class SceneNode(SignalEmitter):
         self._mesh_data = mesh_data
         if self._mesh_data is not None:
             self._mesh_data.dataChanged.connect(self._onMeshDataChanged)
+        if self._transform_store is not None:
+            self._transform_store.setNodeChanged(self)
         self._resetAABB()
         self.meshDataChanged.emit(self)
 
@@ -124,13 +132,15 @@ class SceneNode(SignalEmitter):
 
 
     def _onMeshDataChanged(self):
+        if self._transform_store is not None:
+            self._transform_store.setNodeChanged(self)
         self.meshDataChanged.emit(self)
         
     ##  \brief Add a child to this node and set it's parent as this node.
     #   \params scene_node SceneNode to add.
     def addChild(self, scene_node):
         if scene_node not in self._children:
-            scene_node.transformationChanged.connect(self.transformationChanged)
+            scene_node.transformationChanged.connect(self._onChildTransformationChanged)
             scene_node.childrenChanged.connect(self.childrenChanged)
             scene_node.meshDataChanged.connect(self.meshDataChanged)
 
@@ -141,6 +151,9 @@ class SceneNode(SignalEmitter):
             if not scene_node._parent is self:
                 scene_node._parent = self
                 scene_node.parentChanged.emit(self)
+
+            if self._transform_store is not None:
+                self._transform_store.addNode(scene_node)
     
     ##  \brief remove a single child
     #   \param child Scene node that needs to be removed. 
@@ -148,12 +161,14 @@ class SceneNode(SignalEmitter):
         if child not in self._children:
             return
 
-        child.transformationChanged.disconnect(self.transformationChanged)
+        child.transformationChanged.disconnect(self._onChildTransformationChanged)
         child.childrenChanged.disconnect(self.childrenChanged)
         child.meshDataChanged.disconnect(self.meshDataChanged)
 
         self._children.remove(child)
         child._parent = None
+        if child._transform_store is not None:
+            child._transform_store.removeNode(child)
         child.parentChanged.emit(self)
 
         self.childrenChanged.emit(self)
@@ -183,17 +198,41 @@ class SceneNode(SignalEmitter):
             children.extend(child.getAllChildren())
         return children
 
+    ##  Get the amount of memory used by the meshes of this node and all its children.
+    #
+    #   Meshes used by several nodes are only counted once.
+    #
+    #   \return \type{dict} The totals of MeshData::getMemoryUsage() over all meshes, a (used, reserved) tuple
+    #                       of amounts of bytes per kind of data.
+    def getMemoryUsage(self):
+        usage = {}
+        for mesh in self._getAllMeshData():
+            for key, (used, reserved) in mesh.getMemoryUsage().items():
+                total = usage.get(key, (0, 0))
+                usage[key] = (total[0] + used, total[1] + reserved)
+        return usage
+
+    ##  Release the memory reserved for adding data to the meshes of this node and all its children.
+    #
+    #   \return \type{int} The amount of bytes released, see MeshData::trimToSize().
+    def trimToSize(self):
+        return sum(mesh.trimToSize() for mesh in self._getAllMeshData())
+
     ##  \brief Emitted whenever the list of children of this object or any child object changes.
     #   \param object The object that triggered the change.
     childrenChanged = Signal()
 
     ##  \brief Computes and returns the transformation from world to local space.
+    #
+    #   The returned matrix is shared with this node and is read-only, use deepcopy() to get a copy that
+    #   can be modified. The same holds for the other transformation getters of SceneNode.
+    #
     #   \returns 4x4 transformation matrix
     def getWorldTransformation(self):
         if self._world_transformation is None:
             self._updateTransformation()
 
-        return deepcopy(self._world_transformation)
+        return self._world_transformation
 
     ##  \brief Returns the local transformation with respect to its parent. (from parent to local)
     #   \retuns transformation 4x4 (homogenous) matrix
@@ -201,11 +240,11 @@ class SceneNode(SignalEmitter):
         if self._transformation is None:
             self._updateTransformation()
 
-        return deepcopy(self._transformation)
+        return self._transformation
 
     ##  Get the local orientation value.
     def getOrientation(self):
-        return deepcopy(self._orientation)
+        return self._orientation
 
 
     ##  \brief Rotate the scene object (and thus its children) by given amount
@@ -226,6 +265,7 @@ class SceneNode(SignalEmitter):
             raise ValueError("Unknown transform space {0}".format(transform_space))
 
         self._orientation.normalize()
+        self._orientation.freeze()
         self._transformChanged()
 
     ##  Set the local orientation of this scene node.
@@ -235,13 +275,14 @@ class SceneNode(SignalEmitter):
         if not self._enabled or orientation == self._orientation:
             return
 
-        self._orientation = orientation
+        self._orientation = deepcopy(orientation)
         self._orientation.normalize()
+        self._orientation.freeze()
         self._transformChanged()
 
     ##  Get the local scaling value.
     def getScale(self):
-        return deepcopy(self._scale)
+        return self._scale
 
     ##  Scale the scene object (and thus its children) by given amount
     #
@@ -252,7 +293,7 @@ class SceneNode(SignalEmitter):
             return
 
         if transform_space == SceneNode.TransformSpace.Local:
-            self._scale = self._scale.scale(scale)
+            self._scale = self._scale.scale(scale).freeze()
         elif transform_space == SceneNode.TransformSpace.Parent:
             raise NotImplementedError()
         elif transform_space == SceneNode.TransformSpace.World:
@@ -269,19 +310,19 @@ class SceneNode(SignalEmitter):
         if not self._enabled or scale == self._scale:
             return
 
-        self._scale = scale
+        self._scale = deepcopy(scale).freeze()
         self._transformChanged()
 
     ##  Get the local position.
     def getPosition(self):
-        return deepcopy(self._position)
+        return self._position
 
     ##  Get the position of this scene node relative to the world.
     def getWorldPosition(self):
         if not self._derived_position:
             self._updateTransformation()
 
-        return deepcopy(self._derived_position)
+        return self._derived_position
 
     ##  Translate the scene object (and thus its children) by given amount.
     #
@@ -292,15 +333,16 @@ class SceneNode(SignalEmitter):
             return
 
         if transform_space == SceneNode.TransformSpace.Local:
-            self._position += self._orientation.rotate(translation)
+            self._position = self._position + self._orientation.rotate(translation)
         elif transform_space == SceneNode.TransformSpace.Parent:
-            self._position += translation
+            self._position = self._position + translation
         elif transform_space == SceneNode.TransformSpace.World:
             if self._parent:
-                self._position += (1.0 / self._parent._getDerivedScale()).scale(self._parent._getDerivedOrientation().getInverse().rotate(translation))
+                self._position = self._position + (1.0 / self._parent._getDerivedScale()).scale(self._parent._getDerivedOrientation().getInverse().rotate(translation))
             else:
-                self._position += translation
+                self._position = self._position + translation
 
+        self._position.freeze()
         self._transformChanged()
 
     ##  Set the local position value.
@@ -310,7 +352,7 @@ class SceneNode(SignalEmitter):
         if not self._enabled or position == self._position:
             return
 
-        self._position = position
+        self._position = deepcopy(position).freeze()
         self._transformChanged()
 
     ##  Signal. Emitted whenever the transformation of this object or any child object changes.
@@ -327,7 +369,7 @@ class SceneNode(SignalEmitter):
 
         eye = self.getWorldPosition()
         f = (target - eye).normalize()
-        up.normalize()
+        up = up.getNormalized()
         s = f.cross(up).normalize()
         u = s.cross(f).normalize()
 
@@ -342,6 +384,7 @@ class SceneNode(SignalEmitter):
             self._orientation = self._parent._getDerivedOrientation() * Quaternion.fromMatrix(m)
         else:
             self._orientation = Quaternion.fromMatrix(m)
+        self._orientation.freeze()
         self._transformChanged()
 
     ##  Can be overridden by child nodes if they need to perform special rendering.
@@ -402,6 +445,15 @@ class SceneNode(SignalEmitter):
     boundingBoxChanged = Signal()
 
     ##  private:
+    #   Get the meshes of this node and all its children, without duplicates.
+    def _getAllMeshData(self):
+        meshes = {}
+        for node in [self] + self.getAllChildren():
+            mesh = node.getMeshData()
+            if mesh is not None:
+                meshes[id(mesh)] = mesh
+        return list(meshes.values())
+
     def _getDerivedPosition(self):
         if not self._derived_position:
             self._updateTransformation()
@@ -421,38 +473,72 @@ class SceneNode(SignalEmitter):
         return self._derived_scale
 
     def _transformChanged(self):
+        if self._transform_store is not None:
+            self._transform_store.setNodeChanged(self)
+
+        transaction = self._getRoot()._transaction
+        if transaction is not None:
+            # Children, bounding boxes and signals are updated once at the end of the transaction.
+            self._resetTransformation()
+            transaction[id(self)] = self
+            return
+
         self._resetAABB()
+        self._resetTransformation()
+
+        self.transformationChanged.emit(self)
+
+        for child in self._children:
+            child._transformChanged()
+
+    def _resetTransformation(self):
         self._transformation = None
         self._world_transformation = None
         self._derived_position = None
         self._derived_orientation = None
         self._derived_scale = None
 
-        self.transformationChanged.emit(self)
+    def _getRoot(self):
+        node = self
+        while node._parent is not None:
+            node = node._parent
+        return node
 
-        for child in self._children:
-            child._transformChanged()
+    #   Whether the changes of a transaction of the scene of this node are being notified, see Scene::endTransaction().
+    def _isNotifyingTransaction(self):
+        return self._getRoot()._transaction_notifications > 0
+
+    #   Forward the transformation changes of children, unless they are part of the changes of a transaction.
+    def _onChildTransformationChanged(self, node):
+        if not self._isNotifyingTransaction():
+            self.transformationChanged.emit(node)
 
     def _updateTransformation(self):
-        self._transformation = Matrix.fromPositionOrientationScale(self._position, self._orientation, self._scale)
+        # The scene calculates the transformations of all its nodes at once.
+        transform_store = self._transform_store
+        if transform_store is not None and transform_store.updateNode(self):
+            return
+
+        self._transformation = Matrix.fromPositionOrientationScale(self._position, self._orientation, self._scale).freeze()
 
         if self._parent:
             parent_orientation = self._parent._getDerivedOrientation()
             if self._inherit_orientation:
-                self._derived_orientation = parent_orientation * self._orientation
+                self._derived_orientation = (parent_orientation * self._orientation).freeze()
             else:
                 self._derived_orientation = self._orientation
 
             parent_scale = self._parent._getDerivedScale()
             if self._inherit_scale:
-                self._derived_scale = parent_scale.scale(self._scale)
+                self._derived_scale = parent_scale.scale(self._scale).freeze()
             else:
                 self._derived_scale = self._scale
 
             self._derived_position = parent_orientation.rotate(parent_scale.scale(self._position))
             self._derived_position += self._parent._getDerivedPosition()
+            self._derived_position.freeze()
 
-            self._world_transformation = Matrix.fromPositionOrientationScale(self._derived_position, self._derived_orientation, self._derived_scale)
+            self._world_transformation = Matrix.fromPositionOrientationScale(self._derived_position, self._derived_orientation, self._derived_scale).freeze()
         else:
             self._derived_position = self._position
             self._derived_orientation = self._orientation
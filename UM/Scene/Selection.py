@@ -87,6 +87,28 @@ class Selection:
 
     @classmethod
     def _onTransformationChanged(cls, node):
+        # The changes of a transaction are handled at once, see _onTransformationsChanged().
+        if node._isNotifyingTransaction():
+            return
+
+        cls._updateSelectionCenter()
+
+    ##  Update the selection center once for all nodes changed by a transaction of the scene.
+    #
+    #   \param nodes \type{list} The nodes whose transformation changed, see Scene::transformationsChanged.
+    @classmethod
+    def _onTransformationsChanged(cls, nodes):
+        selected = set(id(object) for object in cls.__selection)
+        if any(id(node) in selected for node in nodes):
+            cls._updateSelectionCenter()
+
+    @classmethod
+    def _updateSelectionCenter(cls):
+        if not cls.__selection:
+            cls.__selection_center = Vector(0, 0, 0)
+            cls.selectionCenterChanged.emit()
+            return
+
         cls.__selection_center = Vector(0, 0, 0)
 
         for object in cls.__selection:
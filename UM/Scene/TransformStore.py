@@ -0,0 +1,387 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
+from UM.Math.Quaternion import Quaternion
+
+import numpy
+import threading
+
+##  Array based storage of the transformations of all nodes in a scene.
+#
+#   Every node of the scene is stored at an index in a set of contiguous arrays: the local position,
+#   orientation and scale, the index of its parent and the resulting local and world transformation
+#   matrices. Nodes only write their local values into the store when these change. The world
+#   transformations of all changed nodes and their descendants are calculated in one batch when they
+#   are needed, with a few numpy operations per level of the tree instead of a chain of method calls
+#   per node.
+#
+#   The scene keeps its nodes in the store, see Scene::getTransformStore(). Nodes that are not part
+#   of a scene calculate their transformations themselves. The store can be used from several threads,
+#   for example by the jobs that calculate bounding boxes.
+class TransformStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes = []
+        self._free_indices = []
+
+        capacity = 16
+        self._parents = numpy.full(capacity, -1, dtype = numpy.int32)
+        self._depths = numpy.zeros(capacity, dtype = numpy.int32)
+        self._used = numpy.zeros(capacity, dtype = numpy.bool_)
+        self._changed = numpy.zeros(capacity, dtype = numpy.bool_)
+        self._inherit_orientation = numpy.ones(capacity, dtype = numpy.bool_)
+        self._inherit_scale = numpy.ones(capacity, dtype = numpy.bool_)
+
+        self._positions = numpy.zeros((capacity, 3), dtype = numpy.float32)
+        self._orientations = numpy.zeros((capacity, 4), dtype = numpy.float32)
+        self._orientations[:, 3] = 1.0
+        self._scales = numpy.ones((capacity, 3), dtype = numpy.float32)
+
+        self._world_positions = self._positions.copy()
+        self._world_orientations = self._orientations.copy()
+        self._world_scales = self._scales.copy()
+
+        self._local_transformations = numpy.tile(numpy.identity(4, dtype = numpy.float32), (capacity, 1, 1))
+        self._world_transformations = self._local_transformations.copy()
+
+        self._has_changes = False
+        self._levels = None # Indices of the nodes per depth, rebuilt when the tree changes.
+
+        # Every update and removal increases the version, the version of each index tells when it last changed.
+        self._version = 0
+        self._versions = numpy.zeros(capacity, dtype = numpy.int64)
+
+    ##  Add a node and all its children to the store.
+    #
+    #   If the node is part of another store, it is removed from that store first.
+    #
+    #   \param node \type{SceneNode} The node to add.
+    def addNode(self, node):
+        if node._transform_store is not None:
+            node._transform_store.removeNode(node)
+
+        with self._lock:
+            self._addNode(node)
+
+    ##  Remove a node and all its children from the store.
+    #
+    #   \param node \type{SceneNode} The node to remove.
+    def removeNode(self, node):
+        with self._lock:
+            self._removeNode(node)
+
+    ##  Store the local position, orientation and scale of a node, after they or the mesh data of the node changed.
+    #
+    #   The world transformations of the node and its children are calculated by the next update().
+    #
+    #   \param node \type{SceneNode} The node that changed.
+    def setNodeChanged(self, node):
+        with self._lock:
+            self._setNodeChanged(node)
+
+    ##  Get the index of a node in the arrays of this store.
+    #
+    #   \param node \type{SceneNode} The node to get the index of.
+    #   \return \type{int} The index of the node, or -1 if the node is not part of this store.
+    def getIndex(self, node):
+        if node._transform_store is not self:
+            return -1
+        return node._transform_index
+
+    ##  Get the node stored at an index.
+    #
+    #   \return \type{SceneNode} The node, or None if no node is stored at the index.
+    def getNode(self, index):
+        return self._nodes[index]
+
+    ##  Get the number of indices in use, including the indices of removed nodes that can be reused.
+    def getSize(self):
+        return len(self._nodes)
+
+    ##  Get the index of the parent of every node, or -1 for nodes without a parent in the store.
+    #
+    #   \return \type{numpy.ndarray} A read-only array of getSize() indices.
+    def getParentIndices(self):
+        return self._getView(self._parents)
+
+    ##  Get the local transformation matrix of every node.
+    #
+    #   \return \type{numpy.ndarray} A read-only (getSize(), 4, 4) array, unused indices contain identity matrices.
+    def getLocalTransformations(self):
+        with self._lock:
+            self._update()
+            return self._getView(self._local_transformations)
+
+    ##  Get the world transformation matrix of every node.
+    #
+    #   \return \type{numpy.ndarray} A read-only (getSize(), 4, 4) array, unused indices contain identity matrices.
+    def getWorldTransformations(self):
+        with self._lock:
+            self._update()
+            return self._getView(self._world_transformations)
+
+    ##  Get the current version of the store.
+    #
+    #   The version increases whenever nodes are removed or transformations are updated.
+    #
+    #   \return \type{int}
+    def getVersion(self):
+        with self._lock:
+            self._update()
+            return self._version
+
+    ##  Get the indices that changed after a version of the store.
+    #
+    #   These are the indices of the nodes that were added, removed, changed or whose world transformation
+    #   changed. Check getNode() to see whether a node is still stored at the index.
+    #
+    #   \param version \type{int} A version returned by getVersion().
+    #   \return \type{numpy.ndarray} The changed indices.
+    def getChangedIndices(self, version):
+        with self._lock:
+            self._update()
+            return numpy.flatnonzero(self._versions[:len(self._nodes)] > version)
+
+    ##  Set the cached transformations of a node to the values in the store.
+    #
+    #   This sets the local and world transformation matrices and the world position, orientation and scale of the node
+    #   to frozen objects, see SceneNode::getWorldTransformation().
+    #
+    #   \param node \type{SceneNode} The node to update.
+    #   \return \type{bool} True if the node was updated, False if it is not part of this store.
+    def updateNode(self, node):
+        with self._lock:
+            if node._transform_store is not self:
+                return False
+
+            self._update()
+
+            index = node._transform_index
+            orientation = self._world_orientations[index]
+            node._transformation = Matrix(self._local_transformations[index]).freeze()
+            node._world_transformation = Matrix(self._world_transformations[index]).freeze()
+            node._derived_position = Vector(data = self._world_positions[index]).freeze()
+            node._derived_orientation = Quaternion(orientation[0], orientation[1], orientation[2], orientation[3]).freeze()
+            node._derived_scale = Vector(data = self._world_scales[index]).freeze()
+            return True
+
+    ##  Calculate the transformations of all nodes that changed since the last update and of their children.
+    #
+    #   The nodes are handled per level of the tree, so the world values of the parents are known
+    #   when the values of their children are calculated.
+    def update(self):
+        with self._lock:
+            self._update()
+
+    ##  private:
+
+    def _addNode(self, node):
+        nodes = [node]
+        for current in nodes:
+            index = self._allocate()
+            self._nodes[index] = current
+            current._transform_store = self
+            current._transform_index = index
+
+            parent = current.getParent()
+            if parent is not None and parent._transform_store is self:
+                self._parents[index] = parent._transform_index
+                self._depths[index] = self._depths[parent._transform_index] + 1
+            else:
+                self._parents[index] = -1
+                self._depths[index] = 0
+
+            self._setNodeChanged(current)
+            nodes.extend(current.getChildren())
+
+        self._levels = None
+
+    def _removeNode(self, node):
+        if node._transform_store is not self:
+            return
+
+        nodes = [node]
+        for current in nodes:
+            index = current._transform_index
+            self._nodes[index] = None
+            self._free_indices.append(index)
+            self._used[index] = False
+            self._changed[index] = False
+            self._parents[index] = -1
+            self._versions[index] = self._version + 1
+
+            current._transform_store = None
+            current._transform_index = -1
+            current._resetTransformation()
+            nodes.extend(current.getChildren())
+
+        self._version += 1
+        self._levels = None
+
+    #   Store the values of a node. The cached transformations of the node are reset while the store is locked,
+    #   so another thread can not replace them by values calculated before the change.
+    def _setNodeChanged(self, node):
+        node._resetTransformation()
+
+        index = node._transform_index
+        self._positions[index] = node._position.getData()
+        self._orientations[index] = node._orientation.getData()
+        self._scales[index] = node._scale.getData()
+        self._inherit_orientation[index] = node._inherit_orientation
+        self._inherit_scale[index] = node._inherit_scale
+        self._changed[index] = True
+        self._has_changes = True
+
+    def _update(self):
+        if not self._has_changes:
+            return
+        self._has_changes = False
+
+        if self._levels is None:
+            self._levels = self._buildLevels()
+
+        changed = self._changed
+        local_changed = numpy.flatnonzero(changed)
+        self._local_transformations[local_changed] = self._createTransformations(self._positions[local_changed], self._orientations[local_changed], self._scales[local_changed])
+
+        for level in self._levels:
+            parents = self._parents[level]
+            if self._depths[level[0]] == 0:
+                # Nodes without a parent, their world values are their local values.
+                indices = level[changed[level]]
+                self._world_positions[indices] = self._positions[indices]
+                self._world_orientations[indices] = self._orientations[indices]
+                self._world_scales[indices] = self._scales[indices]
+                self._world_transformations[indices] = self._local_transformations[indices]
+                continue
+
+            selection = changed[level] | changed[parents]
+            if not selection.any():
+                continue
+            indices = level[selection]
+            parents = parents[selection]
+            changed[indices] = True
+
+            parent_orientations = self._world_orientations[parents]
+            parent_scales = self._world_scales[parents]
+
+            orientations = self._orientations[indices]
+            self._world_orientations[indices] = numpy.where(self._inherit_orientation[indices, None], _multiplyQuaternions(parent_orientations, orientations), orientations)
+
+            scales = self._scales[indices]
+            self._world_scales[indices] = numpy.where(self._inherit_scale[indices, None], parent_scales * scales, scales)
+
+            self._world_positions[indices] = _rotateVectors(parent_orientations, parent_scales * self._positions[indices]) + self._world_positions[parents]
+
+            self._world_transformations[indices] = self._createTransformations(self._world_positions[indices], self._world_orientations[indices], self._world_scales[indices])
+
+        self._version += 1
+        self._versions[changed] = self._version
+        changed[:] = False
+
+    #   Get an unused index, growing the arrays if needed.
+    def _allocate(self):
+        if self._free_indices:
+            index = self._free_indices.pop()
+        else:
+            index = len(self._nodes)
+            self._nodes.append(None)
+            if index >= len(self._parents):
+                self._grow(2 * len(self._parents))
+
+        self._used[index] = True
+        return index
+
+    def _grow(self, capacity):
+        old_capacity = len(self._parents)
+        for name in ("_parents", "_depths", "_used", "_changed", "_versions", "_inherit_orientation", "_inherit_scale",
+                     "_positions", "_orientations", "_scales", "_world_positions", "_world_orientations", "_world_scales",
+                     "_local_transformations", "_world_transformations"):
+            old = getattr(self, name)
+            new = numpy.empty((capacity,) + old.shape[1:], dtype = old.dtype)
+            new[:old_capacity] = old
+            setattr(self, name, new)
+
+        # Fill the new part with the values of an unused index.
+        self._parents[old_capacity:] = -1
+        self._depths[old_capacity:] = 0
+        self._used[old_capacity:] = False
+        self._changed[old_capacity:] = False
+        self._versions[old_capacity:] = 0
+        self._inherit_orientation[old_capacity:] = True
+        self._inherit_scale[old_capacity:] = True
+        for positions in (self._positions, self._world_positions):
+            positions[old_capacity:] = 0.0
+        for orientations in (self._orientations, self._world_orientations):
+            orientations[old_capacity:] = (0.0, 0.0, 0.0, 1.0)
+        for scales in (self._scales, self._world_scales):
+            scales[old_capacity:] = 1.0
+        for transformations in (self._local_transformations, self._world_transformations):
+            transformations[old_capacity:] = numpy.identity(4, dtype = numpy.float32)
+
+    #   Get the indices of the used nodes grouped by depth, starting at the nodes without a parent.
+    def _buildLevels(self):
+        size = len(self._nodes)
+        indices = numpy.flatnonzero(self._used[:size])
+        if len(indices) == 0:
+            return []
+
+        depths = self._depths[indices]
+        order = numpy.argsort(depths, kind = "stable")
+        indices = indices[order]
+        depths = depths[order]
+
+        bounds = numpy.flatnonzero(numpy.diff(depths)) + 1
+        return numpy.split(indices, bounds)
+
+    def _getView(self, data):
+        view = data[:len(self._nodes)]
+        view.flags.writeable = False
+        return view
+
+    #   Create transformation matrices from arrays of positions, orientations and scales, like Matrix::fromPositionOrientationScale().
+    def _createTransformations(self, positions, orientations, scales):
+        x, y, z, w = orientations[:, 0], orientations[:, 1], orientations[:, 2], orientations[:, 3]
+        s = 2.0 / (x * x + y * y + z * z + w * w)
+        xs, ys, zs = s * x, s * y, s * z
+        wx, wy, wz = w * xs, w * ys, w * zs
+        xx, xy, xz = x * xs, x * ys, x * zs
+        yy, yz, zz = y * ys, y * zs, z * zs
+
+        result = numpy.zeros((len(positions), 4, 4), dtype = numpy.float32)
+        result[:, 0, 0] = (1.0 - (yy + zz)) * scales[:, 0]
+        result[:, 0, 1] = (xy - wz) * scales[:, 1]
+        result[:, 0, 2] = (xz + wy) * scales[:, 2]
+        result[:, 1, 0] = (xy + wz) * scales[:, 0]
+        result[:, 1, 1] = (1.0 - (xx + zz)) * scales[:, 1]
+        result[:, 1, 2] = (yz - wx) * scales[:, 2]
+        result[:, 2, 0] = (xz - wy) * scales[:, 0]
+        result[:, 2, 1] = (yz + wx) * scales[:, 1]
+        result[:, 2, 2] = (1.0 - (xx + yy)) * scales[:, 2]
+        result[:, 0:3, 3] = positions
+        result[:, 3, 3] = 1.0
+        return result
+
+##  Internal
+#   Multiply arrays of (x, y, z, w) quaternions, like Quaternion::__mul__().
+def _multiplyQuaternions(first, second):
+    first_vector = first[:, 0:3]
+    second_vector = second[:, 0:3]
+
+    result = numpy.empty(first.shape, dtype = numpy.float32)
+    result[:, 3] = first[:, 3] * second[:, 3] - numpy.einsum("ij,ij->i", first_vector, second_vector)
+    result[:, 0:3] = first_vector * second[:, 3, None] + second_vector * first[:, 3, None] + numpy.cross(first_vector, second_vector)
+    return result
+
+##  Internal
+#   Rotate an array of vectors by an array of quaternions, like Quaternion::rotate().
+def _rotateVectors(orientations, vectors):
+    orientation_vectors = orientations[:, 0:3]
+    w = orientations[:, 3, None]
+
+    vector_factor = 2.0 * numpy.einsum("ij,ij->i", orientation_vectors, vectors)[:, None]
+    cross_factor = 2.0 * w
+    scale_factor = cross_factor * w - 1.0
+    return scale_factor * vectors + vector_factor * orientation_vectors + cross_factor * numpy.cross(orientation_vectors, vectors)
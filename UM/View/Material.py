@@ -34,7 +34,9 @@ class Material:
     ##  Enable a vertex attribute to be used.
     #
     #   \param name The name of the attribute to enable.
-    #   \param type The type of the attribute. Should be a python type.
+    #   \param type The type of the attribute. One of "int", "float" or "vector" followed by the number of
+    #               components and "f" for floats or "b", "s", "ub" or "us" for normalized signed and
+    #               unsigned 8 and 16-bit integers, for example "vector3f" or "vector4ub".
     #   \param offset The offset into a bound buffer where the data for this attribute starts.
     #   \param stride The stride of the attribute.
     #
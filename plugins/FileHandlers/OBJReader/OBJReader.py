@@ -4,97 +4,243 @@
 
 from UM.Mesh.MeshReader import MeshReader
 from UM.Mesh.MeshData import MeshData
+from UM.Logger import Logger
+
 import os
-import struct
+import re
+
+import numpy
+
+##  Matches a geometric vertex record, capturing its X, Y and Z coordinates.
+_vertex_pattern = re.compile(rb"^v[ \t]+(\S+)[ \t]+(\S+)[ \t]+(\S+)", re.MULTILINE)
+
+##  Matches a vertex normal record, capturing its X, Y and Z components.
+_normal_pattern = re.compile(rb"^vn[ \t]+(\S+)[ \t]+(\S+)[ \t]+(\S+)", re.MULTILINE)
+
+##  Matches a texture coordinate record, capturing its U and (optional) V components.
+_uv_pattern = re.compile(rb"^vt[ \t]+(\S+)(?:[ \t]+(\S+))?", re.MULTILINE)
+
+##  Matches a face record, capturing the list of corners.
+_face_pattern = re.compile(rb"^f[ \t]+([^\r\n]*)", re.MULTILINE)
+
+##  Matches a single face corner (v, v/vt, v//vn or v/vt/vn) that is a whole word, capturing the three indices.
+_corner_pattern = re.compile(rb"(?<!\S)(-?\d+)(?:/(-?\d*))?(?:/(-?\d*))?(?!\S)")
+
+##  Faces whose normals differ by more than this angle, in degrees, keep a hard edge when normals are calculated.
+_crease_angle = 30
+
+##  Amount of bytes read from an OBJ file at once.
+_chunk_size = 16 * 1024 * 1024
 
 class OBJReader(MeshReader):
     def __init__(self):
         super(OBJReader, self).__init__()
         self._supported_extension = ".obj"
-        
-    def read(self, file_name, storage_device):
+
+    ##  Read an OBJ file into an indexed mesh.
+    #
+    #   Records are parsed in bulk per chunk of the file. Polygons are triangulated as fans and
+    #   every unique (position, uv, normal) combination referenced by a face becomes a single
+    #   vertex, so vertices are shared between faces just like they are in the file.
+    #
+    #   When a context is given, the amount of bytes processed is reported to it and reading
+    #   stops between chunks when it is cancelled.
+    def read(self, file_name, storage_device, context = None):
         mesh = None
         extension = os.path.splitext(file_name)[1]
         if extension.lower() == self._supported_extension:
-            vertex_list = []
-            normal_list = []
-            uv_list = []
-            face_list = []
-
-            mesh = MeshData()
-            f = storage_device.openFile(file_name, "rt")
-            for line in f:
-                parts = line.split()
-                if len(parts) < 1:
-                    continue
-                if parts[0] == "v":
-                    vertex_list.append([float(parts[1]), float(parts[3]), -float(parts[2])])
-                if parts[0] == "vn":
-                    normal_list.append([float(parts[1]), float(parts[3]), -float(parts[2])])
-                if parts[0] == "vt":
-                    uv_list.append([float(parts[1]), float(parts[2])])
-                if parts[0] == "f":
-                    parts = [i for i in map(lambda p: p.split("/"), parts)]
-                    for idx in range(1, len(parts)-2):
-                        data = [int(parts[1][0]), int(parts[idx+1][0]), int(parts[idx+2][0])]
-                        if len(parts[1]) > 2:
-                            data += [int(parts[1][2]), int(parts[idx+1][2]), int(parts[idx+2][2])]
-
-                            if parts[1][1] and parts[idx+1][1] and parts[idx+2][1]:
-                                data += [int(parts[1][1]), int(parts[idx+1][1]), int(parts[idx+2][1])]
-                        face_list.append(data)
-            storage_device.closeFile(f)
-
-            mesh.reserveFaceCount(len(face_list))
-            num_vertices = len(vertex_list)
-            num_normals = len(normal_list)
-
-            for face in face_list:
-                # Substract 1 from index, as obj starts counting at 1 instead of 0
-                i = face[0] - 1
-                j = face[1] - 1
-                k = face[2] - 1
-
-                if len(face) > 3:
-                    ni = face[3] - 1
-                    nj = face[4] - 1
-                    nk = face[5] - 1
-                else:
-                    ni = -1
-                    nj = -1
-                    nk = -1
-
-                if len(face) > 6:
-                    ui = face[6] - 1
-                    uj = face[7] - 1
-                    uk = face[8] - 1
-                else:
-                    ui = -1
-                    uj = -1
-                    uk = -1
-
-                #TODO: improve this handling, this can cause weird errors
-                if i < 0 or i >= num_vertices:
-                    i = 0
-                if j < 0 or j >= num_vertices:
-                    j = 0
-                if k < 0 or k >= num_vertices:
-                    k = 0
-                if(ni != -1 and nj != -1 and nk != -1):
-                    mesh.addFaceWithNormals(vertex_list[i][0], vertex_list[i][1], vertex_list[i][2], normal_list[ni][0], normal_list[ni][1], normal_list[ni][2], vertex_list[j][0], vertex_list[j][1], vertex_list[j][2], normal_list[nj][0], normal_list[nj][1], normal_list[nj][2], vertex_list[k][0], vertex_list[k][1], vertex_list[k][2],normal_list[nk][0], normal_list[nk][1], normal_list[nk][2])
-                else:
-                    mesh.addFace(vertex_list[i][0], vertex_list[i][1], vertex_list[i][2], vertex_list[j][0], vertex_list[j][1], vertex_list[j][2], vertex_list[k][0], vertex_list[k][1], vertex_list[k][2])
-
-                if ui != -1:
-                    mesh.setVertexUVCoordinates(mesh.getVertexCount() - 3, uv_list[ui][0], uv_list[ui][1])
-
-                if uj != -1:
-                    mesh.setVertexUVCoordinates(mesh.getVertexCount() - 2, uv_list[uj][0], uv_list[uj][1])
-
-                if uk != -1:
-                    mesh.setVertexUVCoordinates(mesh.getVertexCount() - 1, uv_list[uk][0], uv_list[uk][1])
-
-            if not mesh.hasNormals():
-                mesh.calculateNormals()
+            f = storage_device.openFile(file_name, "rb")
+            try:
+                if context:
+                    f.seek(0, os.SEEK_END)
+                    context.setTotal(f.tell())
+                    f.seek(0, os.SEEK_SET)
+
+                mesh = self._load(f, context)
+            finally:
+                storage_device.closeFile(f)
+
+            Logger.log("d", "Loaded a mesh with %s vertices", mesh.getVertexCount())
 
         return mesh
+
+    # Private
+    ## Parse all records of the file and build the mesh.
+    #
+    # \param f The file handle, opened in binary mode.
+    # \param context The MeshReadContext to report progress to, or None.
+    # \return MeshData
+    def _load(self, f, context):
+        vertex_chunks = []
+        normal_chunks = []
+        uv_chunks = []
+        corner_chunks = []
+        triangle_chunks = []
+
+        # Running totals, needed to resolve relative (negative) indices and to offset the triangles of later chunks.
+        counts = numpy.zeros(3, dtype = numpy.int64) # Number of positions, uvs and normals read so far.
+        num_corners = 0
+
+        remainder = b""
+        while True:
+            chunk = f.read(_chunk_size)
+            if chunk:
+                data = remainder + chunk
+                # Only parse complete lines, the rest is kept for the next chunk.
+                end = data.rfind(b"\n") + 1
+                remainder = data[end:]
+                data = data[:end]
+            else:
+                data = remainder
+
+            vertices = self._parseRecords(_vertex_pattern, data, 3)
+            uvs = self._parseRecords(_uv_pattern, data, 2)
+            normals = self._parseRecords(_normal_pattern, data, 3)
+
+            corners, triangles = self._parseFaces(data, counts)
+            if len(corners):
+                corner_chunks.append(corners)
+                triangle_chunks.append(triangles + num_corners)
+                num_corners += len(corners)
+
+            vertex_chunks.append(vertices)
+            uv_chunks.append(uvs)
+            normal_chunks.append(normals)
+            counts += (len(vertices), len(uvs), len(normals))
+
+            if not chunk:
+                break
+
+            if context:
+                context.setProcessed(f.tell())
+                context.checkCancelled()
+
+        vertex_list = numpy.concatenate(vertex_chunks)
+        uv_list = numpy.concatenate(uv_chunks)
+        normal_list = numpy.concatenate(normal_chunks)
+
+        # Convert from the Z-up coordinate system of OBJ files to our Y-up coordinate system.
+        for records in (vertex_list, normal_list):
+            records[:, [1, 2]] = records[:, [2, 1]]
+            numpy.negative(records[:, 2], out = records[:, 2])
+
+        if not corner_chunks:
+            return MeshData(vertices = vertex_list)
+
+        corners = numpy.concatenate(corner_chunks)
+        triangles = numpy.concatenate(triangle_chunks)
+
+        # Faces that refer to positions that do not exist are dropped, along with the corners only they use.
+        invalid_corners = (corners[:, 0] < 0) | (corners[:, 0] >= len(vertex_list))
+        if numpy.any(invalid_corners):
+            invalid_triangles = numpy.any(invalid_corners[triangles], axis = 1)
+            Logger.log("w", "Dropped %d faces with invalid vertex indices", numpy.count_nonzero(invalid_triangles))
+            triangles = triangles[~invalid_triangles]
+            if len(triangles) == 0:
+                return MeshData(vertices = vertex_list)
+
+            used_corners = numpy.unique(triangles)
+            corners = corners[used_corners]
+            triangles = numpy.searchsorted(used_corners, triangles)
+
+        # Missing or invalid uvs and normals are treated as not specified.
+        corners[(corners[:, 1] < 0) | (corners[:, 1] >= len(uv_list)), 1] = -1
+        corners[(corners[:, 2] < 0) | (corners[:, 2] >= len(normal_list)), 2] = -1
+
+        # Every unique combination of position, uv and normal becomes a single vertex.
+        # Combinations are packed into a single integer key when they fit, as sorting those is much faster.
+        uv_range = len(uv_list) + 1
+        normal_range = len(normal_list) + 1
+        if len(vertex_list) * uv_range * normal_range < 2 ** 62:
+            keys = (corners[:, 0] * uv_range + corners[:, 1] + 1) * normal_range + corners[:, 2] + 1
+            unused, first_corners, corner_vertex = numpy.unique(keys, return_index = True, return_inverse = True)
+            unique_corners = corners[first_corners]
+        else:
+            unique_corners, corner_vertex = numpy.unique(corners, axis = 0, return_inverse = True)
+        indices = corner_vertex.reshape(-1)[triangles].astype(numpy.int32)
+
+        vertices = vertex_list[unique_corners[:, 0]]
+
+        uvs = None
+        if numpy.any(unique_corners[:, 1] >= 0):
+            uvs = numpy.zeros((len(unique_corners), 2), dtype = numpy.float32)
+            has_uv = unique_corners[:, 1] >= 0
+            uvs[has_uv] = uv_list[unique_corners[has_uv, 1]]
+
+        if numpy.all(unique_corners[:, 2] >= 0):
+            return MeshData(vertices = vertices, normals = normal_list[unique_corners[:, 2]], indices = indices, uvs = uvs)
+
+        mesh = MeshData(vertices = vertices, indices = indices, uvs = uvs)
+        mesh.calculateNormals(smooth = True, crease_angle = _crease_angle)
+        return mesh
+
+    # Private
+    ## Extract the components of all records matching a pattern.
+    #
+    # \param pattern The compiled record pattern.
+    # \param data The bytes to search.
+    # \param components The number of components captured by the pattern.
+    # \return A (num_records, components) float32 array. Missing optional components are 0.
+    def _parseRecords(self, pattern, data, components):
+        records = pattern.findall(data)
+        if not records:
+            return numpy.zeros((0, components), dtype = numpy.float32)
+
+        records = numpy.array(records)
+        records[records == b""] = b"0"
+        return records.astype(numpy.float32)
+
+    # Private
+    ## Extract and triangulate the faces in a chunk.
+    #
+    # \param data The bytes to search.
+    # \param counts The number of positions, uvs and normals in all previous chunks.
+    # \return A tuple of a (num_corners, 3) array with zero-based (position, uv, normal) indices per corner,
+    #         where -1 means not specified, and a (num_triangles, 3) array of indices into those corners.
+    def _parseFaces(self, data, counts):
+        # Comments at the end of a face record are not part of it.
+        faces = [(match.start(), match.group(1).split(b"#", 1)[0]) for match in _face_pattern.finditer(data)]
+        matches = []
+        if faces:
+            face_text = b" ".join(face[1] for face in faces)
+            matches = list(_corner_pattern.finditer(face_text))
+        if not matches:
+            return (numpy.zeros((0, 3), dtype = numpy.int64), numpy.zeros((0, 3), dtype = numpy.int64))
+
+        face_positions = numpy.array([face[0] for face in faces], dtype = numpy.int64)
+
+        # The corners of every face are counted from the same matches the corners are read from, so words
+        # that are not valid corners are skipped without moving the corners of other faces.
+        face_lengths = numpy.array([len(face[1]) + 1 for face in faces], dtype = numpy.int64)
+        face_starts = numpy.cumsum(face_lengths) - face_lengths
+        corner_faces = numpy.searchsorted(face_starts, numpy.array([match.start() for match in matches], dtype = numpy.int64), side = "right") - 1
+        corner_counts = numpy.bincount(corner_faces, minlength = len(faces)).astype(numpy.int64)
+
+        corners = numpy.array([match.groups(b"0") for match in matches])
+        corners[corners == b""] = b"0"
+        corners = corners.astype(numpy.int64)
+
+        # OBJ indices start at 1, negative indices are relative to the amount of records read before the face.
+        for column, pattern in enumerate((_vertex_pattern, _uv_pattern, _normal_pattern)):
+            indices = corners[:, column]
+            relative = indices < 0
+            if numpy.any(relative):
+                record_positions = numpy.array([match.start() for match in pattern.finditer(data)], dtype = numpy.int64)
+                records_before_face = counts[column] + numpy.searchsorted(record_positions, face_positions)
+                records_before_corner = numpy.repeat(records_before_face, corner_counts)
+                indices[relative] += records_before_corner[relative] + 1
+            indices -= 1
+
+        # Triangulate every polygon as a fan around its first corner.
+        triangle_counts = numpy.maximum(corner_counts - 2, 0)
+        first_corners = numpy.cumsum(corner_counts) - corner_counts
+        first_triangles = numpy.cumsum(triangle_counts) - triangle_counts
+        triangle_first_corner = numpy.repeat(first_corners, triangle_counts)
+        triangle_number = numpy.arange(triangle_counts.sum()) - numpy.repeat(first_triangles, triangle_counts)
+
+        triangles = numpy.empty((len(triangle_number), 3), dtype = numpy.int64)
+        triangles[:, 0] = triangle_first_corner
+        triangles[:, 1] = triangle_first_corner + triangle_number + 1
+        triangles[:, 2] = triangle_first_corner + triangle_number + 2
+
+        return (corners, triangles)
@@ -4,22 +4,107 @@
 
 from UM.Mesh.MeshWriter import MeshWriter
 import time
-import struct
+import os
+
+import numpy
+
+##  Amount of records formatted and written at once.
+_chunk_size = 65536
 
 class OBJWriter(MeshWriter):
     def __init__(self):
         super(OBJWriter, self).__init__()
         self._supported_extension = ".obj"
-        
+
+    ##  Write the Mesh to file.
+    #
+    #   The vertex, normal, uv and face records are streamed to the file in chunks. Each chunk
+    #   is formatted with a single string formatting operation, so memory use is bounded by the
+    #   chunk size rather than the size of the mesh.
+    #
+    #   \param file_name Location to write to
+    #   \param storage_device Device to write to.
+    #   \param mesh_data MeshData to write.
     def write(self, file_name, storage_device, mesh_data):
-        if(self._supported_extension in file_name):
-            f = storage_device.openFile(file_name, "wb")
-            f.write(("#PLUGGABLE UNICORN OBJ EXPORT. " + time.strftime("%a %d %b %Y %H:%M:%S")).ljust(80, "\000"))
+        extension = os.path.splitext(file_name)[1]
+        if extension.lower() == self._supported_extension and mesh_data is not None and storage_device is not None:
             vertices = mesh_data.getVertices()
-            for vertex in vertices:
-                f.write("v %s %s %s", vertex.getPosition().x,vertex.getPosition().x,vertex.getPosition().x)
-            if mesh_data.hasNormals():
-                f.write("#Normals ")
-                for vertex in vertices:
-                    f.write("nv %s %s %s", vertex.getNormal().x,vertex.getNormal().x,vertex.getNormal().x)
-            storage_device.closeFile(f)
+            if vertices is None:
+                return False
+
+            f = storage_device.openFile(file_name, "wb")
+            try:
+                f.write(("# Uranium OBJWriter " + time.strftime("%a %d %b %Y %H:%M:%S") + "\n").encode("ascii"))
+
+                self._writeVectors(f, "v %f %f %f\n", vertices)
+
+                normals = None
+                if mesh_data.hasNormals():
+                    normals = mesh_data.getNormals()[0:len(vertices)]
+                    self._writeVectors(f, "vn %f %f %f\n", normals)
+
+                uvs = None
+                if mesh_data.hasUVCoordinates():
+                    uvs = mesh_data.getUVCoordinates()
+                    self._writeRecords(f, "vt %f %f\n", uvs)
+
+                if mesh_data.hasIndices():
+                    indices = mesh_data.getIndices()
+                else:
+                    indices = numpy.arange((len(vertices) // 3) * 3).reshape((-1, 3))
+
+                self._writeFaces(f, indices, normals is not None, uvs is not None)
+            finally:
+                storage_device.closeFile(f)
+
+            return True
+        else:
+            return False
+
+    # Private
+    ## Write positions or normals in the coordinate system used by OBJ files.
+    #
+    #   This is the inverse of the Y/Z axis swap done by the OBJ reader.
+    def _writeVectors(self, f, template, vectors):
+        for start in range(0, len(vectors), _chunk_size):
+            chunk = vectors[start:start + _chunk_size]
+            converted = numpy.empty(chunk.shape, dtype = numpy.float64)
+            converted[:, 0] = chunk[:, 0]
+            converted[:, 1] = -chunk[:, 2]
+            converted[:, 2] = chunk[:, 1]
+            self._writeChunk(f, template, converted)
+
+    # Private
+    ## Write a set of records without any conversion.
+    def _writeRecords(self, f, template, records):
+        for start in range(0, len(records), _chunk_size):
+            self._writeChunk(f, template, records[start:start + _chunk_size])
+
+    # Private
+    ## Write the face records.
+    #
+    #   Positions, normals and uvs share the same index, so every corner references the same
+    #   (one-based) index for each of them.
+    def _writeFaces(self, f, indices, has_normals, has_uvs):
+        if has_normals and has_uvs:
+            corner = "%d/%d/%d"
+        elif has_normals:
+            corner = "%d//%d"
+        elif has_uvs:
+            corner = "%d/%d"
+        else:
+            corner = "%d"
+        references = corner.count("%d")
+        template = "f " + " ".join([corner] * 3) + "\n"
+
+        for start in range(0, len(indices), _chunk_size):
+            chunk = indices[start:start + _chunk_size] + 1
+            self._writeChunk(f, template, chunk.repeat(references, axis = 1))
+
+    # Private
+    ## Format all rows of an array with a template and write them in one call.
+    def _writeChunk(self, f, template, rows):
+        if len(rows) == 0:
+            return
+
+        f.write(((template * len(rows)) % tuple(rows.ravel().tolist())).encode("ascii"))
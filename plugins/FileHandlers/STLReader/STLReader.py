@@ -8,90 +8,208 @@ from UM.Logger import Logger
 from UM.Math.Matrix import Matrix
 from UM.Math.Vector import Vector
 
+import io
+import mmap
 import os
+import re
 import struct
 import math
 
+import numpy
+
+##  Layout of a single 50-byte face record in a binary STL file.
+_binary_face_dtype = numpy.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attribute", "<u2")
+])
+
+##  Matches a vertex line of an ascii STL file, capturing its three coordinates.
+_ascii_vertex_pattern = re.compile(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+##  Amount of bytes read from an ascii STL file at once.
+_ascii_chunk_size = 16 * 1024 * 1024
+
+##  Amount of faces converted from a binary STL file at once.
+_binary_chunk_size = 1024 * 1024
+
 class STLReader(MeshReader):
     def __init__(self):
         super(STLReader, self).__init__()
         self._supported_extension = ".stl"
     
     ## Decide if we need to use ascii or binary in order to read file
-    def read(self, file_name, storage_device):
+    #
+    #   When a context is given, the amount of bytes processed is reported to it and reading
+    #   stops between chunks when it is cancelled.
+    def read(self, file_name, storage_device, context = None):
         mesh = None
         extension = os.path.splitext(file_name)[1]
         if extension.lower() == self._supported_extension:
-            mesh = MeshData()
             f = storage_device.openFile(file_name, "rb")
-            if not self._loadBinary(mesh, f):
-                storage_device.closeFile(f)
-                f = storage_device.openFile(file_name, "rt")
-                try:
-                    self._loadAscii(mesh, f)
-                except UnicodeDecodeError:
-                    pass
-                storage_device.closeFile(f)
-
-            storage_device.closeFile(f)
+            try:
+                binary, num_faces, file_size = self._detectFormat(f)
+                if context:
+                    context.setTotal(file_size)
 
-            mesh.calculateNormals()
+                if binary:
+                    mesh = self._loadBinary(f, num_faces, context)
+                else:
+                    mesh = self._loadAscii(f, file_size, context)
+            finally:
+                storage_device.closeFile(f)
 
             Logger.log("d", "Loaded a mesh with %s vertices", mesh.getVertexCount())
         return mesh
 
+    # Private
+    ## Determine whether the file is a binary or an ascii STL file.
+    #
+    #   The decision is made from the header and the file size, so the file only needs to be opened once.
+    #   A binary file has exactly (or, for some exporters, at least) 84 + 50 * face_count bytes. Only when
+    #   that does not hold are files starting with "solid" considered to be ascii.
+    #
+    # \param f The file handle, opened in binary mode.
+    # \return A tuple of (is_binary, face_count, file_size).
+    def _detectFormat(self, f):
+        header = f.read(84)
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        f.seek(0, os.SEEK_SET)
+
+        if len(header) < 84:
+            return (False, 0, file_size)
+
+        num_faces = struct.unpack("<I", header[80:84])[0]
+        expected_size = num_faces * _binary_face_dtype.itemsize + 84
+        if file_size == expected_size:
+            return (True, num_faces, file_size)
+
+        # On ascii files, the num_faces will be big, due to 4 ascii bytes being seen as an unsigned int.
+        if header.lstrip().startswith(b"solid") or num_faces < 1 or num_faces > 1000000000 or file_size < expected_size:
+            return (False, 0, file_size)
+
+        return (True, num_faces, file_size)
+
     # Private
     ## Load the STL data from file by consdering the data as ascii.
-    # \param mesh The MeshData object where the data is written to.
-    # \param f The file handle
-    def _loadAscii(self, mesh, f):
+    #
+    #   The file is read in large chunks in a single pass. The coordinates of all vertex lines in a chunk
+    #   are extracted with one regular expression and converted in bulk into a buffer that grows geometrically.
+    #
+    # \param f The file handle, opened in binary mode.
+    # \param file_size The size of the file in bytes, used to estimate the number of vertices.
+    # \param context The MeshReadContext to report progress to, or None.
+    # \return A MeshData object containing the faces in the file.
+    def _loadAscii(self, f, file_size, context):
+        # An ascii face takes roughly 250 bytes, so this usually avoids growing the buffer at all.
+        capacity = max(file_size // 64, 3)
+        vertices = numpy.empty((capacity, 3), dtype = numpy.float32)
         num_verts = 0
-        for lines in f:
-            for line in lines.split("\r"):
-                if "vertex" in line:
-                    num_verts += 1
 
-        mesh.reserveFaceCount(num_verts / 3)
-        f.seek(0, os.SEEK_SET)
-        vertex = 0
-        face = [None, None, None]
-        for lines in f:
-            for line in lines.split("\r"):
-                if "vertex" in line:
-                    face[vertex] = line.split()[1:]
-                    vertex += 1
-                    if vertex == 3:
-                        mesh.addFace(
-                            float(face[0][0]), float(face[0][2]), -float(face[0][1]),
-                            float(face[1][0]), float(face[1][2]), -float(face[1][1]),
-                            float(face[2][0]), float(face[2][2]), -float(face[2][1])
-                        )
-                        vertex = 0
+        remainder = b""
+        while True:
+            chunk = f.read(_ascii_chunk_size)
+            if chunk:
+                data = remainder + chunk
+                # Only parse complete lines, the rest is kept for the next chunk.
+                end = max(data.rfind(b"\n"), data.rfind(b"\r")) + 1
+                remainder = data[end:]
+                data = data[:end]
+            else:
+                data = remainder
+
+            coordinates = _ascii_vertex_pattern.findall(data)
+            if coordinates:
+                count = len(coordinates)
+                if num_verts + count > capacity:
+                    capacity = max(capacity * 2, num_verts + count)
+                    vertices.resize((capacity, 3), refcheck = False)
+
+                vertices[num_verts:num_verts + count] = numpy.array(coordinates, dtype = numpy.float32)
+                num_verts += count
+
+            if not chunk:
+                break
+
+            if context:
+                context.setProcessed(f.tell())
+                context.checkCancelled()
+
+        num_faces = num_verts // 3
+        vertices.resize((num_faces * 3, 3), refcheck = False)
+
+        # Convert from the Z-up coordinate system of STL files to our Y-up coordinate system.
+        vertices[:, [1, 2]] = vertices[:, [2, 1]]
+        numpy.negative(vertices[:, 2], out = vertices[:, 2])
+
+        return self._createMesh(vertices)
 
     # Private
     ## Load the STL data from file by consdering the data as Binary.
-    # \param mesh The MeshData object where the data is written to.
-    # \param f The file handle
-    def _loadBinary(self, mesh, f):
-        f.read(80) #Skip the header
-        
-        num_faces = struct.unpack("<I", f.read(4))[0]
-        # On ascii files, the num_faces will be big, due to 4 ascii bytes being seen as an unsigned int.
-        if num_faces < 1 or num_faces > 1000000000:
-            return False
-        f.seek(0, os.SEEK_END)
-        file_size = f.tell()
-        f.seek(84, os.SEEK_SET)
-        if file_size < num_faces * 50 + 84:
-            return False
-
-        mesh.reserveFaceCount(num_faces)
-        for idx in range(0, num_faces):
-            data = struct.unpack(b"<ffffffffffffH", f.read(50))
-            mesh.addFace(
-                data[3], data[5], -data[4],
-                data[6], data[8], -data[7],
-                data[9], data[11], -data[10]
-        )
-
-        return True
+    #
+    #   The face records are viewed in place as a structured array, either by memory mapping
+    #   the file or, for streams that can not be mapped, by reading all records in a single call.
+    #   The vertex array is then filled with one vectorized copy per axis, for large chunks of faces at a time.
+    #
+    # \param f The file handle, opened in binary mode.
+    # \param num_faces The number of faces as stored in the header of the file.
+    # \param context The MeshReadContext to report progress to, or None.
+    # \return A MeshData object containing the faces in the file.
+    def _loadBinary(self, f, num_faces, context):
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+            offset = 84
+        except (AttributeError, io.UnsupportedOperation, OSError, ValueError):
+            f.seek(84, os.SEEK_SET)
+            buffer = f.read(num_faces * _binary_face_dtype.itemsize)
+            offset = 0
+
+        vertices = numpy.empty((num_faces * 3, 3), dtype = numpy.float32)
+        records = None
+        try:
+            records = numpy.frombuffer(buffer, dtype = _binary_face_dtype, count = num_faces, offset = offset)["vertices"]
+            faces = vertices.reshape((num_faces, 3, 3))
+
+            for start in range(0, num_faces, _binary_chunk_size):
+                end = min(start + _binary_chunk_size, num_faces)
+
+                # Convert from the Z-up coordinate system of STL files to our Y-up coordinate system.
+                faces[start:end, :, 0] = records[start:end, :, 0]
+                faces[start:end, :, 1] = records[start:end, :, 2]
+                numpy.negative(records[start:end, :, 1], out = faces[start:end, :, 2])
+
+                if context:
+                    context.setProcessed(84 + end * _binary_face_dtype.itemsize)
+                    context.checkCancelled()
+        finally:
+            # The mapping can only be closed when no array refers to it anymore.
+            records = None
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+
+        return self._createMesh(vertices)
+
+    # Private
+    ## Create a mesh from a list of unconnected faces.
+    #
+    # \param vertices A (num_faces * 3, 3) array with three consecutive vertices per face.
+    # \return A MeshData object with face normals and indices for the vertices.
+    def _createMesh(self, vertices):
+        num_faces = len(vertices) // 3
+        normals = self._calculateFaceNormals(vertices)
+        indices = numpy.arange(num_faces * 3, dtype = numpy.int32).reshape((num_faces, 3))
+
+        return MeshData(vertices = vertices, normals = normals, indices = indices)
+
+    # Private
+    ## Calculate per-vertex normals for a list of unconnected faces.
+    #
+    # \param vertices A (num_faces * 3, 3) array with three consecutive vertices per face.
+    # \return A (num_faces * 3, 3) array with the normal of each face repeated for its three vertices.
+    def _calculateFaceNormals(self, vertices):
+        normals = numpy.cross(vertices[1::3] - vertices[::3], vertices[2::3] - vertices[::3])
+        lengths = numpy.linalg.norm(normals, axis = 1)
+        lengths[lengths == 0] = 1.0 # Degenerate faces get a zero normal instead of NaN.
+        normals /= lengths[:, numpy.newaxis]
+        return normals.repeat(3, axis = 0)
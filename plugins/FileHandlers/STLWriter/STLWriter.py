@@ -3,48 +3,131 @@
 # Uranium is released under the terms of the AGPLv3 or higher.
 
 from UM.Mesh.MeshWriter import MeshWriter
+from UM.Preferences import Preferences
+
 import time
 import struct
 import os
 
+import numpy
+
+##  Layout of a single 50-byte face record in a binary STL file.
+_binary_face_dtype = numpy.dtype([
+    ("normal", "<f4", (3,)),
+    ("vertices", "<f4", (3, 3)),
+    ("attribute", "<u2")
+])
+
+##  Text of a single face in an ascii STL file, to be filled with the normal and three vertices.
+_ascii_face_template = (
+    "facet normal %e %e %e\n"
+    "  outer loop\n"
+    "    vertex %e %e %e\n"
+    "    vertex %e %e %e\n"
+    "    vertex %e %e %e\n"
+    "  endloop\n"
+    "endfacet\n"
+)
+
+##  Amount of faces formatted at once when writing ascii STL files.
+_ascii_chunk_size = 10000
+
 class STLWriter(MeshWriter):
     def __init__(self):
         super(STLWriter, self).__init__()
         self._supported_extension = ".stl"
-        
+
+        Preferences.getInstance().addPreference("stl_writer/output_mode", "binary")
+
     #TODO: Only a single mesh can be saved to a single file, we might want to save multiple meshes to a single file
     ##  Write the Mesh to file.
+    #
+    #   Depending on the "stl_writer/output_mode" preference the file is written as binary (the default)
+    #   or as ascii STL.
+    #
     #   \param file_name Location to write to
     #   \param storage_device Device to write to.
     #   \param mesh_data MeshData to write.
     def write(self, file_name, storage_device, mesh_data):
         extension = os.path.splitext(file_name)[1]
         if extension.lower() == self._supported_extension and mesh_data is not None and storage_device is not None:
+            faces = self._getFaces(mesh_data)
+            normals = self._calculateFaceNormals(faces)
+
             f = storage_device.openFile(file_name, "wb")
-            f.write(bytes(("Uranium STLWriter " + time.strftime("%a %d %b %Y %H:%M:%S")).ljust(80, "\000"),"utf-8"))
-            if mesh_data.getIndices() is not None:
-                num_faces = len(mesh_data.getIndices())
-                f.write(struct.pack("<I", int(num_faces))) #Write number of faces to STL
-                verts = mesh_data.getVertices()
-                for face in mesh_data.getIndices():
-                    v1 = verts[face[0]]
-                    v2 = verts[face[1]]
-                    v3 = verts[face[2]]
-                    f.write(struct.pack("<fff", 0.0, 0.0, 0.0))
-                    f.write(struct.pack("<fff", v1[0], v1[1], v1[2]))
-                    f.write(struct.pack("<fff", v2[0], v2[1], v2[2]))
-                    f.write(struct.pack("<fff", v3[0], v3[1], v3[2]))
-                    f.write(struct.pack("<H", 0))
-                """for index in range(0, num_indices-1, 1):
-                    v1 = verts[index]
-                    v2 = verts[index + 1]
-                    v3 = verts[index + 2]
-                    f.write(struct.pack("<fff", 0.0, 0.0, 0.0))
-                    f.write(struct.pack("<fff", v1[0], v1[1], v1[2]))
-                    f.write(struct.pack("<fff", v2[0], v2[1], v2[2]))
-                    f.write(struct.pack("<fff", v3[0], v3[1], v3[2]))
-                    f.write(struct.pack("<H", 0))"""
+            try:
+                if Preferences.getInstance().getValue("stl_writer/output_mode") == "ascii":
+                    self._writeAscii(f, faces, normals)
+                else:
+                    self._writeBinary(f, faces, normals)
+            finally:
                 storage_device.closeFile(f)
-                return True
+            return True
         else:
             return False
+
+    # Private
+    ## Get the vertices of all faces in the coordinate system used by STL files.
+    #
+    # \param mesh_data MeshData to get the faces of. Can be indexed or have three consecutive vertices per face.
+    # \return A (num_faces, 3, 3) float32 array with the three vertices of every face.
+    def _getFaces(self, mesh_data):
+        vertices = mesh_data.getVertices()
+        if vertices is None:
+            return numpy.zeros((0, 3, 3), dtype = numpy.float32)
+
+        if mesh_data.hasIndices():
+            indices = mesh_data.getIndices()
+        else:
+            num_faces = len(vertices) // 3
+            indices = numpy.arange(num_faces * 3).reshape((num_faces, 3))
+
+        # Convert from our Y-up coordinate system to the Z-up coordinate system of STL files.
+        # This is the inverse of the conversion done by the STL reader.
+        faces = numpy.empty((len(indices), 3, 3), dtype = numpy.float32)
+        for corner in range(3):
+            corner_vertices = vertices[indices[:, corner]]
+            faces[:, corner, 0] = corner_vertices[:, 0]
+            faces[:, corner, 1] = -corner_vertices[:, 2]
+            faces[:, corner, 2] = corner_vertices[:, 1]
+
+        return faces
+
+    # Private
+    ## Calculate the unit normal of each face.
+    #
+    # \param faces A (num_faces, 3, 3) array of face vertices.
+    # \return A (num_faces, 3) array of normals. Degenerate faces get a zero normal.
+    def _calculateFaceNormals(self, faces):
+        normals = numpy.cross(faces[:, 1] - faces[:, 0], faces[:, 2] - faces[:, 0])
+        lengths = numpy.linalg.norm(normals, axis = 1)
+        lengths[lengths == 0] = 1.0
+        normals /= lengths[:, numpy.newaxis]
+        return normals
+
+    # Private
+    ## Write the faces as a binary STL file.
+    #
+    #   All face records are assembled in a single structured array and written at once.
+    def _writeBinary(self, f, faces, normals):
+        records = numpy.zeros(len(faces), dtype = _binary_face_dtype)
+        records["normal"] = normals
+        records["vertices"] = faces
+
+        f.write(bytes(("Uranium STLWriter " + time.strftime("%a %d %b %Y %H:%M:%S")).ljust(80, "\000"), "utf-8"))
+        f.write(struct.pack("<I", len(faces))) #Write number of faces to STL
+        f.write(records.data)
+
+    # Private
+    ## Write the faces as an ascii STL file.
+    #
+    #   Faces are formatted in large chunks with a single string formatting operation per chunk.
+    def _writeAscii(self, f, faces, normals):
+        f.write(b"solid Uranium STLWriter\n")
+
+        for start in range(0, len(faces), _ascii_chunk_size):
+            end = min(start + _ascii_chunk_size, len(faces))
+            values = numpy.hstack((normals[start:end], faces[start:end].reshape((-1, 9))))
+            f.write(((_ascii_face_template * (end - start)) % tuple(values.ravel().tolist())).encode("ascii"))
+
+        f.write(b"endsolid Uranium STLWriter\n")
@@ -17,6 +17,8 @@ from UM.Scene.ToolHandle import ToolHandle
 
 from . import MirrorToolHandle
 
+from copy import deepcopy
+
 class MirrorTool(Tool):
     def __init__(self):
         super().__init__()
@@ -44,7 +46,7 @@ class MirrorTool(Tool):
                 op = None
                 if Selection.getCount() == 1:
                     node = Selection.getSelectedObject(0)
-                    scale = node.getScale()
+                    scale = deepcopy(node.getScale())
                     if self.getLockedAxis() == ToolHandle.XAxis:
                         scale.setX(-scale.x)
                     elif self.getLockedAxis() == ToolHandle.YAxis:
@@ -57,7 +59,7 @@ class MirrorTool(Tool):
                     op = GroupedOperation()
 
                     for node in Selection.getAllSelectedObjects():
-                        scale = node.getScale()
+                        scale = deepcopy(node.getScale())
                         if self.getLockedAxis() == ToolHandle.XAxis:
                             scale.setX(-scale.x)
                         elif self.getLockedAxis() == ToolHandle.YAxis:
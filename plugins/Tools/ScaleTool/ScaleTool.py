@@ -16,6 +16,8 @@ from UM.Operations.ScaleToBoundsOperation import ScaleToBoundsOperation
 
 from . import ScaleToolHandle
 
+from copy import deepcopy
+
 class ScaleTool(Tool):
     def __init__(self):
         super().__init__()
@@ -195,7 +197,7 @@ class ScaleTool(Tool):
 
     def setObjectWidth(self, width):
         obj = Selection.getSelectedObject(0)
-        obj_scale = obj.getScale()
+        obj_scale = deepcopy(obj.getScale())
         obj_width = obj.getBoundingBox().width / obj_scale.x
         target_scale = float(width) / obj_width
         if obj_scale.x != target_scale:
@@ -208,7 +210,7 @@ class ScaleTool(Tool):
 
     def setObjectHeight(self, height):
         obj = Selection.getSelectedObject(0)
-        obj_scale = obj.getScale()
+        obj_scale = deepcopy(obj.getScale())
         obj_height = obj.getBoundingBox().height / obj_scale.y
         target_scale = float(height) / obj_height
         if obj_scale.y != target_scale:
@@ -221,7 +223,7 @@ class ScaleTool(Tool):
 
     def setObjectDepth(self, depth):
         obj = Selection.getSelectedObject(0)
-        obj_scale = obj.getScale()
+        obj_scale = deepcopy(obj.getScale())
         obj_depth = obj.getBoundingBox().depth / obj_scale.z
         target_scale = float(depth) / obj_depth
         if obj_scale.z != target_scale:
@@ -234,7 +236,7 @@ class ScaleTool(Tool):
 
     def setScaleX(self, scale):
         obj = Selection.getSelectedObject(0)
-        obj_scale = obj.getScale()
+        obj_scale = deepcopy(obj.getScale())
         if obj_scale.x != scale:
             obj_scale.setX(scale)
             if not self._non_uniform_scale:
@@ -245,7 +247,7 @@ class ScaleTool(Tool):
 
     def setScaleY(self, scale):
         obj = Selection.getSelectedObject(0)
-        obj_scale = obj.getScale()
+        obj_scale = deepcopy(obj.getScale())
         if obj_scale.y != scale:
             obj_scale.setY(scale)
             if not self._non_uniform_scale:
@@ -256,7 +258,7 @@ class ScaleTool(Tool):
 
     def setScaleZ(self, scale):
         obj = Selection.getSelectedObject(0)
-        obj_scale = obj.getScale()
+        obj_scale = deepcopy(obj.getScale())
         if obj_scale.z != scale:
             obj_scale.setZ(scale)
             if not self._non_uniform_scale:
@@ -36,26 +36,17 @@ class SelectionTool(Tool):
         return False
 
     def _boundingBoxSelection(self, event):
-        root = self._scene.getRoot()
-
         ray = self._scene.getActiveCamera().getRay(event.x, event.y)
 
-        intersections = []
-        for node in BreadthFirstIterator(root):
-            if node.getSelectionMask() == self._selectionMask and not node.isLocked():
-                intersection = node.getBoundingBox().intersectsRay(ray)
-                if intersection:
-                    intersections.append((node, intersection[0], intersection[1]))
-
-        if intersections:
-            intersections.sort(key=lambda k: k[1])
+        # The hits are sorted by distance, so the first selectable node is the closest one.
+        for node, distance in self._scene.getBoundingVolumeHierarchy().intersectRay(ray):
+            if node.isSelectable():
+                if not Selection.isSelected(node):
+                    Selection.clear()
+                    Selection.add(node)
+                return
 
-            node = intersections[0][0]
-            if not Selection.isSelected(node):
-                Selection.clear()
-                Selection.add(node)
-        else:
-            Selection.clear()
+        Selection.clear()
 
     def _pixelSelection(self, event):
         pixel_id = self._renderer.getIdAtCoordinate(event.x, event.y)
@@ -0,0 +1,87 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "plugins", "FileHandlers"))
+from OBJReader.OBJReader import OBJReader
+
+class _LocalFileDevice:
+    def openFile(self, file_name, mode):
+        return open(file_name, mode)
+
+    def closeFile(self, file):
+        file.close()
+
+_cube = "".join("v {0} {1} {2}\n".format(x, y, z) for x in (0, 1) for y in (0, 1) for z in (0, 1)) + """
+f 1 3 4 2
+f 5 6 8 7
+f 1 2 6 5
+f 3 7 8 4
+f 1 5 7 3
+f 2 4 8 6
+"""
+
+class TestOBJReader(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._reader = OBJReader()
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    def _read(self, text):
+        file_name = os.path.join(self._directory, "mesh.obj")
+        with open(file_name, "w") as f:
+            f.write(text)
+        return self._reader.read(file_name, _LocalFileDevice())
+
+    # Get the positions of the corners of every face, in the Z-up coordinates of the file.
+    def _getFaces(self, mesh):
+        faces = mesh.getVertices()[mesh.getIndices()]
+        return numpy.stack((faces[:, :, 0], -faces[:, :, 2], faces[:, :, 1]), axis = 2).tolist()
+
+    def test_polygons(self):
+        mesh = self._read("v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nv 0 2 0\nf 1 2 3 4 5\nf 1 2 3\n")
+        self.assertEqual(4, mesh.getFaceCount())
+        self.assertEqual([[0, 0, 0], [1, 0, 0], [1, 1, 0]], self._getFaces(mesh)[0])
+        self.assertEqual([[0, 0, 0], [0, 1, 0], [0, 2, 0]], self._getFaces(mesh)[2])
+
+    def test_negativeIndices(self):
+        mesh = self._read("v 0 0 0\nv 1 0 0\nv 1 1 0\nf -3 -2 -1\nv 0 1 0\nf 1 -2 -1\n")
+        self.assertEqual([[[0, 0, 0], [1, 0, 0], [1, 1, 0]], [[0, 0, 0], [1, 1, 0], [0, 1, 0]]], self._getFaces(mesh))
+
+    def test_invalidIndices(self):
+        # Faces using vertices that do not exist are dropped, the other faces are kept.
+        mesh = self._read("v 0 0 0\nv 1 0 0\nv 1 1 0\nf 1 2 4\nf 0 1 2\nf 1 2 -4\nf 1 2 3\n")
+        self.assertEqual([[[0, 0, 0], [1, 0, 0], [1, 1, 0]]], self._getFaces(mesh))
+        self.assertEqual(3, mesh.getVertexCount())
+
+    def test_comments(self):
+        mesh = self._read("# v 5 5 5\nv 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nf 1 2 3 # first\nf 1 3 4 #12 13\n# f 1 2 4\n")
+        self.assertEqual([[[0, 0, 0], [1, 0, 0], [1, 1, 0]], [[0, 0, 0], [1, 1, 0], [0, 1, 0]]], self._getFaces(mesh))
+
+    def test_corners(self):
+        mesh = self._read("v 0 0 0\nv 1 0 0\nv 0 1 0\nvt 0 0\nvt 1 0\nvt 0 1\nvn 0 0 -1\nf 1/1/1 2/2/1 3/3/1\n")
+        self.assertEqual([[[0, 0, 0], [1, 0, 0], [0, 1, 0]]], self._getFaces(mesh))
+        numpy.testing.assert_array_equal(numpy.array([[0, -1, 0]] * 3), mesh.getNormals())
+        numpy.testing.assert_array_equal(numpy.array([[0, 0], [1, 0], [0, 1]]), mesh.getUVCoordinates())
+
+        mesh = self._read("v 0 0 0\nv 1 0 0\nv 0 1 0\nvn 0 0 -1\nf 1//1 2//1 3//1\n")
+        numpy.testing.assert_array_equal(numpy.array([[0, -1, 0]] * 3), mesh.getNormals())
+
+    def test_calculatedNormalsKeepEdges(self):
+        # The edges of a cube without normals stay hard, every side gets its own vertices.
+        mesh = self._read(_cube)
+        self.assertEqual(12, mesh.getFaceCount())
+        self.assertEqual(24, mesh.getVertexCount())
+        normals = numpy.abs(mesh.getNormals()[0:mesh.getVertexCount()])
+        numpy.testing.assert_array_almost_equal(numpy.ones(24), normals.max(axis = 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Mesh.MeshData import MeshData
+from UM.Mesh.MeshReadContext import MeshReadContext, MeshReadCancelledError
+from UM.Preferences import Preferences
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "plugins", "FileHandlers"))
+from STLReader.STLReader import STLReader
+from STLWriter.STLWriter import STLWriter
+
+class _LocalFileDevice:
+    def openFile(self, file_name, mode):
+        return open(file_name, mode)
+
+    def closeFile(self, file):
+        file.close()
+
+class TestSTLReader(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._reader = STLReader()
+        self._writer = STLWriter()
+        self._output_mode = Preferences.getInstance().getValue("stl_writer/output_mode")
+
+        random = numpy.random.RandomState(1)
+        vertices = random.uniform(-50, 50, (300, 3)).astype(numpy.float32)
+        indices = numpy.stack([random.permutation(300)[0:200] for corner in range(3)], axis = 1)
+        indices = indices[(indices[:, 0] != indices[:, 1]) & (indices[:, 1] != indices[:, 2]) & (indices[:, 0] != indices[:, 2])][0:150]
+        self._mesh = MeshData(vertices = vertices, indices = indices.astype(numpy.int32))
+
+    def tearDown(self):
+        Preferences.getInstance().setValue("stl_writer/output_mode", self._output_mode)
+        shutil.rmtree(self._directory)
+
+    def _roundTrip(self, output_mode):
+        Preferences.getInstance().setValue("stl_writer/output_mode", output_mode)
+        file_name = os.path.join(self._directory, "mesh.stl")
+        self.assertTrue(self._writer.write(file_name, _LocalFileDevice(), self._mesh))
+        return file_name, self._reader.read(file_name, _LocalFileDevice())
+
+    def _getFaces(self, mesh):
+        return mesh.getVertices()[mesh.getIndices()]
+
+    def test_roundTripBinary(self):
+        file_name, mesh = self._roundTrip("binary")
+        self.assertEqual(84 + 50 * 150, os.path.getsize(file_name))
+        self.assertEqual(150, mesh.getFaceCount())
+        numpy.testing.assert_array_equal(self._getFaces(self._mesh), self._getFaces(mesh))
+
+    def test_roundTripAscii(self):
+        file_name, mesh = self._roundTrip("ascii")
+        with open(file_name, "rb") as f:
+            self.assertEqual(b"solid", f.read(5))
+        self.assertEqual(150, mesh.getFaceCount())
+        numpy.testing.assert_allclose(self._getFaces(self._mesh), self._getFaces(mesh), rtol = 1e-5, atol = 1e-5)
+
+    def test_normals(self):
+        file_name, mesh = self._roundTrip("binary")
+        faces = self._getFaces(mesh)
+        normals = numpy.cross(faces[:, 1] - faces[:, 0], faces[:, 2] - faces[:, 0])
+        normals /= numpy.linalg.norm(normals, axis = 1)[:, numpy.newaxis]
+        for corner in range(3):
+            numpy.testing.assert_allclose(normals, mesh.getNormals()[mesh.getIndices()[:, corner]], atol = 1e-4)
+
+    def test_cancel(self):
+        file_name, mesh = self._roundTrip("binary")
+
+        context = MeshReadContext()
+        self.assertIsNotNone(self._reader.read(file_name, _LocalFileDevice(), context = context))
+        self.assertEqual(100, context.getProgress())
+
+        context.cancel()
+        with self.assertRaises(MeshReadCancelledError):
+            self._reader.read(file_name, _LocalFileDevice(), context = context)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Mesh.MeshData import MeshData
+from UM.Mesh.LevelOfDetailJob import LevelOfDetailJob
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
+
+import unittest
+import numpy
+
+# A mesh that is moved by another thread right after a job read its extents.
+class _ChangingMesh(MeshData):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._changed = False
+
+    def getExtents(self, matrix = None):
+        extents = super().getExtents(matrix)
+        if not self._changed:
+            self._changed = True
+            translation = Matrix()
+            translation.setByTranslation(Vector(100, 0, 0))
+            self.transform(translation)
+        return extents
+
+class TestLevelOfDetailJob(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    # A 100 by 100 grid of squares in the XZ plane with random heights, 20000 faces.
+    def _createGrid(self, mesh_type = MeshData):
+        random = numpy.random.RandomState(1)
+        x, z = numpy.meshgrid(numpy.arange(101), numpy.arange(101), indexing = "ij")
+        vertices = numpy.stack((x.ravel(), random.uniform(0, 0.1, x.size), z.ravel()), axis = 1).astype(numpy.float32)
+        corners = (x[:-1, :-1] * 101 + z[:-1, :-1]).ravel()
+        indices = numpy.concatenate((
+            numpy.stack((corners, corners + 1, corners + 102), axis = 1),
+            numpy.stack((corners, corners + 102, corners + 101), axis = 1)
+        )).astype(numpy.int32)
+        return mesh_type(vertices = vertices, indices = indices)
+
+    def test_run(self):
+        mesh = self._createGrid()
+        job = LevelOfDetailJob(mesh)
+        job.run()
+
+        levels = job.getResult()
+        self.assertTrue(levels)
+        self.assertIs(mesh.getLevelsOfDetail(), levels)
+        for error, level in levels:
+            self.assertLess(level.getFaceCount(), mesh.getFaceCount())
+
+    def test_runDropsStaleLevels(self):
+        mesh = self._createGrid(_ChangingMesh)
+        job = LevelOfDetailJob(mesh)
+        job.run()
+        self.assertIsNone(job.getResult())
+        self.assertIsNone(mesh.getLevelsOfDetail())
+
+        # The next job sees the moved mesh.
+        job = LevelOfDetailJob(mesh)
+        job.run()
+        self.assertIs(mesh.getLevelsOfDetail(), job.getResult())
+        self.assertGreaterEqual(job.getResult()[0][1].getExtents().minimum.x, 99)
+
+if __name__ == "__main__":
+    unittest.main()
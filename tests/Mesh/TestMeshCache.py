@@ -0,0 +1,97 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Mesh.MeshCache import MeshCache
+from UM.Mesh.MeshData import MeshData
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import numpy
+
+class TestMeshCache(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._cache_directory = os.path.join(self._directory, "cache")
+        self._cache = MeshCache(self._cache_directory, 1024 * 1024)
+
+        self._file_names = []
+        for i in range(3):
+            file_name = os.path.join(self._directory, "mesh{0}.stl".format(i))
+            with open(file_name, "wb") as f:
+                f.write(b"mesh")
+            self._file_names.append(file_name)
+
+        vertices = numpy.arange(30, dtype = numpy.float32).reshape((10, 3))
+        self._mesh = MeshData(vertices = vertices, normals = numpy.ones((10, 3), dtype = numpy.float32), indices = numpy.array([[0, 1, 2], [3, 4, 5]], dtype = numpy.int32))
+
+    def tearDown(self):
+        shutil.rmtree(self._directory)
+
+    # Set the modification time of a file to a number of seconds ago.
+    def _setAge(self, path, age):
+        modification_time = time.time() - age
+        os.utime(path, (modification_time, modification_time))
+
+    def test_hit(self):
+        self.assertIsNone(self._cache.get(self._file_names[0], "reader"))
+        self._cache.put(self._file_names[0], "reader", self._mesh)
+
+        mesh = self._cache.get(self._file_names[0], "reader")
+        self.assertIsNotNone(mesh)
+        self.assertIsInstance(mesh.getVertices(), numpy.memmap)
+        numpy.testing.assert_array_equal(self._mesh.getVertices(), mesh.getVertices())
+        numpy.testing.assert_array_equal(self._mesh.getNormals(), mesh.getNormals())
+        numpy.testing.assert_array_equal(self._mesh.getIndices(), mesh.getIndices())
+
+    def test_missAfterChange(self):
+        self._cache.put(self._file_names[0], "reader", self._mesh)
+
+        # Another reader or version of the reader does not get the entry.
+        self.assertIsNone(self._cache.get(self._file_names[0], "reader/2"))
+
+        self._setAge(self._file_names[0], 100)
+        self.assertIsNone(self._cache.get(self._file_names[0], "reader"))
+
+    def test_trim(self):
+        for file_name in self._file_names:
+            self._cache.put(file_name, "reader", self._mesh)
+        paths = [self._cache.getEntryPath(file_name, "reader") for file_name in self._file_names]
+        for age, path in zip((30, 20, 10), paths):
+            self._setAge(path, age)
+
+        # Getting an entry marks it as recently used, so the second entry is the least recently used one.
+        self.assertIsNotNone(self._cache.get(self._file_names[0], "reader"))
+        self._cache.setMaximumSize(os.path.getsize(paths[0]) * 2)
+        self._cache.trim()
+
+        self.assertIsNotNone(self._cache.get(self._file_names[0], "reader"))
+        self.assertIsNone(self._cache.get(self._file_names[1], "reader"))
+        self.assertIsNotNone(self._cache.get(self._file_names[2], "reader"))
+
+    def test_corruptEntry(self):
+        self._cache.put(self._file_names[0], "reader", self._mesh)
+        path = self._cache.getEntryPath(self._file_names[0], "reader")
+        with open(path, "wb") as f:
+            f.write(b"not a mesh")
+
+        self.assertIsNone(self._cache.get(self._file_names[0], "reader"))
+        self.assertFalse(os.path.exists(path))
+
+    def test_removeStaleTemporaryFiles(self):
+        os.makedirs(self._cache_directory)
+        stale = os.path.join(self._cache_directory, "stale.tmp")
+        recent = os.path.join(self._cache_directory, "recent.tmp")
+        for path in (stale, recent):
+            with open(path, "wb") as f:
+                f.write(b"mesh")
+        self._setAge(stale, 3600)
+
+        self._cache.trim()
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.exists(recent))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,420 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Mesh.MeshData import MeshData
+import UM.Mesh.MeshData as MeshDataModule
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
+from UM.Math.Color import Color
+
+import unittest
+import numpy
+
+class TestMeshData(unittest.TestCase):
+    def setUp(self):
+        # Called before the first testfunction is executed
+        pass
+
+    def tearDown(self):
+        # Called after the last testfunction was executed
+        pass
+
+    def _createQuad(self, offset = 0.0):
+        # Two unconnected triangles forming a square in the XZ plane, as read from an STL file.
+        vertices = numpy.array([
+            [0, 0, 0], [1, 0, 0], [1, 0, 1],
+            [0, 0, 0], [1, 0, 1 + offset], [0, 0, 1]
+        ], dtype = numpy.float32)
+        normals = numpy.array([[0, 1, 0]] * 6, dtype = numpy.float32)
+        return MeshData(vertices = vertices, normals = normals)
+
+    def test_weld(self):
+        mesh = self._createQuad()
+        mesh.weld()
+
+        self.assertEqual(4, mesh.getVertexCount())
+        self.assertEqual(2, mesh.getFaceCount())
+        numpy.testing.assert_array_equal(numpy.array([[0, 1, 2], [0, 2, 3]]), mesh.getIndices())
+        numpy.testing.assert_array_almost_equal(numpy.array([[0, 1, 0]] * 4), mesh.getNormals())
+
+    def test_weldTolerance(self):
+        mesh = self._createQuad(0.0001)
+        mesh.weld()
+        self.assertEqual(5, mesh.getVertexCount())
+
+        mesh = self._createQuad(0.0001)
+        mesh.weld(0.001)
+        self.assertEqual(4, mesh.getVertexCount())
+
+    def test_weldToleranceAcrossCells(self):
+        # Vertices within the tolerance are merged even when they are on different sides of a multiple of the tolerance.
+        mesh = self._createQuad(0.0002)
+        vertices = mesh.getVertices().copy()
+        vertices[:, 2] += 0.0004
+        mesh = MeshData(vertices = vertices)
+        mesh.weld(0.001)
+        self.assertEqual(4, mesh.getVertexCount())
+
+        mesh = self._createQuad(0.002)
+        mesh.weld(0.001)
+        self.assertEqual(5, mesh.getVertexCount())
+
+    def test_weldKeepsUVSeams(self):
+        mesh = self._createQuad()
+        uvs = numpy.zeros((6, 2), dtype = numpy.float32)
+        uvs[3:, 0] = 1.0
+        mesh = MeshData(vertices = mesh.getVertices(), normals = mesh.getNormals(), uvs = uvs)
+        mesh.weld()
+
+        self.assertEqual(6, mesh.getVertexCount())
+
+    def test_weldRemovesCollapsedFaces(self):
+        vertices = numpy.array([[0, 0, 0], [1, 0, 0], [1, 0, 1], [0, 0, 0], [0.0001, 0, 0], [0, 0, 1]], dtype = numpy.float32)
+        mesh = MeshData(vertices = vertices)
+        mesh.weld(0.001)
+
+        self.assertEqual(1, mesh.getFaceCount())
+        self.assertEqual(3, mesh.getVertexCount())
+
+    def _createCube(self):
+        vertices = numpy.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype = numpy.float32)
+        indices = numpy.array([
+            [0, 1, 3], [0, 3, 2], [4, 6, 7], [4, 7, 5], [0, 4, 5], [0, 5, 1],
+            [2, 3, 7], [2, 7, 6], [0, 2, 6], [0, 6, 4], [1, 5, 7], [1, 7, 3]
+        ], dtype = numpy.int32)
+        return MeshData(vertices = vertices, indices = indices)
+
+    def test_calculateNormals(self):
+        mesh = self._createCube()
+        mesh.calculateNormals()
+
+        self.assertEqual(8, mesh.getVertexCount())
+        numpy.testing.assert_array_almost_equal(numpy.ones(8), numpy.linalg.norm(mesh.getNormals(), axis = 1))
+
+        mesh = self._createQuad()
+        mesh.calculateNormals()
+        numpy.testing.assert_array_almost_equal(numpy.array([[0, -1, 0]] * 6), mesh.getNormals())
+
+    def test_calculateSmoothNormals(self):
+        corner = -numpy.ones(3) / numpy.sqrt(3)
+        for weighting in ("area", "angle"):
+            mesh = self._createCube()
+            mesh.calculateNormals(smooth = True, weighting = weighting)
+
+            self.assertEqual(8, mesh.getVertexCount())
+            numpy.testing.assert_array_almost_equal(corner, mesh.getNormals()[0])
+
+    def test_calculateCreasedNormals(self):
+        mesh = self._createCube()
+        mesh.calculateNormals(smooth = True, crease_angle = 30)
+
+        # Every corner of the cube is split into one vertex per side.
+        self.assertEqual(24, mesh.getVertexCount())
+        self.assertEqual(12, mesh.getFaceCount())
+
+        faces = mesh.getVertices()[mesh.getIndices()]
+        face_normals = numpy.cross(faces[:, 1] - faces[:, 0], faces[:, 2] - faces[:, 0])
+        for corner in range(3):
+            numpy.testing.assert_array_almost_equal(face_normals, mesh.getNormals()[mesh.getIndices()[:, corner]])
+
+        mesh = self._createCube()
+        mesh.calculateNormals(smooth = True, crease_angle = 100)
+        self.assertEqual(8, mesh.getVertexCount())
+
+    def test_calculateCreasedNormalsInChunks(self):
+        # A cone around a vertex used by 1000 faces, with alternating heights so neighbouring faces crease.
+        angles = numpy.linspace(0, 2 * numpy.pi, 1000, endpoint = False)
+        heights = numpy.where(numpy.arange(1000) % 2, 0, 0.05)
+        vertices = numpy.vstack(([[0, 1, 0]], numpy.stack((numpy.cos(angles), heights, numpy.sin(angles)), axis = 1))).astype(numpy.float32)
+        indices = numpy.stack((numpy.zeros(1000), 1 + numpy.arange(1000), 1 + (numpy.arange(1000) + 1) % 1000), axis = 1).astype(numpy.int32)
+
+        results = []
+        for chunk_size in (MeshDataModule._crease_chunk_size, 1, 777):
+            chunk_size, MeshDataModule._crease_chunk_size = MeshDataModule._crease_chunk_size, chunk_size
+            try:
+                mesh = MeshData(vertices = vertices.copy(), indices = indices.copy())
+                mesh.calculateNormals(smooth = True, crease_angle = 30)
+            finally:
+                MeshDataModule._crease_chunk_size = chunk_size
+            results.append((mesh.getVertices().copy(), mesh.getNormals()[0:mesh.getVertexCount()].copy(), mesh.getIndices().copy()))
+
+        for result in results[1:]:
+            for expected, array in zip(results[0], result):
+                numpy.testing.assert_array_equal(expected, array)
+
+    def test_addVertices(self):
+        mesh = MeshData()
+        for i in range(100):
+            mesh.addVertices(numpy.full((10, 3), i, dtype = numpy.float32))
+        mesh.addVertices(numpy.zeros((5, 3), dtype = numpy.float32), colors = numpy.ones((5, 4), dtype = numpy.float32))
+
+        self.assertEqual(1005, mesh.getVertexCount())
+        self.assertEqual(99, mesh.getVertices()[999, 0])
+        self.assertEqual((1005, 4), mesh.getColors().shape)
+        self.assertEqual(0, mesh.getColors()[999, 0])
+        self.assertEqual(1, mesh.getColors()[1004, 0])
+        self.assertFalse(mesh.hasNormals())
+
+    def test_addVerticesConverts(self):
+        source = numpy.array([[1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype = numpy.float64)
+        mesh = MeshData()
+        mesh.addVertices(source)
+        mesh.addVertices([[2, 2, 2]])
+        mesh.addIndices([[0, 1, 2]])
+
+        self.assertEqual(numpy.float32, mesh.getVertices().dtype)
+        self.assertEqual(numpy.int32, mesh.getIndices().dtype)
+        self.assertEqual(2, mesh.getExtents().maximum.x)
+
+        # Converted data is copied, so the source does not change with the mesh.
+        matrix = Matrix()
+        matrix.setByTranslation(Vector(5, 0, 0))
+        mesh.transform(matrix)
+        numpy.testing.assert_array_equal(numpy.array([1, 0, 0]), source[0])
+
+        # Float32 arrays are adopted without copying.
+        vertices = numpy.zeros((3, 3), dtype = numpy.float32)
+        mesh = MeshData()
+        mesh.addVertices(vertices)
+        self.assertIs(vertices, mesh.getVertices().base)
+
+    def test_addFaces(self):
+        mesh = MeshData()
+        mesh.addFace(0, 0, 0, 1, 0, 0, 0, 1, 0)
+        mesh.addFaces(numpy.zeros((4, 3, 3), dtype = numpy.float32), normals = numpy.ones((4, 3, 3), dtype = numpy.float32))
+
+        self.assertEqual(15, mesh.getVertexCount())
+        self.assertEqual(5, mesh.getFaceCount())
+        numpy.testing.assert_array_equal(numpy.array([12, 13, 14]), mesh.getIndices()[4])
+        self.assertEqual((15, 3), mesh.getNormals().shape)
+        numpy.testing.assert_array_equal(numpy.zeros(3), mesh.getNormals()[0])
+        numpy.testing.assert_array_equal(numpy.ones(3), mesh.getNormals()[14])
+
+    def test_getTransformedSharesData(self):
+        mesh = self._createQuad()
+        mesh.weld()
+        mesh.setVertexColor(0, Color(1.0, 0.0, 0.0, 1.0))
+
+        matrix = Matrix()
+        matrix.setByTranslation(Vector(1, 2, 3))
+        transformed = mesh.getTransformed(matrix)
+
+        numpy.testing.assert_array_almost_equal(mesh.getVertices() + [1, 2, 3], transformed.getVertices())
+        self.assertTrue(numpy.shares_memory(mesh.getIndices(), transformed.getIndices()))
+        self.assertTrue(numpy.shares_memory(mesh.getNormals(), transformed.getNormals()))
+        self.assertTrue(numpy.shares_memory(mesh.getColors(), transformed.getColors()))
+
+        # Modifying either mesh copies the shared data first.
+        transformed.setVertexColor(0, Color(0.0, 1.0, 0.0, 1.0))
+        mesh.addFace(0, 0, 0, 1, 1, 1, 2, 2, 2)
+        numpy.testing.assert_array_equal(numpy.array([1, 0, 0, 1]), mesh.getColors()[0])
+        numpy.testing.assert_array_equal(numpy.array([0, 1, 0, 1]), transformed.getColors()[0])
+        self.assertEqual(2, transformed.getFaceCount())
+        self.assertEqual(2, len(transformed.getIndices()))
+
+    def test_getTransformedNormals(self):
+        mesh = self._createQuad()
+
+        matrix = Matrix()
+        matrix.setByRotationAxis(numpy.pi / 2, Vector(0, 0, 1))
+        transformed = mesh.getTransformed(matrix)
+        numpy.testing.assert_array_almost_equal(numpy.array([[-1, 0, 0]] * 6), transformed.getNormals())
+
+        # Non-uniform scaling must keep the normals perpendicular to the surface.
+        matrix = Matrix()
+        matrix.setByScaleFactor(2.0, direction = Vector(0, 1, 0))
+        transformed = mesh.getTransformed(matrix)
+        numpy.testing.assert_array_almost_equal(numpy.array([[0, 1, 0]] * 6), transformed.getNormals())
+
+    def test_transform(self):
+        mesh = self._createQuad()
+        vertices = mesh.getVertices()
+
+        matrix = Matrix()
+        matrix.setByScaleFactor(2.0)
+        mesh.transform(matrix)
+
+        self.assertTrue(numpy.shares_memory(vertices, mesh.getVertices()))
+        self.assertEqual(2, mesh.getVertices()[1, 0])
+
+    def test_getExtents(self):
+        mesh = MeshData()
+        self.assertEqual(Vector(0, 0, 0), mesh.getExtents().minimum)
+
+        mesh.addVertex(1, 2, 3)
+        self.assertEqual(Vector(1, 2, 3), mesh.getExtents().maximum)
+        mesh.addVertex(-1, 0, 5)
+        self.assertEqual(Vector(-1, 0, 3), mesh.getExtents().minimum)
+        self.assertEqual(Vector(1, 2, 5), mesh.getExtents().maximum)
+
+    def test_getExtentsTransformed(self):
+        # A dense cube, so only part of the vertices is kept to transform the extents with.
+        grid = numpy.linspace(-1, 1, 21, dtype = numpy.float32)
+        vertices = numpy.array(numpy.meshgrid(grid, grid, grid)).reshape((3, -1)).T
+        mesh = MeshData(vertices = numpy.ascontiguousarray(vertices))
+
+        matrix = Matrix()
+        matrix.setByRotationAxis(numpy.pi / 4, Vector(0, 1, 0))
+        extents = mesh.getExtents(matrix)
+        self.assertAlmostEqual(-numpy.sqrt(2), extents.minimum.x, places = 5)
+        self.assertAlmostEqual(numpy.sqrt(2), extents.maximum.z, places = 5)
+        self.assertAlmostEqual(1, extents.maximum.y, places = 5)
+
+        matrix.setByRotationAxis(numpy.pi / 4, Vector(1, 0, 0))
+        mesh.transform(matrix)
+        self.assertAlmostEqual(numpy.sqrt(2), mesh.getExtents().maximum.y, places = 5)
+
+    def test_getInterleavedVertexData(self):
+        mesh = self._createQuad()
+        mesh.setVertexUVCoordinates(5, 0.5, 0.25)
+
+        stride, attributes = mesh.getInterleavedLayout()
+        self.assertEqual(32, stride)
+        self.assertEqual([("vertices", "vector3f", 0), ("normals", "vector3f", 12), ("uvs", "vector2f", 24)], attributes)
+
+        data = numpy.frombuffer(mesh.getInterleavedVertexData(), dtype = numpy.float32).reshape((-1, 8))
+        self.assertEqual(6, len(data))
+        numpy.testing.assert_array_equal(numpy.array([0, 0, 1, 0, 1, 0, 0.5, 0.25]), data[5])
+
+    def test_addFaceKeepsChannelsAligned(self):
+        mesh = self._createQuad()
+        mesh.setVertexUVCoordinates(0, 0.5, 0.25)
+        mesh.addFace(0, 1, 0, 1, 1, 0, 0, 1, 1)
+        mesh.addVertexWithNormal(2, 2, 2, 0, 0, 1)
+
+        self.assertEqual(10, mesh.getVertexCount())
+        numpy.testing.assert_array_equal(numpy.zeros((3, 3)), mesh.getNormals()[6:9])
+        numpy.testing.assert_array_equal(numpy.array([0, 0, 1]), mesh.getNormals()[9])
+        numpy.testing.assert_array_equal(numpy.zeros((4, 2)), mesh.getUVCoordinates()[6:10])
+
+        data = numpy.frombuffer(mesh.getInterleavedVertexData(), dtype = numpy.float32).reshape((-1, 8))
+        self.assertEqual(10, len(data))
+        numpy.testing.assert_array_equal(numpy.array([0, 1, 1, 0, 0, 0, 0, 0]), data[8])
+
+    def test_compact(self):
+        mesh = self._createQuad()
+        mesh.weld()
+        mesh.setVertexColor(1, Color(1.0, 0.5, 0.0, 1.0))
+        vertices = mesh.getVertices().copy()
+        mesh.compact()
+
+        self.assertEqual(2, mesh.getIndexSize())
+        numpy.testing.assert_array_equal(numpy.array([[0, 1, 2], [0, 2, 3]]), mesh.getIndices())
+        numpy.testing.assert_array_almost_equal(vertices, mesh.getVertices(), decimal = 4)
+        numpy.testing.assert_array_almost_equal(numpy.array([[0, 1, 0]] * 4), mesh.getNormals(), decimal = 4)
+        numpy.testing.assert_array_almost_equal(numpy.array([1, 0.5, 0, 1]), mesh.getColors()[1], decimal = 2)
+
+        stride, attributes = mesh.getInterleavedLayout()
+        self.assertEqual(20, stride)
+        self.assertEqual([("vertices", "vector3us", 0), ("normals", "vector3s", 8), ("colors", "vector4ub", 16)], attributes)
+        self.assertEqual(80, len(mesh.getInterleavedVertexData()))
+
+        # Transforming only changes the matrix to convert the quantized positions.
+        matrix = Matrix()
+        matrix.setByTranslation(Vector(1, 0, 0))
+        mesh.transform(matrix)
+        numpy.testing.assert_array_almost_equal(vertices + [1, 0, 0], mesh.getVertices(), decimal = 4)
+        self.assertAlmostEqual(2, mesh.getExtents().maximum.x, places = 4)
+
+        # Modifying the mesh restores full precision.
+        mesh.addVertex(5, 5, 5)
+        self.assertEqual(4, mesh.getIndexSize())
+        self.assertIsNone(mesh.getQuantizationMatrix())
+        self.assertEqual(5, mesh.getVertexCount())
+        numpy.testing.assert_array_almost_equal(vertices + [1, 0, 0], mesh.getVertices()[0:4], decimal = 4)
+
+    def test_simplify(self):
+        # A grid of 10x10 quads, 1 unit apart.
+        grid = numpy.arange(11, dtype = numpy.float32)
+        x, z = numpy.meshgrid(grid, grid)
+        vertices = numpy.column_stack((x.ravel(), numpy.zeros(121, dtype = numpy.float32), z.ravel()))
+        corners = numpy.arange(121).reshape((11, 11))[0:10, 0:10].ravel()
+        indices = numpy.concatenate((numpy.column_stack((corners, corners + 11, corners + 1)), numpy.column_stack((corners + 1, corners + 11, corners + 12))))
+        mesh = MeshData(vertices = vertices, indices = indices.astype(numpy.int32))
+        mesh.calculateNormals(smooth = True)
+
+        simplified = mesh.simplify(2.5)
+        self.assertEqual(200, mesh.getFaceCount())
+        self.assertLess(simplified.getFaceCount(), 50)
+        self.assertGreater(simplified.getFaceCount(), 0)
+        self.assertTrue((simplified.getIndices() < simplified.getVertexCount()).all())
+        numpy.testing.assert_array_almost_equal(numpy.array([[0, 1, 0]] * simplified.getVertexCount()), simplified.getNormals())
+        self.assertLessEqual(simplified.getExtents().width, 10)
+
+    def test_analyze(self):
+        report = self._createCube().analyze()
+        self.assertEqual(0, sum(report.values()))
+
+        # Vertices at the same position are connected, so only the outline of the quad is open.
+        report = self._createQuad().analyze()
+        self.assertEqual(4, report["open_edges"])
+        self.assertEqual(0, report["flipped_faces"])
+
+    def test_repair(self):
+        mesh = self._createCube()
+        indices = mesh.getIndices().copy()
+        indices[3] = indices[3, [0, 2, 1]]
+        indices = numpy.vstack((indices, indices[0:1], [[0, 1, 1]]))
+        mesh = MeshData(vertices = mesh.getVertices(), indices = indices)
+        mesh.calculateNormals(smooth = True)
+        normals = mesh.getNormals().copy()
+        normals[2] = numpy.nan
+        mesh = MeshData(vertices = mesh.getVertices(), normals = normals, indices = indices)
+
+        report = mesh.repair()
+        self.assertEqual(1, report["degenerate_faces"])
+        self.assertEqual(1, report["duplicate_faces"])
+        self.assertEqual(1, report["flipped_faces"])
+        self.assertEqual(1, report["invalid_normals"])
+        self.assertEqual(0, report["open_edges"])
+
+        self.assertEqual(12, mesh.getFaceCount())
+        self.assertEqual(0, sum(mesh.analyze().values()))
+        numpy.testing.assert_array_almost_equal(numpy.ones(8), numpy.linalg.norm(mesh.getNormals(), axis = 1))
+
+    def test_repairInsideOut(self):
+        mesh = self._createCube()
+        mesh = MeshData(vertices = mesh.getVertices(), indices = mesh.getIndices()[:, [0, 2, 1]])
+
+        self.assertEqual(12, mesh.repair()["flipped_faces"])
+        numpy.testing.assert_array_equal(self._createCube().getIndices(), mesh.getIndices())
+
+    def test_getMemoryUsage(self):
+        mesh = MeshData()
+        mesh.reserveFaceCount(10)
+        mesh.addFace(0, 0, 0, 1, 0, 0, 0, 0, 1)
+
+        usage = mesh.getMemoryUsage()
+        self.assertEqual((3 * 12, 30 * 12), usage["vertices"])
+        self.assertEqual((0, 0), usage["colors"])
+        self.assertEqual((0, 0), usage["vertex_buffer"])
+
+        self.assertEqual(2 * 27 * 12 + 9 * 12, mesh.trimToSize())
+        usage = mesh.getMemoryUsage()
+        self.assertEqual((3 * 12, 3 * 12), usage["vertices"])
+        self.assertEqual((12, 12), usage["indices"])
+        self.assertEqual(0, mesh.trimToSize())
+
+    def test_removeVertices(self):
+        mesh = self._createCube()
+        vertices = mesh.getVertices().copy()
+
+        self.assertEqual(1, mesh.removeVertices([0]))
+        self.assertEqual(7, mesh.getVertexCount())
+        # The six faces around the first corner are removed, the others now use the renumbered vertices.
+        self.assertEqual(6, mesh.getFaceCount())
+        numpy.testing.assert_array_equal(vertices[1:], mesh.getVertices())
+        self.assertTrue((mesh.getIndices() < 7).all())
+        numpy.testing.assert_array_equal(numpy.array([[3, 5, 6], [3, 6, 4]]), mesh.getIndices()[0:2])
+
+        points = MeshData(vertices = vertices, colors = numpy.ones((8, 4), dtype = numpy.float32))
+        self.assertEqual(4, points.removeVertices(vertices[:, 0] > 0.5))
+        self.assertEqual(4, points.getVertexCount())
+        self.assertEqual((4, 4), points.getColors().shape)
+        numpy.testing.assert_array_equal(vertices[0:4], points.getVertices())
+
+        points.removeVertex(10)
+        self.assertEqual(4, points.getVertexCount())
+
+if __name__ == "__main__":
+    unittest.main()
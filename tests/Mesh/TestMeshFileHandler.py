@@ -0,0 +1,92 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Mesh.MeshFileHandler import MeshFileHandler
+from UM.Mesh.MeshReadContext import MeshReadContext
+from UM.Preferences import Preferences
+
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "plugins", "FileHandlers"))
+from STLReader.STLReader import STLReader
+
+class _LocalFileDevice:
+    def openFile(self, file_name, mode):
+        return open(file_name, mode)
+
+    def closeFile(self, file):
+        file.close()
+
+class TestMeshFileHandler(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.mkdtemp()
+        self._preferences = {}
+        self._handler = MeshFileHandler()
+        self._handler.addReader(STLReader())
+
+        # Keep the cache of the user out of the tests.
+        preferences = Preferences.getInstance()
+        for key, value in (("mesh/cache_enabled", False), ("mesh/reader_processes", 2)):
+            self._preferences[key] = preferences.getValue(key)
+            preferences.setValue(key, value)
+
+        random = numpy.random.RandomState(1)
+        self._file_names = []
+        for i in range(3):
+            file_name = os.path.join(self._directory, "mesh{0}.stl".format(i))
+            face_count = 100 * (i + 1)
+            with open(file_name, "wb") as f:
+                f.write(b"\0" * 80)
+                f.write(struct.pack("<I", face_count))
+                records = numpy.zeros((face_count, 25), dtype = numpy.uint16)
+                records[:, 6:24] = random.uniform(0, 10, (face_count, 9)).astype(numpy.float32).view(numpy.uint16)
+                f.write(records.tobytes())
+            self._file_names.append(file_name)
+
+        self._read_files = []
+
+    def tearDown(self):
+        for key, value in self._preferences.items():
+            Preferences.getInstance().setValue(key, value)
+        shutil.rmtree(self._directory)
+
+    def _onFileRead(self, file_name, mesh):
+        self._read_files.append((file_name, mesh))
+
+    def test_readMany(self):
+        file_names = self._file_names + [os.path.join(self._directory, "missing.stl")]
+        context = MeshReadContext()
+        results = self._handler.readMany(file_names, _LocalFileDevice(), self._onFileRead, context = context)
+
+        self.assertEqual(4, len(results))
+        self.assertIsNone(results[3])
+        self.assertEqual(100, context.getProgress())
+        self.assertEqual(sorted(file_names), sorted(file_name for file_name, mesh in self._read_files))
+
+        for file_name, mesh in zip(self._file_names, results):
+            self.assertIsNotNone(mesh)
+            # The results of worker processes are mapped from the files they wrote, except on Windows.
+            if sys.platform != "win32":
+                self.assertIsInstance(mesh.getVertices(), numpy.memmap)
+            self.assertEqual(file_name, mesh.getFileName())
+            expected = self._handler.read(file_name, _LocalFileDevice())
+            self.assertEqual(expected.getFaceCount(), mesh.getFaceCount())
+            numpy.testing.assert_allclose(expected.getVertices(), mesh.getVertices(), atol = 1e-5)
+
+    def test_readCancelled(self):
+        context = MeshReadContext()
+        context.cancel()
+        self.assertIsNone(self._handler.read(self._file_names[0], _LocalFileDevice(), context = context))
+
+        results = self._handler.readMany(self._file_names, _LocalFileDevice(), self._onFileRead, context = context)
+        self.assertEqual([None] * 3, results)
+        self.assertEqual([], self._read_files)
+
+if __name__ == "__main__":
+    unittest.main()
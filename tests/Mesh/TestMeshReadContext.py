@@ -0,0 +1,51 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Mesh.MeshReadContext import MeshReadContext, MeshReadCancelledError
+
+import unittest
+
+class TestMeshReadContext(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_progress(self):
+        context = MeshReadContext()
+        self.assertEqual(-1, context.getProgress())
+
+        context.setTotal(200)
+        context.setProcessed(50)
+        self.assertEqual(25, context.getProgress())
+        context.setProcessed(300)
+        self.assertEqual(100, context.getProgress())
+
+    def test_cancel(self):
+        context = MeshReadContext()
+        context.checkCancelled()
+
+        context.cancel()
+        self.assertTrue(context.isCancelled())
+        with self.assertRaises(MeshReadCancelledError):
+            context.checkCancelled()
+
+    def test_cancelParent(self):
+        parent = MeshReadContext()
+        child = MeshReadContext(parent)
+        grandchild = MeshReadContext(child)
+
+        # Cancelling a child does not cancel its parent.
+        other_child = MeshReadContext(parent)
+        other_child.cancel()
+        self.assertFalse(parent.isCancelled())
+        self.assertFalse(grandchild.isCancelled())
+
+        parent.cancel()
+        self.assertTrue(child.isCancelled())
+        with self.assertRaises(MeshReadCancelledError):
+            grandchild.checkCancelled()
+
+if __name__ == "__main__":
+    unittest.main()
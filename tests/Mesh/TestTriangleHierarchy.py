@@ -0,0 +1,114 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Mesh.MeshData import MeshData
+from UM.Mesh.TriangleHierarchy import TriangleHierarchy
+from UM.Mesh.TriangleHierarchyJob import TriangleHierarchyJob
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
+from UM.Math.Ray import Ray
+
+import unittest
+import numpy
+
+# A mesh that is moved by another thread right after a job read its vertices.
+class _ChangingMesh(MeshData):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._changed = False
+
+    def getVertices(self):
+        vertices = super().getVertices()
+        if not self._changed:
+            self._changed = True
+            matrix = Matrix()
+            matrix.setByTranslation(Vector(100, 0, 0))
+            self.transform(matrix)
+        return vertices
+
+class TestTriangleHierarchy(unittest.TestCase):
+    def setUp(self):
+        # A 50 by 50 grid of squares in the XZ plane with random heights, 5000 faces.
+        random = numpy.random.RandomState(1)
+        x, z = numpy.meshgrid(numpy.arange(51), numpy.arange(51), indexing = "ij")
+        vertices = numpy.stack((x.ravel(), random.uniform(0, 2, x.size), z.ravel()), axis = 1).astype(numpy.float32)
+        corners = (x[:-1, :-1] * 51 + z[:-1, :-1]).ravel()
+        indices = numpy.concatenate((
+            numpy.stack((corners, corners + 1, corners + 52), axis = 1),
+            numpy.stack((corners, corners + 52, corners + 51), axis = 1)
+        )).astype(numpy.int32)
+        self._mesh = MeshData(vertices = vertices, indices = indices)
+        self._hierarchy = TriangleHierarchy(self._mesh)
+
+    def tearDown(self):
+        pass
+
+    def test_create(self):
+        self.assertEqual(self._hierarchy.getFaceCount(), 5000)
+        self.assertEqual(self._hierarchy.getDepth(), 10)
+        self.assertGreater(self._hierarchy.getMemoryUsage(), 5000 * 36)
+
+    def test_intersectRay(self):
+        hit = self._hierarchy.intersectRay(Ray(Vector(10.25, 10, 20.75), Vector(0, -1, 0)))
+        self.assertIsNotNone(hit)
+        face, distance = hit
+        position = numpy.array([10.25, 10 - distance, 20.75])
+        corners = self._mesh.getVertices()[self._mesh.getIndices()[face]]
+        self.assertTrue(numpy.all(corners[:, [0, 2]].min(axis = 0) <= position[[0, 2]]))
+        self.assertTrue(numpy.all(corners[:, [0, 2]].max(axis = 0) >= position[[0, 2]]))
+        self.assertTrue(8 <= distance <= 10)
+
+        # Faces are hit from both sides and not behind the origin.
+        self.assertIsNotNone(self._hierarchy.intersectRay(Ray(Vector(10.25, -10, 20.75), Vector(0, 1, 0))))
+        self.assertIsNone(self._hierarchy.intersectRay(Ray(Vector(10.25, 10, 20.75), Vector(0, 1, 0))))
+        self.assertIsNone(self._hierarchy.intersectRay(Ray(Vector(60, 1, 20), Vector(0, -1, 0))))
+
+    def test_intersectRayMatchesAllFaces(self):
+        corners = self._mesh.getVertices()[self._mesh.getIndices()]
+        random = numpy.random.RandomState(2)
+        for i in range(50):
+            origin = Vector(data = random.uniform(-10, 60, 3).astype(numpy.float32))
+            direction = Vector(data = random.uniform(-1, 1, 3).astype(numpy.float32))
+            ray = Ray(origin, direction)
+
+            expected = TriangleHierarchy.intersectTriangles(corners, ray)
+            hit = self._hierarchy.intersectRay(ray)
+            if expected is None:
+                self.assertIsNone(hit)
+            else:
+                self.assertIsNotNone(hit)
+                self.assertAlmostEqual(hit[1], expected[1], places = 4)
+
+    def test_withoutIndices(self):
+        vertices = numpy.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 2], [1, 0, 2], [0, 1, 2]], dtype = numpy.float32)
+        hierarchy = TriangleHierarchy(MeshData(vertices = vertices))
+        self.assertEqual(hierarchy.getFaceCount(), 2)
+        self.assertEqual(hierarchy.intersectRay(Ray(Vector(0.25, 0.25, 5), Vector(0, 0, -1))), (1, 3))
+
+        self.assertIsNone(TriangleHierarchy(MeshData()).intersectRay(Ray(Vector(0, 0, 5), Vector(0, 0, -1))))
+
+    def test_jobDropsStaleHierarchy(self):
+        mesh = _ChangingMesh(vertices = self._mesh.getVertices().copy(), indices = self._mesh.getIndices())
+        job = TriangleHierarchyJob(mesh)
+        job.run()
+        self.assertIsNone(job.getResult())
+        self.assertIsNone(mesh.getTriangleHierarchy())
+
+        # The next job sees the moved mesh.
+        job = TriangleHierarchyJob(mesh)
+        job.run()
+        self.assertIs(mesh.getTriangleHierarchy(), job.getResult())
+        self.assertIsNotNone(job.getResult().intersectRay(Ray(Vector(110.25, 10, 20.75), Vector(0, -1, 0))))
+
+    def test_changeDropsHierarchy(self):
+        self._mesh.setTriangleHierarchy(self._hierarchy)
+        self.assertIs(self._mesh.getTriangleHierarchy(), self._hierarchy)
+
+        generation = self._mesh.getGeneration()
+        self._mesh.transform(Matrix())
+        self.assertIsNone(self._mesh.getTriangleHierarchy())
+        self.assertFalse(self._mesh.setTriangleHierarchy(self._hierarchy, generation))
+        self.assertIsNone(self._mesh.getTriangleHierarchy())
+
+if __name__ == "__main__":
+    unittest.main()
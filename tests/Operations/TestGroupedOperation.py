@@ -0,0 +1,35 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Operations.GroupedOperation import GroupedOperation
+from UM.Operations.TranslateOperation import TranslateOperation
+from UM.Scene.SceneNode import SceneNode
+from UM.Scene.Scene import Scene
+
+from UM.Math.Vector import Vector
+
+import unittest
+
+class TestGroupedOperation(unittest.TestCase):
+    def setUp(self):
+        self._scene = Scene()
+        self._nodes = [SceneNode(self._scene.getRoot()) for i in range(3)]
+
+    def tearDown(self):
+        pass
+
+    def test_withoutApplication(self):
+        op = GroupedOperation()
+        for node in self._nodes:
+            op.addOperation(TranslateOperation(node, Vector(10, 0, 0)))
+
+        op.redo()
+        for node in self._nodes:
+            self.assertEqual(node.getWorldPosition(), Vector(10, 0, 0))
+
+        op.undo()
+        for node in self._nodes:
+            self.assertEqual(node.getWorldPosition(), Vector(0, 0, 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Scene.SceneNode import SceneNode
+from UM.Scene.Scene import Scene
+from UM.Scene.Camera import Camera
+from UM.Mesh.MeshData import MeshData
+
+from UM.Math.Vector import Vector
+from UM.Math.Ray import Ray
+from UM.Math.AxisAlignedBox import AxisAlignedBox
+
+import unittest
+import numpy
+
+class BoundingVolumeHierarchyTest(unittest.TestCase):
+    def setUp(self):
+        self._scene = Scene()
+        self._hierarchy = self._scene.getBoundingVolumeHierarchy()
+
+        corners = numpy.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype = numpy.float32)
+        self._mesh = MeshData(vertices = corners)
+
+        # A row of 100 cubes along the X axis, 10 units apart.
+        self._nodes = []
+        for i in range(100):
+            node = SceneNode(self._scene.getRoot())
+            node.setMeshData(self._mesh)
+            node.setPosition(Vector(i * 10, 0, 0))
+            self._nodes.append(node)
+
+    def tearDown(self):
+        pass
+
+    def test_intersectRay(self):
+        hits = self._hierarchy.intersectRay(Ray(Vector(-100, 0, 0), Vector(1, 0, 0)))
+        self.assertEqual([node for node, distance in hits], self._nodes)
+        self.assertAlmostEqual(hits[0][1], 99)
+        self.assertAlmostEqual(hits[1][1], 109)
+
+        hits = self._hierarchy.intersectRay(Ray(Vector(500, 0, -100), Vector(0, 0, 1)))
+        self.assertEqual(hits, [(self._nodes[50], 99)])
+
+        # Boxes behind the ray are not hit.
+        self.assertEqual(self._hierarchy.intersectRay(Ray(Vector(500, 0, -100), Vector(0, 0, -1))), [])
+        self.assertEqual(self._hierarchy.intersectRay(Ray(Vector(505, 0, -100), Vector(0, 0, 1))), [])
+
+    def test_intersectBox(self):
+        nodes = self._hierarchy.intersectBox(AxisAlignedBox(minimum = Vector(95, -5, -5), maximum = Vector(125, 5, 5)))
+        self.assertEqual(set(nodes), set(self._nodes[10:13]))
+
+        self.assertEqual(self._hierarchy.intersectBox(AxisAlignedBox(minimum = Vector(0, 5, 0), maximum = Vector(1000, 10, 10))), [])
+
+    def test_intersectFrustum(self):
+        # An orthographic camera looking down the Z axis, from x = -10 to x = 10.
+        camera = Camera("test")
+        camera.getProjectionMatrix().setOrtho(-10, 10, -10, 10, 1, 500)
+        camera.setPosition(Vector(0, 0, 100))
+        self.assertEqual(set(self._hierarchy.intersectFrustum(camera)), set(self._nodes[0:2]))
+
+        # From x = 195 to x = 305.
+        camera.getProjectionMatrix().setOrtho(-55, 55, -10, 10, 1, 500)
+        camera.setPosition(Vector(250, 0, 100))
+        self.assertEqual(set(self._hierarchy.intersectFrustum(camera)), set(self._nodes[20:31]))
+
+        # Nodes behind the camera or beyond the far plane are outside.
+        camera.setPosition(Vector(250, 0, -10))
+        self.assertEqual(self._hierarchy.intersectFrustum(camera), [])
+        camera.setPosition(Vector(250, 0, 600))
+        self.assertEqual(self._hierarchy.intersectFrustum(camera), [])
+
+        # With a field of view of 90 degrees, Matrix.setPerspective() sees a width equal to the distance,
+        # so from x = 190 to x = 310 at z = 0.
+        camera.getProjectionMatrix().setPerspective(90, 1, 1, 500)
+        camera.setPosition(Vector(250, 0, 120))
+        self.assertEqual(set(self._hierarchy.intersectFrustum(camera)), set(self._nodes[19:32]))
+
+    def test_update(self):
+        ray = Ray(Vector(500, 0, -100), Vector(0, 0, 1))
+        self.assertEqual(self._hierarchy.intersectRay(ray), [(self._nodes[50], 99)])
+
+        # Moving a node a little keeps it in place in the tree, moving it further moves it.
+        self._nodes[50].translate(Vector(0.5, 0, 0))
+        self.assertEqual(self._hierarchy.intersectRay(Ray(Vector(501.2, 0, -100), Vector(0, 0, 1))), [(self._nodes[50], 99)])
+        self._nodes[50].translate(Vector(0, 100, 0))
+        self.assertEqual(self._hierarchy.intersectRay(ray), [])
+        self.assertEqual(self._hierarchy.intersectRay(Ray(Vector(500, 100, -100), Vector(0, 0, 1))), [(self._nodes[50], 99)])
+
+        # Moving a parent moves its children, the local position of the child is now relative to x = 400.
+        self._nodes[60].setParent(self._nodes[40])
+        self._nodes[40].translate(Vector(0, 0, 100))
+        hits = self._hierarchy.intersectRay(Ray(Vector(1000, 0, -100), Vector(0, 0, 1)))
+        self.assertEqual(hits, [(self._nodes[60], 199)])
+
+        self._nodes[70].setMeshData(None)
+        self._scene.getRoot().removeChild(self._nodes[80])
+        hits = self._hierarchy.intersectRay(Ray(Vector(-100, 0, 0), Vector(1, 0, 0)))
+        self.assertNotIn(self._nodes[70], [node for node, distance in hits])
+        self.assertNotIn(self._nodes[80], [node for node, distance in hits])
+
+        self.assertLessEqual(self._hierarchy.getHeight(), 8)
+
+if __name__ == "__main__":
+    unittest.main()
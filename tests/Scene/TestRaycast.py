@@ -0,0 +1,72 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Scene.SceneNode import SceneNode
+from UM.Scene.Scene import Scene
+from UM.Mesh.MeshData import MeshData, MeshType
+from UM.Mesh.TriangleHierarchy import TriangleHierarchy
+
+from UM.Math.Vector import Vector
+from UM.Math.Quaternion import Quaternion
+from UM.Math.Ray import Ray
+
+import unittest
+import numpy
+
+class RaycastTest(unittest.TestCase):
+    def setUp(self):
+        self._scene = Scene()
+
+        # A square of two faces in the XY plane from (-1, -1) to (1, 1).
+        vertices = numpy.array([[-1, -1, 0], [1, -1, 0], [1, 1, 0], [-1, 1, 0]], dtype = numpy.float32)
+        self._mesh = MeshData(vertices = vertices, indices = numpy.array([[0, 1, 2], [0, 2, 3]], dtype = numpy.int32))
+
+        self._near = SceneNode(self._scene.getRoot())
+        self._near.setMeshData(self._mesh)
+        self._near.setPosition(Vector(0, 0, 5))
+
+        self._far = SceneNode(self._scene.getRoot())
+        self._far.setMeshData(self._mesh)
+        self._far.setScale(Vector(4, 4, 1))
+        self._far.rotate(Quaternion.fromAngleAxis(0.5, Vector(0, 0, 1)))
+
+    def tearDown(self):
+        pass
+
+    def test_raycast(self):
+        ray = Ray(Vector(0.5, -0.5, 10), Vector(0, 0, -1))
+        node, face, distance, position = self._scene.raycast(ray)
+        self.assertIs(node, self._near)
+        self.assertEqual(face, 0)
+        self.assertAlmostEqual(distance, 5, places = 5)
+        self.assertEqual(position, Vector(0.5, -0.5, 5))
+
+        # The far node is only hit outside of the near one.
+        node, face, distance, position = self._scene.raycast(Ray(Vector(3, 0, 10), Vector(0, 0, -1)))
+        self.assertIs(node, self._far)
+        self.assertAlmostEqual(distance, 10, places = 5)
+
+        self.assertIsNone(self._scene.raycast(Ray(Vector(10, 0, 10), Vector(0, 0, -1))))
+        self.assertIsNone(self._scene.raycast(Ray(Vector(0, 0, 10), Vector(0, 0, 1))))
+
+    def test_filter(self):
+        ray = Ray(Vector(0.5, -0.5, 10), Vector(0, 0, -1))
+        self.assertIs(self._scene.raycast(ray, node_filter = lambda node: node is not self._near)[0], self._far)
+
+        mesh = MeshData(vertices = self._mesh.getVertices())
+        mesh.setType(MeshType.pointcloud)
+        point_cloud = SceneNode(self._scene.getRoot())
+        point_cloud.setMeshData(mesh)
+        point_cloud.setPosition(Vector(0, 0, 8))
+        self.assertIs(self._scene.raycast(ray)[0], self._near)
+
+    def test_triangleHierarchy(self):
+        ray = Ray(Vector(-0.5, 0.5, 10), Vector(0, 0, -1))
+        hit = self._scene.raycast(ray)
+        self.assertEqual(hit[0:2], (self._near, 1))
+
+        self._mesh.setTriangleHierarchy(TriangleHierarchy(self._mesh))
+        self.assertEqual(self._scene.raycast(ray)[0:3], hit[0:3])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,7 @@
 # Uranium is released under the terms of the AGPLv3 or higher.
 
 from UM.Scene.SceneNode import SceneNode
+from UM.Scene.Scene import Scene
 
 from UM.Math.Vector import Vector
 from UM.Math.Quaternion import Quaternion
@@ -10,6 +11,7 @@ from UM.Math.Float import Float
 
 import unittest
 import math
+from copy import deepcopy
 
 class SceneNodeTest(unittest.TestCase):
     def setUp(self):
@@ -159,6 +161,56 @@ class SceneNodeTest(unittest.TestCase):
         self.assertTrue(Float.fuzzyCompare(pos.z, 30, 1e-4), "{0} does not equal {1}".format(pos, Vector(70, 0, 30)))
 
 
+    def test_transaction(self):
+        scene = Scene()
+        group = SceneNode(scene.getRoot())
+        child = SceneNode(group)
+        self.assertEqual(child.getWorldPosition(), Vector(0, 0, 0))
+
+        scene.beginTransaction()
+        scene.beginTransaction()
+        group.translate(Vector(10, 0, 0))
+        child.translate(Vector(0, 5, 0))
+        scene.endTransaction()
+        group.translate(Vector(10, 0, 0))
+        scene.endTransaction()
+
+        self.assertEqual(group.getWorldPosition(), Vector(20, 0, 0))
+        self.assertEqual(child.getWorldPosition(), Vector(20, 5, 0))
+
+        # Outside of a transaction, changes apply immediately again.
+        group.translate(Vector(0, 0, 1))
+        self.assertEqual(child.getWorldPosition(), Vector(20, 5, 1))
+
+    def test_readOnlyTransformation(self):
+        node = SceneNode()
+        position = Vector(0, 0, 10)
+        node.setPosition(position)
+
+        # Changing the value passed to a setter should not affect the node.
+        position.setZ(20)
+        self.assertEqual(node.getPosition(), Vector(0, 0, 10))
+
+        self.assertIs(node.getPosition(), node.getPosition())
+        self.assertIs(node.getWorldTransformation(), node.getWorldTransformation())
+
+        with self.assertRaises(ValueError):
+            node.getPosition().setX(5)
+        with self.assertRaises(ValueError):
+            node.getOrientation().normalize()
+        with self.assertRaises(ValueError):
+            node.getWorldTransformation().setToIdentity()
+
+        scale = deepcopy(node.getScale())
+        scale.setX(2)
+        node.setScale(scale)
+        self.assertEqual(node.getScale(), Vector(2, 1, 1))
+
+        translation = node.getWorldTransformation().getTranslation()
+        node.translate(Vector(0, 0, 10))
+        self.assertEqual(translation, Vector(0, 0, 10))
+        self.assertEqual(node.getWorldPosition(), Vector(0, 0, 20))
+
     def test_rotateWorld(self):
         pass
 
@@ -0,0 +1,94 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Scene.SceneNode import SceneNode
+from UM.Scene.Scene import Scene
+from UM.Scene.Selection import Selection
+from UM.Signal import Signal
+
+from UM.Math.Vector import Vector
+
+import unittest
+import threading
+
+# Signals are only delivered when there is an application, this provides the part they use.
+class _Application:
+    def getMainThread(self):
+        return threading.current_thread()
+
+class SelectionTest(unittest.TestCase):
+    def setUp(self):
+        self._app = Signal._app
+        Signal._app = _Application()
+
+        self._scene = Scene()
+        self._nodes = [SceneNode(self._scene.getRoot()) for i in range(50)]
+        for node in self._nodes:
+            Selection.add(node)
+
+        self._center_changes = 0
+        Selection.selectionCenterChanged.connect(self._onSelectionCenterChanged)
+
+    def tearDown(self):
+        Selection.selectionCenterChanged.disconnect(self._onSelectionCenterChanged)
+        for node in self._nodes:
+            Selection.remove(node)
+        Signal._app = self._app
+
+    def _onSelectionCenterChanged(self):
+        self._center_changes += 1
+
+    def test_transformationChanged(self):
+        self._nodes[0].translate(Vector(50, 0, 0))
+        self.assertEqual(self._center_changes, 1)
+        self.assertEqual(Selection.getSelectionCenter(), Vector(1, 0, 0))
+
+    def test_transaction(self):
+        self._scene.beginTransaction()
+        for node in self._nodes:
+            node.translate(Vector(10, 0, 0))
+        self._scene.endTransaction()
+
+        # The center of the selection is updated once for all nodes.
+        self.assertEqual(self._center_changes, 1)
+        self.assertEqual(Selection.getSelectionCenter(), Vector(10, 0, 0))
+
+        # Transactions that do not change selected nodes do not change the center.
+        self._scene.beginTransaction()
+        SceneNode(self._scene.getRoot()).translate(Vector(0, 10, 0))
+        self._scene.endTransaction()
+        self.assertEqual(self._center_changes, 1)
+
+    def test_transactionOfOtherScene(self):
+        # Changes made in another scene while a transaction is notified are notified as usual.
+        other_scene = Scene()
+        self._other_node = SceneNode(other_scene.getRoot())
+        self._other_changes = 0
+        other_scene.getRoot().transformationChanged.connect(self._onOtherChanged)
+
+        node = SceneNode(self._scene.getRoot())
+        node.transformationChanged.connect(self._moveOtherNode)
+
+        self._scene.beginTransaction()
+        node.translate(Vector(0, 10, 0))
+        self._scene.endTransaction()
+        self.assertEqual(self._other_changes, 1)
+
+        Selection.add(self._other_node)
+        try:
+            center_changes = self._center_changes
+            self._scene.beginTransaction()
+            node.translate(Vector(0, 10, 0))
+            self._scene.endTransaction()
+            self.assertEqual(self._center_changes, center_changes + 1)
+        finally:
+            Selection.remove(self._other_node)
+
+    def _onOtherChanged(self, node):
+        self._other_changes += 1
+
+    def _moveOtherNode(self, node):
+        self._other_node.translate(Vector(1, 0, 0))
+
+if __name__ == "__main__":
+    unittest.main()
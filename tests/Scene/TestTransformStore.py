@@ -0,0 +1,125 @@
+# Copyright (c) 2015 Ultimaker B.V.
+# Uranium is released under the terms of the AGPLv3 or higher.
+
+from UM.Scene.SceneNode import SceneNode
+from UM.Scene.Scene import Scene
+
+from UM.Math.Vector import Vector
+from UM.Math.Quaternion import Quaternion
+
+import unittest
+import math
+import numpy
+
+class TransformStoreTest(unittest.TestCase):
+    def setUp(self):
+        self._scene = Scene()
+        self._store = self._scene.getTransformStore()
+
+    def tearDown(self):
+        pass
+
+    # Create the same small tree in the scene and outside of it.
+    def _createTrees(self):
+        trees = []
+        for root in (self._scene.getRoot(), SceneNode()):
+            node1 = SceneNode(root)
+            node2 = SceneNode(node1)
+            node3 = SceneNode(node2)
+            trees.append([root, node1, node2, node3])
+        return trees
+
+    def _transform(self, nodes):
+        nodes[1].setPosition(Vector(10, 0, 0))
+        nodes[1].setScale(Vector(2, 1, 0.5))
+        nodes[2].rotate(Quaternion.fromAngleAxis(math.pi / 4, Vector(0, 1, 0)))
+        nodes[2].translate(Vector(0, 5, 5))
+        nodes[3].setPosition(Vector(1, 2, 3))
+        nodes[3].setScale(Vector(3, 3, 3))
+
+    def test_addNode(self):
+        nodes = self._createTrees()[0]
+
+        indices = [self._store.getIndex(node) for node in nodes]
+        self.assertEqual(len(set(indices)), 4)
+        self.assertEqual(list(self._store.getParentIndices()[indices]), [-1] + indices[:-1])
+        for node, index in zip(nodes, indices):
+            self.assertIs(self._store.getNode(index), node)
+
+        self.assertEqual(self._store.getIndex(SceneNode()), -1)
+
+    def test_removeNode(self):
+        nodes = self._createTrees()[0]
+        indices = [self._store.getIndex(nodes[2]), self._store.getIndex(nodes[3])]
+
+        nodes[1].removeChild(nodes[2])
+        self.assertEqual(self._store.getIndex(nodes[2]), -1)
+        self.assertEqual(self._store.getIndex(nodes[3]), -1)
+        self.assertIs(self._store.getNode(indices[0]), None)
+
+        # Removed indices are reused.
+        node = SceneNode(nodes[1])
+        self.assertIn(self._store.getIndex(node), indices)
+
+    def test_worldTransformation(self):
+        scene_nodes, plain_nodes = self._createTrees()
+        self._transform(scene_nodes)
+        self._transform(plain_nodes)
+
+        for scene_node, plain_node in zip(scene_nodes, plain_nodes):
+            self.assertTrue(numpy.allclose(scene_node.getWorldTransformation().getData(), plain_node.getWorldTransformation().getData(), atol = 1e-5))
+            self.assertTrue(numpy.allclose(scene_node.getLocalTransformation().getData(), plain_node.getLocalTransformation().getData(), atol = 1e-5))
+            self.assertEqual(scene_node.getWorldPosition(), plain_node.getWorldPosition())
+
+        transformations = self._store.getWorldTransformations()
+        for node in scene_nodes:
+            self.assertTrue(numpy.array_equal(transformations[self._store.getIndex(node)], node.getWorldTransformation().getData()))
+
+        with self.assertRaises(ValueError):
+            transformations[0, 0, 0] = 2
+
+    def test_transaction(self):
+        scene_nodes, plain_nodes = self._createTrees()
+
+        self._scene.beginTransaction()
+        self._transform(scene_nodes)
+        self._scene.endTransaction()
+        self._transform(plain_nodes)
+
+        for scene_node, plain_node in zip(scene_nodes, plain_nodes):
+            self.assertEqual(scene_node.getWorldPosition(), plain_node.getWorldPosition())
+
+    def test_reparent(self):
+        nodes = self._createTrees()[0]
+        nodes[1].setPosition(Vector(10, 0, 0))
+        nodes[3].setPosition(Vector(0, 0, 5))
+        self.assertEqual(nodes[3].getWorldPosition(), Vector(10, 0, 5))
+
+        nodes[3].setParent(nodes[0])
+        self.assertEqual(self._store.getParentIndices()[self._store.getIndex(nodes[3])], self._store.getIndex(nodes[0]))
+        self.assertEqual(nodes[3].getWorldPosition(), Vector(0, 0, 5))
+
+    def test_setRoot(self):
+        old_root = self._scene.getRoot()
+        root = SceneNode()
+        node = SceneNode(root)
+        node.setPosition(Vector(0, 10, 0))
+
+        self._scene.setRoot(root)
+        self.assertEqual(self._store.getIndex(old_root), -1)
+        self.assertNotEqual(self._store.getIndex(node), -1)
+        self.assertEqual(node.getWorldPosition(), Vector(0, 10, 0))
+
+    def test_grow(self):
+        root = self._scene.getRoot()
+        nodes = []
+        for i in range(100):
+            node = SceneNode(root)
+            node.setPosition(Vector(i, 0, 0))
+            nodes.append(node)
+
+        for i, node in enumerate(nodes):
+            self.assertEqual(node.getWorldPosition(), Vector(i, 0, 0))
+
+if __name__ == "__main__":
+    unittest.main()
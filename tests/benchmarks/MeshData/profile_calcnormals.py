@@ -3,10 +3,28 @@
 
 from UM.Mesh.MeshData import MeshData
 
+import numpy
+
 @profile
 def calcNormals(mesh):
     mesh.calculateNormals()
 
+@profile
+def calcIndexedNormals(mesh):
+    mesh.calculateNormals()
+
+@profile
+def calcSmoothNormals(mesh):
+    mesh.calculateNormals(smooth = True)
+
+@profile
+def calcAngleWeightedNormals(mesh):
+    mesh.calculateNormals(smooth = True, weighting = "angle")
+
+@profile
+def calcCreasedNormals(mesh):
+    mesh.calculateNormals(smooth = True, crease_angle = 30)
+
 mesh = MeshData()
 mesh.reserveVertexCount(99999)
 for i in range(33333):
@@ -16,3 +34,19 @@ for i in range(33333):
 
 for i in range(100):
     calcNormals(mesh)
+
+# An indexed grid of 1000 x 500 quads, so one million faces with shared vertices.
+x, z = numpy.meshgrid(numpy.arange(1001, dtype = numpy.float32), numpy.arange(501, dtype = numpy.float32))
+vertices = numpy.stack((x, numpy.sin(x * 0.1) * numpy.cos(z * 0.1), z), axis = -1).reshape((-1, 3))
+grid = numpy.arange(1001 * 501, dtype = numpy.int32).reshape((501, 1001))
+corners = (grid[:-1, :-1], grid[:-1, 1:], grid[1:, 1:], grid[1:, :-1])
+indices = numpy.concatenate((
+    numpy.stack((corners[0], corners[1], corners[2]), axis = -1).reshape((-1, 3)),
+    numpy.stack((corners[0], corners[2], corners[3]), axis = -1).reshape((-1, 3))
+))
+
+for i in range(10):
+    calcIndexedNormals(MeshData(vertices = vertices, indices = indices))
+    calcSmoothNormals(MeshData(vertices = vertices, indices = indices))
+    calcAngleWeightedNormals(MeshData(vertices = vertices, indices = indices))
+    calcCreasedNormals(MeshData(vertices = vertices, indices = indices))